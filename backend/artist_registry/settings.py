@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 import base64
 import os
 import stat
+import sys
 import tempfile
 from pathlib import Path
 
@@ -304,6 +305,107 @@ if current_mode != 0o600:
 # Export as a string for downstream consumers
 ARWEAVE_WALLET_PATH = str(wallet_path)
 
+# Arweave uploads: large files are posted as 256 KiB chunks, several at a time
+ARWEAVE_GATEWAY_URL = os.getenv('ARWEAVE_GATEWAY_URL', 'https://arweave.net')
+ARWEAVE_CHUNK_CONCURRENCY = int(os.getenv('ARWEAVE_CHUNK_CONCURRENCY', '4'))  # chunks in flight per upload
+ARWEAVE_CHUNK_TIMEOUT = float(os.getenv('ARWEAVE_CHUNK_TIMEOUT', '60'))  # seconds per chunk request
+
+# Caches
+# The artists cache must be shared by every gunicorn worker and the run_jobs
+# worker, or a save only invalidates the process that made it. 'db' (the
+# default, table created by `manage.py createcachetable` in entrypoint.sh) is
+# the only backend shared across Railway services; 'file' is shared within one
+# container, 'locmem' only within one process. `manage.py test` defaults to
+# 'locmem' so cache reads do not count in the tests' query assertions.
+_cache_backends = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+_artists_cache_backend = os.getenv(
+    'ARTISTS_CACHE_BACKEND', 'locmem' if sys.argv[1:2] == ['test'] else 'db'
+).lower()
+if _artists_cache_backend not in _cache_backends:
+    raise ImproperlyConfigured(
+        f"ARTISTS_CACHE_BACKEND must be one of: {', '.join(_cache_backends)}"
+    )
+_artists_cache_default_locations = {
+    'locmem': 'artists',
+    'file': os.path.join(tempfile.gettempdir(), 'artist_registry_cache'),
+    'db': 'artists_cache',
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'artists': {
+        'BACKEND': _cache_backends[_artists_cache_backend],
+        'LOCATION': os.getenv('ARTISTS_CACHE_LOCATION', _artists_cache_default_locations[_artists_cache_backend]),
+        'TIMEOUT': int(os.getenv('ARTISTS_CACHE_TIMEOUT', '86400')),
+    },
+}
+# Serialized artwork/author rows used to hydrate search results (deleted on save/delete)
+SEARCH_ROW_CACHE_TIMEOUT = int(os.getenv('SEARCH_ROW_CACHE_TIMEOUT', '3600'))  # seconds
+
+# Weaviate client pool (per gunicorn worker process)
+WEAVIATE_POOL_SIZE = int(os.getenv('WEAVIATE_POOL_SIZE', '4'))
+WEAVIATE_POOL_TIMEOUT = float(os.getenv('WEAVIATE_POOL_TIMEOUT', '10'))  # seconds to wait for a free client
+WEAVIATE_HEALTHCHECK_INTERVAL = float(os.getenv('WEAVIATE_HEALTHCHECK_INTERVAL', '30'))  # seconds between readiness checks
+WEAVIATE_ALIAS_TTL = float(os.getenv('WEAVIATE_ALIAS_TTL', '30'))  # seconds before re-reading which collection serves Artworks
+
+# In-process cache of image search results, keyed by image content hash
+WEAVIATE_SEARCH_CACHE_SIZE = int(os.getenv('WEAVIATE_SEARCH_CACHE_SIZE', '1024'))  # entries per worker
+WEAVIATE_SEARCH_CACHE_TTL = float(os.getenv('WEAVIATE_SEARCH_CACHE_TTL', '600'))  # seconds
+
+# img2vec inference container used by Weaviate. When set, query images are
+# vectorized once here and searched with near_vector; empty falls back to near_image.
+IMAGE_INFERENCE_API = os.getenv('IMAGE_INFERENCE_API', '')
+IMAGE_INFERENCE_TIMEOUT = float(os.getenv('IMAGE_INFERENCE_TIMEOUT', '30'))
+WEAVIATE_EMBEDDING_CACHE_SIZE = int(os.getenv('WEAVIATE_EMBEDDING_CACHE_SIZE', '512'))  # float32 vectors per worker
+
+# Longest side, in pixels, of images sent to the img2vec vectorizer (searches and inserts)
+WEAVIATE_IMAGE_MAX_DIMENSION = int(os.getenv('WEAVIATE_IMAGE_MAX_DIMENSION', '512'))
+
+# Single-artwork ingest (admin saves): retries with exponential backoff and jitter
+WEAVIATE_INGEST_MAX_RETRIES = int(os.getenv('WEAVIATE_INGEST_MAX_RETRIES', '3'))
+WEAVIATE_INGEST_BACKOFF_BASE = float(os.getenv('WEAVIATE_INGEST_BACKOFF_BASE', '0.5'))  # seconds
+WEAVIATE_INGEST_BACKOFF_MAX = float(os.getenv('WEAVIATE_INGEST_BACKOFF_MAX', '8'))  # seconds
+WEAVIATE_INGEST_VERIFY = os.getenv('WEAVIATE_INGEST_VERIFY', 'True').lower() == 'true'  # read objects back after writing
+# Store artwork/author display fields on Weaviate objects so searches skip Postgres.
+# Needs the collection created with them (create_schema) and a sync_weaviate run to backfill.
+WEAVIATE_DENORMALIZED_METADATA = os.getenv('WEAVIATE_DENORMALIZED_METADATA', 'False').lower() == 'true'
+# Vector index of the Artworks collection (applied by migrate_weaviate_schema).
+# Empty values leave the Weaviate default in place; see artists/weaviate/vector_index.py.
+WEAVIATE_VECTOR_INDEX = {
+    'index_type': os.getenv('WEAVIATE_VECTOR_INDEX_TYPE', ''),  # hnsw | flat
+    'distance': os.getenv('WEAVIATE_VECTOR_DISTANCE', ''),  # cosine | dot | l2-squared | ...
+    'ef': os.getenv('WEAVIATE_HNSW_EF', ''),  # -1 = dynamic ef
+    'dynamic_ef_min': os.getenv('WEAVIATE_HNSW_DYNAMIC_EF_MIN', ''),
+    'dynamic_ef_max': os.getenv('WEAVIATE_HNSW_DYNAMIC_EF_MAX', ''),
+    'dynamic_ef_factor': os.getenv('WEAVIATE_HNSW_DYNAMIC_EF_FACTOR', ''),
+    'ef_construction': os.getenv('WEAVIATE_HNSW_EF_CONSTRUCTION', ''),
+    'max_connections': os.getenv('WEAVIATE_HNSW_MAX_CONNECTIONS', ''),
+    'vector_cache_max_objects': os.getenv('WEAVIATE_VECTOR_CACHE_MAX_OBJECTS', ''),
+    'compression': os.getenv('WEAVIATE_VECTOR_COMPRESSION', ''),  # none | pq | bq
+    'pq_segments': os.getenv('WEAVIATE_PQ_SEGMENTS', ''),
+    'pq_training_limit': os.getenv('WEAVIATE_PQ_TRAINING_LIMIT', ''),
+}
+
+# How an author's artwork vectors are combined for similar authors: mean | medoid
+AUTHOR_CENTROID_METHOD = os.getenv('AUTHOR_CENTROID_METHOD', 'mean')
+
+# Background jobs (Arweave uploads, Weaviate indexing) run by `manage.py run_jobs`
+JOBS_CONCURRENCY = int(os.getenv('JOBS_CONCURRENCY', '4'))  # threads per worker process
+JOBS_KIND_CONCURRENCY = {  # jobs of a kind running at once across all workers
+    'arweave_upload': int(os.getenv('JOBS_ARWEAVE_CONCURRENCY', '4')),
+    'weaviate_index': int(os.getenv('JOBS_WEAVIATE_CONCURRENCY', '4')),
+}
+JOBS_POLL_INTERVAL = float(os.getenv('JOBS_POLL_INTERVAL', '2'))  # seconds between polls when idle
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '5'))
+JOBS_RETRY_BASE = float(os.getenv('JOBS_RETRY_BASE', '30'))  # seconds, doubled per failed attempt
+JOBS_RETRY_MAX = float(os.getenv('JOBS_RETRY_MAX', '3600'))
+JOBS_STALE_AFTER = float(os.getenv('JOBS_STALE_AFTER', '900'))  # running jobs older than this are reclaimed
+
 # SECURITY: Production security settings
 if not DEBUG:
     # HTTPS settings
@@ -1,30 +1,52 @@
 from django.contrib import admin
-from .models import Artist, Artwork
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from .models import Artist, Artwork, Job
 from django.utils.html import format_html
-from .arweave_storage import upload_to_arweave
-import os
-from .weaviate import add_image_to_weaviate
+from .jobs import enqueue_job, queue_image_upload, queue_metadata_update
+from .weaviate.metadata import ARTWORK_METADATA_FIELDS
 from django import forms
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def safe_remove_file(file_path: str) -> None:
-    """Safely remove a file, logging warnings on OSError."""
-    if os.path.isfile(file_path):
-        try:
-            os.remove(file_path)
-        except OSError as e:
-            logger.warning(f"Failed to remove file {file_path}: {e}")
+def with_job_status(queryset):
+    """Annotate artworks with the status of their latest background job (one subquery, no N+1)."""
+    latest = Job.objects.filter(artwork=OuterRef('pk')).order_by('-id')
+    return queryset.annotate(
+        latest_job_kind=Subquery(latest.values('kind')[:1]),
+        latest_job_status=Subquery(latest.values('status')[:1]),
+    )
+
+
+def format_job_status(obj):
+    status = getattr(obj, 'latest_job_status', None)
+    if not status:
+        return '-'
+    return f"{dict(Job.KIND_CHOICES)[obj.latest_job_kind]}: {dict(Job.STATUS_CHOICES)[status]}"
+
+
+def enqueue_artwork_jobs(artwork, changed_data):
+    """
+    Publish a new picture, queue the indexing of an artwork missing from
+    Weaviate, or the update of its denormalized metadata.
+    """
+    if 'picture' in changed_data and artwork.picture:
+        queue_image_upload(artwork)
+    elif artwork.picture_url and not artwork.picture_image_weaviate_id:
+        enqueue_job(Job.WEAVIATE_INDEX, artwork=artwork)
+    elif artwork.picture_image_weaviate_id and set(changed_data) & set(ARTWORK_METADATA_FIELDS.values()):
+        queue_metadata_update(artwork=artwork)
 
 
 class ArtworkInline(admin.TabularInline):  # or admin.StackedInline for a different layout
     model = Artwork
     extra = 1  # number of extra forms to display
-    readonly_fields = ('id', 'picture_preview',)
+    readonly_fields = ('id', 'picture_preview', 'job_status')
     fields = (
         'picture_preview',
+        'job_status',
         'title',
         'picture',
         'picture_image_weaviate_id',
@@ -42,6 +64,14 @@ class ArtworkInline(admin.TabularInline):  # or admin.StackedInline for a differ
 
     picture_preview.short_description = 'Artwork Preview'
 
+    def get_queryset(self, request):
+        return with_job_status(super().get_queryset(request))
+
+    def job_status(self, obj):
+        return format_job_status(obj)
+
+    job_status.short_description = 'Processing'
+
 # Create a custom form for ArtistAdmin
 class ArtistAdminForm(forms.ModelForm):
     class Meta:
@@ -82,61 +112,23 @@ class ArtistAdmin(admin.ModelAdmin):
             return "bez jmena"
 
     def save_model(self, request, obj, form, change):
-
-        # Handle saving profile image for the Artist
-        if 'profile_image' in form.changed_data:
-            obj.save()
-            # Check that profile_image exists and file is valid before accessing .path
-            if obj.profile_image and os.path.isfile(obj.profile_image.path):
-                file_path = obj.profile_image.path
-                arweave_url = upload_to_arweave(file_path)
-                if arweave_url is not None:
-                    obj.profile_image_url = arweave_url
-                    # Delete the file from the media folder
-                    safe_remove_file(file_path)
-            else:
-                logger.debug("Skipping Arweave upload for Artist profile_image: field is empty or file does not exist")
-
         super().save_model(request, obj, form, change)
 
+        # Link the profile image if already on Arweave, otherwise upload it in the background
+        if 'profile_image' in form.changed_data and obj.profile_image:
+            queue_image_upload(obj)
+
     def save_related(self, request, form, formsets, change):
         logger.debug("Saving related artworks to database")
 
         super().save_related(request, form, formsets, change)
 
         # After the parent Artist model and related Artwork models are saved,
-        # iterate over the Artwork instances and save their images in Arweave.
+        # queue Arweave uploads of new pictures (each then queues its indexing).
         for formset in formsets:
             for form in formset:
-                if 'picture' in form.changed_data:
-                    artwork = form.instance
-                    artwork.save()
-                    # Check that picture exists and file is valid before accessing .path
-                    if artwork.picture and os.path.isfile(artwork.picture.path):
-                        file_path = artwork.picture.path
-                        arweave_url = upload_to_arweave(file_path)
-                        if arweave_url is not None:
-                            artwork.picture_url = arweave_url
-                            artwork.save()
-                            # Delete the file from the media folder
-                            safe_remove_file(file_path)
-
-                        if not artwork.picture_image_weaviate_id and artwork.id and artwork.artist.id and arweave_url:
-                            # Add the artwork to Weaviate
-                            weaviate_id = add_image_to_weaviate(artwork.id, artwork.artist.id, arweave_url)
-                            logger.debug(f"Weaviate ID for artwork {artwork.id}: {weaviate_id}")
-
-                            if weaviate_id is not None:
-                                artwork.picture_image_weaviate_id = weaviate_id
-                                artwork.save()
-                            else:
-                                # Handle the case when the artwork could not be added to Weaviate
-                                logger.warning(f"Failed to add artwork {artwork.id} to Weaviate")
-                        else:
-                            logger.debug(
-                                f"Skipping Weaviate save for artwork {artwork.id}. picture_image_weaviate_id already exists or missing required data.")
-                    else:
-                        logger.debug(f"Skipping Arweave upload for Artwork {artwork.id} picture: field is empty or file does not exist")
+                if form.instance.pk and form.has_changed():
+                    enqueue_artwork_jobs(form.instance, form.changed_data)
 
     def profile_image_preview(self, obj):
         if obj.profile_image_url:
@@ -151,8 +143,8 @@ class ArtworkAdmin(admin.ModelAdmin):
     def title_to_display(self, obj):
         return obj.title or 'No title yet'
 
-    list_display = ('title_to_display', 'id', 'artwork_image_preview')
-    readonly_fields = ['artwork_image_preview_detail']
+    list_display = ('title_to_display', 'id', 'artwork_image_preview', 'job_status')
+    readonly_fields = ['artwork_image_preview_detail', 'job_status', 'picture_image_hash', 'weaviate_indexed_at']
 
     def artwork_image_preview(self, obj):
         return format_html('<img src="{}" height="50" />', obj.picture_url)
@@ -164,36 +156,38 @@ class ArtworkAdmin(admin.ModelAdmin):
 
     artwork_image_preview_detail.short_description = 'Artwork Preview Detail'
 
+    def get_queryset(self, request):
+        return with_job_status(super().get_queryset(request))
+
+    def job_status(self, obj):
+        return format_job_status(obj)
+
+    job_status.short_description = 'Processing'
+
     def save_model(self, request, obj, form, change):
         logger.debug(f"Saving artwork to database: {obj.id}")
-        if 'picture' in form.changed_data:
-            obj.save()
-            # Check that picture exists and file is valid before accessing .path
-            if obj.picture and os.path.isfile(obj.picture.path):
-                file_path = obj.picture.path
-                arweave_url = upload_to_arweave(file_path)
-                if arweave_url is not None:
-                    obj.picture_url = arweave_url
-                    # Delete the file from the media folder
-                    safe_remove_file(file_path)
-            else:
-                logger.debug(f"Skipping Arweave upload for Artwork {obj.id} picture: field is empty or file does not exist")
-
-        if not obj.picture_image_weaviate_id and obj.id and obj.artist.id and obj.picture_url:
-            # Add the artwork to Weaviate
-            weaviate_id = add_image_to_weaviate(obj.id, obj.artist.id, obj.picture_url)
-            logger.debug(f"Weaviate ID for artwork {obj.id}: {weaviate_id}")
-            if weaviate_id is not None:
-                obj.picture_image_weaviate_id = weaviate_id
-                obj.save()
-            else:
-                # Handle the case when the artwork could not be added to Weaviate
-                logger.warning(f"Failed to add artwork {obj.id} to Weaviate")
-        else:
-            logger.debug(
-                f"Skipping Weaviate save for artwork {obj.id}. picture_image_weaviate_id already exists or missing required data.")
+        if 'picture_url' in form.changed_data:
+            # Edited by hand: the indexed image is stale
+            obj.reset_weaviate_index()
         super().save_model(request, obj, form, change)
+        enqueue_artwork_jobs(obj, form.changed_data)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'artist', 'artwork', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'kind')
+    list_select_related = ('artist', 'artwork')
+    readonly_fields = ('created_at', 'updated_at', 'locked_at', 'last_error')
+    actions = ['retry_jobs']
+
+    @admin.action(description='Retry selected jobs now')
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.PENDING, run_after=timezone.now(), attempts=0, locked_at=None
+        )
+        self.message_user(request, f"{updated} job(s) queued again.")
 
 
 admin.site.register(Artist, ArtistAdmin)
 admin.site.register(Artwork, ArtworkAdmin)
+admin.site.register(Job, JobAdmin)
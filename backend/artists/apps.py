@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ArtistsConfig(AppConfig):
     name = 'artists'
+
+    def ready(self):
+        from . import signals  # noqa: F401
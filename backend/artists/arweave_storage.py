@@ -1,36 +1,274 @@
 import arweave
+import hashlib
+import logging
 import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from django.conf import settings
 from arweave.arweave_lib import Transaction
 from arweave.transaction_uploader import get_uploader
 import mimetypes
+import requests
+from requests.adapters import HTTPAdapter
 
+from .models import ArweaveUpload
 
-def upload_to_arweave(file_path):
-    if not os.path.isfile(file_path):
-        raise ValueError(f"Invalid file path: {file_path} does not exist or is not a file")
-    
-    mimetypes.init()
-    mimetypes.add_type('image/webp', '.webp')
-    mime_type, _ = mimetypes.guess_type(file_path)
-    mime_type = mime_type or 'application/octet-stream'
-    wallet_path = settings.ARWEAVE_WALLET_PATH
-    wallet = arweave.Wallet(wallet_path)
-
-    with open(file_path, "rb", buffering=0) as file_handler:
-        tx = Transaction(
-            wallet,
-            file_handler=file_handler,
-            file_path=file_path)
+logger = logging.getLogger(__name__)
+
+ARWEAVE_CHUNK_RETRIES = 3
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ArweaveUploadError(Exception):
+    """Raised when the gateway rejects a chunk of an upload."""
+
+
+class BufferReader:
+    """Read-only, seekable file over a bytes-like buffer; a read copies only the bytes it returns."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.position = 0
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self.position, os.SEEK_END: len(self.buffer)}[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def read(self, size=-1):
+        end = len(self.buffer) if size is None or size < 0 else min(len(self.buffer), self.position + size)
+        data = bytes(self.buffer[self.position:end])
+        self.position = max(self.position, end)
+        return data
+
+
+class ArweaveUploader:
+    """
+    Uploads files and in-memory buffers to Arweave.
+
+    The wallet key, the mime type registry and the HTTP session to the
+    gateway are set up once and shared by every upload (and thread) of the
+    process; use ``get_arweave_uploader()`` rather than instantiating this.
+    """
+
+    def __init__(self, wallet_path, gateway_url='https://arweave.net', chunk_concurrency=4,
+                 chunk_timeout=60, pool_size=None):
+        self.gateway_url = gateway_url.rstrip('/')
+        self.chunk_concurrency = max(1, chunk_concurrency)
+        self.chunk_timeout = chunk_timeout
+        self.wallet = arweave.Wallet(wallet_path)
+        self.wallet.api_url = self.gateway_url
+
+        self.mime_types = mimetypes.MimeTypes()
+        self.mime_types.add_type('image/webp', '.webp')
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or self.chunk_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def mime_type(self, filename):
+        mime_type, _ = self.mime_types.guess_type(filename or '')
+        return mime_type or 'application/octet-stream'
+
+    def upload_file(self, file_path):
+        """Upload the file at ``file_path``, streaming it from disk; return its URL."""
+        if not os.path.isfile(file_path):
+            raise ValueError(f"Invalid file path: {file_path} does not exist or is not a file")
+
+        with open(file_path, "rb", buffering=0) as file_handler:
+            tx = Transaction(
+                self.wallet,
+                file_handler=file_handler,
+                file_path=file_path)
+            return self._send(tx, self.mime_type(file_path))
+
+    def upload_bytes(self, data, filename=None):
+        """
+        Upload an in-memory buffer without copying it; ``filename`` only
+        determines the content type.
+        """
+        with memoryview(data) as view:
+            tx = Transaction(self.wallet)
+            # What Transaction(file_handler=..., file_path=...) sets up, for a buffer without a path
+            tx.file_handler, tx.uses_uploader, tx.data_size = BufferReader(view), True, len(view)
+            return self._send(tx, self.mime_type(filename))
+
+    def _send(self, tx, mime_type):
+        tx.api_url = self.gateway_url
         tx.add_tag('Content-Type', mime_type)
         tx.add_tag('File-Type', mime_type)
         tx.sign()
 
-        uploader = get_uploader(tx, file_handler)
+        uploader = get_uploader(tx, tx.file_handler)
 
-        while not uploader.is_complete:
+        # The first call posts the transaction header (with the data when it fits in the body)
+        while not uploader.tx_posted:
             uploader.upload_chunk()
+        if not uploader.is_complete:
+            self.post_chunks(tx, uploader.chunk_index)
+
+        return f"{self.gateway_url}/{tx.id}"
+
+    def post_chunks(self, tx, start):
+        """
+        Post the chunks of a signed transaction from index ``start`` on.
+
+        Chunks are read from the transaction's file handler in order on the
+        calling thread while up to ``chunk_concurrency`` of them are in
+        flight, so reading the data overlaps with the network and at most
+        that many chunks are held in memory.
+        """
+        total = len(tx.chunks['chunks'])
+        with ThreadPoolExecutor(max_workers=self.chunk_concurrency) as executor:
+            in_flight = set()
+            for index in range(start, total):
+                if len(in_flight) >= self.chunk_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                chunk = {
+                    name: value.decode() if isinstance(value, bytes) else value
+                    for name, value in tx.get_chunk(index).items()
+                }
+                in_flight.add(executor.submit(self._post_chunk, chunk))
+            for future in wait(in_flight).done:
+                future.result()
+
+    def _post_chunk(self, chunk):
+        for attempt in range(1, ARWEAVE_CHUNK_RETRIES + 1):
+            try:
+                response = self.session.post(f"{self.gateway_url}/chunk", json=chunk, timeout=self.chunk_timeout)
+            except requests.RequestException as e:
+                error = str(e)
+            else:
+                if response.status_code == 200:
+                    return
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+        raise ArweaveUploadError(f"Chunk at offset {chunk.get('offset')} rejected after {attempt} attempts: {error}")
+
+
+_uploader = None
+_uploader_key = None
+_uploader_lock = threading.Lock()
+
+
+def get_arweave_uploader():
+    """The process-wide ``ArweaveUploader``, rebuilt only when its settings change."""
+    global _uploader, _uploader_key
+    chunk_concurrency = getattr(settings, 'ARWEAVE_CHUNK_CONCURRENCY', 4)
+    key = (
+        settings.ARWEAVE_WALLET_PATH,
+        getattr(settings, 'ARWEAVE_GATEWAY_URL', 'https://arweave.net'),
+        chunk_concurrency,
+        getattr(settings, 'ARWEAVE_CHUNK_TIMEOUT', 60),
+    )
+    with _uploader_lock:
+        if _uploader is None or _uploader_key != key:
+            _uploader = ArweaveUploader(
+                *key,
+                # Upload jobs run in several threads, each with its own chunks in flight
+                pool_size=chunk_concurrency * getattr(settings, 'JOBS_CONCURRENCY', 4),
+            )
+            _uploader_key = key
+        return _uploader
+
+
+def reset_arweave_uploader():
+    """Drop the cached uploader, e.g. after the wallet file was replaced."""
+    global _uploader, _uploader_key
+    with _uploader_lock:
+        _uploader = _uploader_key = None
+
+
+def _is_buffer(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def content_hash(source):
+    """sha256 hex digest of a file path's or a buffer's bytes; files are read in blocks."""
+    if _is_buffer(source):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_arweave_url(digest):
+    """URL of content with this sha256 already on Arweave, or None."""
+    return ArweaveUpload.objects.filter(content_hash=digest).values_list('url', flat=True).first()
+
+
+def _resolve_source(source, filename):
+    """
+    Reduce ``source`` to a file path or a buffer without staging it on disk.
+
+    Django uploads it spooled to a temporary file are read from that file;
+    in-memory ones are used through their buffer, without a copy.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source), filename
+    if _is_buffer(source):
+        return source, filename
+
+    filename = filename or os.path.basename(getattr(source, 'name', None) or '')
+    if hasattr(source, 'temporary_file_path'):
+        return source.temporary_file_path(), filename
+    fileobj = getattr(source, 'file', source)
+    if hasattr(fileobj, 'getbuffer'):
+        return fileobj.getbuffer(), filename
+    if hasattr(source, 'chunks'):
+        return b''.join(source.chunks()), filename
+    if hasattr(source, 'read'):
+        return source.read(), filename
+    return b''.join(source), filename
+
+
+def upload_to_arweave(source, filename=None):
+    """
+    Upload ``source`` to Arweave and return its URL.
+
+    ``source`` is a file path, a bytes-like buffer, a file-like object (e.g.
+    a Django ``UploadedFile``) or an iterable of byte chunks; the content
+    type is guessed from ``filename`` or the object's name. Content that was
+    uploaded before is not sent again: the URL of the existing transaction
+    is returned.
+
+    The whole content is needed before anything is sent, since the
+    transaction commits to its Merkle root, so data is not streamed in a
+    single pass; it is only never copied to a temporary file.
+    """
+    source, filename = _resolve_source(source, filename)
+    try:
+        return _upload(source, filename)
+    finally:
+        if isinstance(source, memoryview):
+            # Let the owning BytesIO be closed again
+            source.release()
+
+
+def _upload(source, filename):
+    if not _is_buffer(source) and not os.path.isfile(source):
+        raise ValueError(f"Invalid file path: {source} does not exist or is not a file")
 
-        image_url = f"https://arweave.net/{tx.id}"
+    digest = content_hash(source)
+    existing = find_arweave_url(digest)
+    if existing:
+        logger.info(f"Arweave upload skipped, content {digest} is already at {existing}")
+        return existing
 
-    return image_url
+    uploader = get_arweave_uploader()
+    if _is_buffer(source):
+        url = uploader.upload_bytes(source, filename)
+        size = len(source)
+    else:
+        url = uploader.upload_file(source)
+        size = os.path.getsize(source)
+    # A concurrent upload of the same content may have recorded it first; keep that one
+    upload, _ = ArweaveUpload.objects.get_or_create(content_hash=digest, defaults={'url': url, 'size': size})
+    return upload.url
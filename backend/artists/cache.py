@@ -0,0 +1,108 @@
+"""
+Caches of public artist data.
+
+Every cached listing payload is stored under the current listing version.
+Saving or deleting an Artist/Artwork (see ``signals.py``) replaces the
+version, which makes all previously cached payloads unreachable at once
+without having to enumerate their keys.
+
+Search results are hydrated from serialized rows cached per id, read and
+written with one ``get_many``/``set_many`` each; saving or deleting a row
+deletes its entry. Both rely on the cache being shared by every process
+(``ARTISTS_CACHE_BACKEND=db``): with ``locmem`` a save only reaches the
+process that made it.
+"""
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.utils.encoders import JSONEncoder
+
+ARTISTS_CACHE_ALIAS = 'artists'
+LISTING_STATE_KEY = 'artists:listing:state'
+SEARCH_ROW_KINDS = ('artwork', 'author')
+
+
+def get_artists_cache():
+    """Return the cache used for artist data, falling back to the default cache."""
+    alias = ARTISTS_CACHE_ALIAS if ARTISTS_CACHE_ALIAS in settings.CACHES else 'default'
+    return caches[alias]
+
+
+def _new_listing_state():
+    return {'version': uuid.uuid4().hex, 'last_modified': int(time.time())}
+
+
+def get_listing_state():
+    """Return ``{'version', 'last_modified'}`` of the current listing, creating it if missing."""
+    cache = get_artists_cache()
+    state = cache.get(LISTING_STATE_KEY)
+    if state is None:
+        state = _new_listing_state()
+        if not cache.add(LISTING_STATE_KEY, state, timeout=None):
+            # Another worker initialised it first; use theirs
+            state = cache.get(LISTING_STATE_KEY) or state
+    return state
+
+
+def invalidate_artists_listing():
+    """Start a new listing version so all cached listing payloads are ignored."""
+    get_artists_cache().set(LISTING_STATE_KEY, _new_listing_state(), timeout=None)
+
+
+def listing_cache_key(version, variant):
+    """Cache key for one listing variant (the query parameters shaping the payload)."""
+    digest = hashlib.sha256(json.dumps(variant, sort_keys=True).encode()).hexdigest()[:32]
+    return f'artists:listing:{version}:{digest}'
+
+
+def compute_etag(data):
+    """Strong ETag over the JSON representation of ``data``."""
+    raw = json.dumps(data, cls=JSONEncoder, sort_keys=True, separators=(',', ':')).encode()
+    return f'"{hashlib.sha256(raw).hexdigest()}"'
+
+
+def search_row_key(kind, pk):
+    """Cache key of the serialized search result row ``kind`` ('artwork' or 'author') with id ``pk``."""
+    return f'artists:search:{kind}:{pk}'
+
+
+def get_search_rows(ids_by_kind, load):
+    """
+    Serialized search result rows, read through the cache.
+
+    ``ids_by_kind`` maps 'artwork'/'author' to ids. Every row is looked up
+    with a single ``get_many``; ``load(kind, missing_ids)`` must return
+    ``{id: row}`` for the misses, which are stored with one ``set_many``.
+    Returns ``{kind: {id: row}}``; ids without a row are left out.
+    """
+    cache = get_artists_cache()
+    keys = {search_row_key(kind, pk): (kind, pk) for kind, ids in ids_by_kind.items() for pk in ids}
+    rows = {kind: {} for kind in ids_by_kind}
+    for key, row in cache.get_many(keys).items():
+        kind, pk = keys[key]
+        rows[kind][pk] = row
+
+    loaded = {}
+    for kind, ids in ids_by_kind.items():
+        missing = [pk for pk in ids if pk not in rows[kind]]
+        if missing:
+            for pk, row in load(kind, missing).items():
+                rows[kind][pk] = row
+                loaded[search_row_key(kind, pk)] = row
+    if loaded:
+        cache.set_many(loaded, timeout=getattr(settings, 'SEARCH_ROW_CACHE_TIMEOUT', 3600))
+    return rows
+
+
+def invalidate_search_row(kind, pk):
+    """Forget the cached search result row of one artwork or author."""
+    get_artists_cache().delete(search_row_key(kind, pk))
+
+
+def invalidate_search_rows(kind, pks):
+    """Forget the cached search result rows of several artworks or authors at once."""
+    get_artists_cache().delete_many([search_row_key(kind, pk) for pk in pks])
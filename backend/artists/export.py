@@ -0,0 +1,52 @@
+"""
+Streaming export of the full artist registry.
+
+Artists are read with a server-side cursor in chunks and serialized one batch
+at a time, so memory use stays flat regardless of the table size and the
+first bytes go out as soon as the first batch is serialized.
+"""
+import json
+from itertools import islice
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Artist
+from .serializers import ArtistSerializer
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_FORMATS = ('json', 'ndjson')
+
+
+def _dumps(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def iter_artist_batches(chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield lists of serialized artists (with artworks), ``chunk_size`` at a time."""
+    artists = (
+        Artist.objects.all()
+        .prefetch_related('artwork_set')
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        batch = list(islice(artists, chunk_size))
+        if not batch:
+            return
+        yield ArtistSerializer(batch, many=True).data
+
+
+def iter_ndjson(chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield newline-delimited JSON, one artist per line."""
+    for batch in iter_artist_batches(chunk_size):
+        yield ''.join(_dumps(artist) + '\n' for artist in batch)
+
+
+def iter_json(chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a JSON document in the standard response envelope, one batch per chunk."""
+    yield '{"success":true,"data":['
+    first = True
+    for batch in iter_artist_batches(chunk_size):
+        chunk = ','.join(_dumps(artist) for artist in batch)
+        yield chunk if first else ',' + chunk
+        first = False
+    yield '],"error":null}'
@@ -0,0 +1,251 @@
+"""
+Database-backed background jobs.
+
+Slow work triggered from the admin (Arweave uploads, Weaviate indexing) is
+stored as ``Job`` rows and executed by ``python manage.py run_jobs``, so no
+external broker is needed and a gunicorn worker is never blocked by it.
+Workers claim due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED``; how many
+jobs of a kind may run at once (across all workers) is limited by
+``JOBS_KIND_CONCURRENCY``. Failed jobs are retried with exponential backoff
+until ``max_attempts`` is reached. Jobs left ``running`` by a crashed worker
+are claimed again after ``JOBS_STALE_AFTER`` seconds.
+"""
+import logging
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .arweave_storage import content_hash, find_arweave_url, upload_to_arweave
+from .models import Artwork, Job
+from .weaviate import add_image_to_weaviate
+from .weaviate.ingest import INDEX_FIELDS
+from .weaviate.metadata import artwork_metadata, metadata_enabled, metadata_if_enabled
+from .weaviate.service import delete_replaced_artwork_objects, update_object_properties
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying the job cannot succeed."""
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler of ``kind`` jobs."""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def safe_remove_file(file_path: str) -> None:
+    """Safely remove a file, logging warnings on OSError."""
+    if os.path.isfile(file_path):
+        try:
+            os.remove(file_path)
+        except OSError as e:
+            logger.warning(f"Failed to remove file {file_path}: {e}")
+
+
+def enqueue_job(kind, artwork=None, artist=None):
+    """Queue a job, reusing a still pending job for the same work."""
+    existing = Job.objects.filter(kind=kind, artwork=artwork, artist=artist, status=Job.PENDING).first()
+    if existing is not None:
+        return existing
+    return Job.objects.create(
+        kind=kind,
+        artwork=artwork,
+        artist=artist,
+        max_attempts=getattr(settings, 'JOBS_MAX_ATTEMPTS', 5),
+    )
+
+
+def retry_delay(attempts):
+    """Seconds before retrying a job that failed ``attempts`` times: exponential backoff with jitter."""
+    base = getattr(settings, 'JOBS_RETRY_BASE', 30.0)
+    cap = getattr(settings, 'JOBS_RETRY_MAX', 3600.0)
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return random.uniform(delay / 2, delay)
+
+
+def claim_jobs(capacity):
+    """Atomically mark up to ``capacity`` due jobs as running and return them."""
+    if capacity <= 0:
+        return []
+    limits = getattr(settings, 'JOBS_KIND_CONCURRENCY', {})
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, 'JOBS_STALE_AFTER', 900))
+    claimed = []
+    with transaction.atomic():
+        running = dict(
+            Job.objects.filter(status=Job.RUNNING, locked_at__gt=stale_before)
+            .values_list('kind').annotate(count=Count('id'))
+        )
+        for kind in JOB_HANDLERS:
+            free = min(limits.get(kind, capacity) - running.get(kind, 0), capacity - len(claimed))
+            if free <= 0:
+                continue
+            due = Q(status=Job.PENDING, run_after__lte=now) | Q(status=Job.RUNNING, locked_at__lte=stale_before)
+            jobs = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(due, kind=kind)
+                .order_by('run_after', 'id')[:free]
+            )
+            if not jobs:
+                continue
+            Job.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1, updated_at=now
+            )
+            for job in jobs:
+                job.status, job.locked_at, job.attempts = Job.RUNNING, now, job.attempts + 1
+            claimed.extend(jobs)
+    return claimed
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome; never raises."""
+    now = timezone.now()
+    try:
+        JOB_HANDLERS[job.kind](job)
+    except Exception as exc:
+        permanent = isinstance(exc, PermanentJobError) or job.attempts >= job.max_attempts
+        logger.warning(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}: {exc}", exc_info=not permanent)
+        job.status = Job.FAILED if permanent else Job.PENDING
+        job.run_after = now if permanent else now + timedelta(seconds=retry_delay(job.attempts))
+        job.last_error = str(exc)[:2000]
+    else:
+        job.status = Job.SUCCEEDED
+        job.last_error = ''
+    job.locked_at = None
+    Job.objects.filter(id=job.id).update(
+        status=job.status, run_after=job.run_after, last_error=job.last_error, locked_at=None, updated_at=now
+    )
+    return job
+
+
+def work_off(limit=None):
+    """Run due jobs one by one in this thread until none is left (or ``limit`` ran); return the count."""
+    done = 0
+    while limit is None or done < limit:
+        jobs = claim_jobs(1)
+        if not jobs:
+            break
+        run_job(jobs[0])
+        done += 1
+    return done
+
+
+def _run_in_thread(job):
+    try:
+        run_job(job)
+    finally:
+        connection.close()
+
+
+def run_worker(concurrency=None, poll_interval=None, stop_event=None):
+    """Poll for due jobs and run up to ``concurrency`` of them in threads until ``stop_event`` is set."""
+    concurrency = concurrency or getattr(settings, 'JOBS_CONCURRENCY', 4)
+    poll_interval = poll_interval if poll_interval is not None else getattr(settings, 'JOBS_POLL_INTERVAL', 2.0)
+    stop_event = stop_event or threading.Event()
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while not stop_event.is_set():
+            in_flight = {future for future in in_flight if not future.done()}
+            close_old_connections()
+            jobs = claim_jobs(concurrency - len(in_flight))
+            for job in jobs:
+                in_flight.add(executor.submit(_run_in_thread, job))
+            if not jobs:
+                stop_event.wait(poll_interval)
+
+
+def _local_image(target):
+    return target.picture if isinstance(target, Artwork) else target.profile_image
+
+
+def _store_arweave_url(target, arweave_url, file_path):
+    """Point ``target`` at its image on Arweave, drop the local copy and queue indexing of artworks."""
+    if isinstance(target, Artwork):
+        target.picture_url = arweave_url
+        # New picture: the indexed image is stale
+        target.reset_weaviate_index()
+        target.save(update_fields=['picture_url', *INDEX_FIELDS])
+    else:
+        target.profile_image_url = arweave_url
+        target.save(update_fields=['profile_image_url'])
+    safe_remove_file(file_path)
+
+    if isinstance(target, Artwork):
+        enqueue_job(Job.WEAVIATE_INDEX, artwork=target)
+
+
+def queue_metadata_update(artwork):
+    """Queue patching the denormalized metadata of an artwork's Weaviate object, if enabled."""
+    if metadata_enabled():
+        return enqueue_job(Job.WEAVIATE_METADATA, artwork=artwork)
+    return None
+
+
+def queue_image_upload(target):
+    """
+    Publish the newly saved local image of an artwork or artist.
+
+    Content already on Arweave is linked right away; anything else is
+    uploaded by an ``ARWEAVE_UPLOAD`` job. Returns the job, or None on a hit.
+    """
+    file_path = _local_image(target).path
+    arweave_url = find_arweave_url(content_hash(file_path)) if os.path.isfile(file_path) else None
+    if arweave_url is None:
+        if isinstance(target, Artwork):
+            return enqueue_job(Job.ARWEAVE_UPLOAD, artwork=target)
+        return enqueue_job(Job.ARWEAVE_UPLOAD, artist=target)
+    _store_arweave_url(target, arweave_url, file_path)
+    return None
+
+
+@job_handler(Job.ARWEAVE_UPLOAD)
+def upload_image_job(job):
+    """Upload an artwork picture or an artist profile image to Arweave, then queue indexing."""
+    target = job.artwork or job.artist
+    image = _local_image(target)
+    if not image or not os.path.isfile(image.path):
+        raise PermanentJobError("Image file is missing")
+
+    file_path = image.path
+    _store_arweave_url(target, upload_to_arweave(file_path), file_path)
+
+
+@job_handler(Job.WEAVIATE_INDEX)
+def index_artwork_job(job):
+    """Add an artwork picture to Weaviate, replacing its previous object, and record its id."""
+    artwork = job.artwork
+    if not artwork.picture_url:
+        raise PermanentJobError("Artwork has no picture URL")
+
+    indexed = add_image_to_weaviate(
+        artwork.id, artwork.artist_id, artwork.picture_url, metadata=metadata_if_enabled(artwork)
+    )
+    if indexed is None:
+        raise RuntimeError(f"Failed to add artwork {artwork.id} to Weaviate")
+    # Like ingest, drop the previous image's object once the new one is stored
+    delete_replaced_artwork_objects(artwork.id, indexed[0])
+    artwork.picture_image_weaviate_id, artwork.picture_image_hash = indexed
+    artwork.weaviate_indexed_at = timezone.now()
+    # Only the index fields: the row may have been edited while the image was processed
+    artwork.save(update_fields=INDEX_FIELDS)
+
+
+@job_handler(Job.WEAVIATE_METADATA)
+def update_metadata_job(job):
+    """Patch the denormalized metadata of an artwork's indexed Weaviate object."""
+    artwork = job.artwork
+    if artwork.picture_image_weaviate_id:
+        update_object_properties({artwork.picture_image_weaviate_id: artwork_metadata(artwork)})
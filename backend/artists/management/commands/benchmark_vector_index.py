@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from artists.weaviate.index_benchmark import DEFAULT_CONFIGURATIONS, DEFAULT_EFS, run_benchmark
+from artists.weaviate.vector_index import vector_index_spec
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare vector index configurations (HNSW parameters, ef, PQ/BQ compression, flat) on synthetic "
+        "vectors: recall@k against exact search, query latency and index memory. Uses throwaway collections."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--config', action='append', choices=[*DEFAULT_CONFIGURATIONS, 'settings'],
+                            help='Configuration to run, repeatable; "settings" is WEAVIATE_VECTOR_INDEX '
+                                 '(default: all but "settings")')
+        parser.add_argument('--count', type=int, default=5000,
+                            help='Vectors loaded per configuration (default %(default)s)')
+        parser.add_argument('--dims', type=int, default=512,
+                            help='Vector dimensions; img2vec-neural with resnet50 produces 2048 (default %(default)s)')
+        parser.add_argument('--queries', type=int, default=50,
+                            help='Queries per configuration and ef (default %(default)s)')
+        parser.add_argument('-k', type=int, default=10,
+                            help='Neighbours requested per query, the k of recall@k (default %(default)s)')
+        parser.add_argument('--clusters', type=int, default=50,
+                            help='Clusters the synthetic vectors are drawn around (default %(default)s)')
+        parser.add_argument('--ef', type=int, action='append',
+                            help=f'HNSW ef to query with, repeatable; -1 is dynamic ef (default {DEFAULT_EFS})')
+        parser.add_argument('--metrics-url',
+                            help="Weaviate's Prometheus endpoint (e.g. http://localhost:2112/metrics) to measure "
+                                 "heap use instead of estimating it")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        names = options['config'] or list(DEFAULT_CONFIGURATIONS)
+        configurations = {
+            name: vector_index_spec() if name == 'settings' else DEFAULT_CONFIGURATIONS[name]
+            for name in names
+        }
+        if options['count'] < options['k']:
+            raise CommandError('--count must be at least -k')
+
+        self.stdout.write(
+            f"{options['count']} vectors of {options['dims']} dimensions, {options['queries']} queries, "
+            f"recall@{options['k']}"
+        )
+        run_benchmark(
+            configurations,
+            count=options['count'],
+            dims=options['dims'],
+            queries=options['queries'],
+            k=options['k'],
+            clusters=options['clusters'],
+            efs=options['ef'],
+            metrics_url=options['metrics_url'],
+            seed=options['seed'],
+            progress=lambda result: self.stdout.write(str(result)),
+        )
+        self.stdout.write(self.style.SUCCESS('Done'))
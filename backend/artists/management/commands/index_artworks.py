@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from artists.weaviate.ingest import INGEST_CHUNK_SIZE, INGEST_WORKERS, artworks_to_ingest, ingest_artworks
+from artists.weaviate.metrics import get_ingest_timings
+
+
+class Command(BaseCommand):
+    help = (
+        "Index artwork images in Weaviate in bulk. Only artworks without a Weaviate id are "
+        "processed, so an interrupted run can simply be started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=INGEST_WORKERS,
+                            help='Concurrent image downloads (default %(default)s)')
+        parser.add_argument('--chunk-size', type=int, default=INGEST_CHUNK_SIZE,
+                            help='Artworks fetched, inserted and saved per chunk (default %(default)s)')
+        parser.add_argument('--reindex', action='store_true',
+                            help='Also re-index artworks that already have a Weaviate id')
+        parser.add_argument('--start-after', type=int, default=None,
+                            help='Skip artworks with an id up to and including this one')
+
+    def handle(self, *args, **options):
+        artworks = artworks_to_ingest(reindex=options['reindex'], start_after=options['start_after'])
+        report = ingest_artworks(
+            artworks,
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            progress=lambda progress: self.stdout.write(str(progress)),
+        )
+        if report.failed_artwork_ids:
+            self.stderr.write(f"Failed artworks: {', '.join(map(str, report.failed_artwork_ids))}")
+        for step, timing in get_ingest_timings().items():
+            self.stdout.write(
+                f"{step}: {timing['count']} calls, mean {timing['mean'] * 1000:.1f} ms, max {timing['max'] * 1000:.1f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Done: {report}"))
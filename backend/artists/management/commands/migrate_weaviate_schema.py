@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from artists.weaviate.schema import COPY_CHUNK_SIZE, drop_unused_collections, migrate_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Migrate the Weaviate Artworks collection to the current schema without downtime: add new "
+        "properties in place, rebuild incompatible changes into a shadow collection and switch the alias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report what would change')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Rebuild into a shadow collection even if the change is compatible')
+        parser.add_argument('--chunk-size', type=int, default=COPY_CHUNK_SIZE,
+                            help='Objects copied per batch during a rebuild (default %(default)s)')
+        parser.add_argument('--drop-old', action='store_true',
+                            help='Afterwards delete Artworks collections the alias no longer points to')
+
+    def handle(self, *args, **options):
+        report = migrate_schema(
+            rebuild=options['rebuild'],
+            dry_run=options['dry_run'],
+            chunk_size=options['chunk_size'],
+        )
+        prefix = "Dry run" if options['dry_run'] else "Done"
+        self.stdout.write(self.style.SUCCESS(f"{prefix}: {report}"))
+
+        if options['drop_old']:
+            dropped = drop_unused_collections(dry_run=options['dry_run'])
+            self.stdout.write(f"{'Would drop' if options['dry_run'] else 'Dropped'}: {', '.join(dropped) or 'nothing'}")
@@ -0,0 +1,53 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from artists.weaviate.data_helpers import (
+    SIMILAR_AUTHORS_BATCH_SIZE,
+    SIMILAR_AUTHORS_WORKERS,
+    populate_all_authors_similar_ids,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Set similar_authors_postgres_ids of every artist from an image search with their first artwork. "
+        "Progress is checkpointed after every batch, so an interrupted run continues where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Similar authors stored per artist (default %(default)s)')
+        parser.add_argument('--workers', type=int, default=SIMILAR_AUTHORS_WORKERS,
+                            help='Concurrent image downloads and searches (default %(default)s)')
+        parser.add_argument('--batch-size', type=int, default=SIMILAR_AUTHORS_BATCH_SIZE,
+                            help='Artists saved and checkpointed per batch (default %(default)s)')
+        parser.add_argument('--checkpoint', default=str(settings.BASE_DIR / '.populate_similar_authors.checkpoint'),
+                            help='File holding the last finished artist id (default %(default)s)')
+        parser.add_argument('--start-after', type=int, default=None,
+                            help='Skip artists with an id up to and including this one, ignoring the checkpoint')
+        parser.add_argument('--restart', action='store_true',
+                            help='Start from the first artist, ignoring the checkpoint')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        if options['restart'] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        report = populate_all_authors_similar_ids(
+            limit=options['limit'],
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            start_after=options['start_after'],
+            checkpoint_path=checkpoint,
+            progress=lambda progress: self.stdout.write(str(progress)),
+        )
+        if report.failed_artist_ids:
+            self.stderr.write(f"Failed artists: {', '.join(map(str, report.failed_artist_ids))}")
+        for stage, timing in report.timings.items():
+            self.stdout.write(
+                f"{stage}: {timing['count']} calls, mean {timing['mean'] * 1000:.1f} ms, "
+                f"max {timing['max'] * 1000:.1f} ms, total {timing['total']:.1f} s"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Done: {report}"))
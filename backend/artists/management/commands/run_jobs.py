@@ -0,0 +1,35 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from artists.jobs import run_worker, work_off
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (Arweave uploads, Weaviate indexing) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Jobs run at once by this process (default JOBS_CONCURRENCY)')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds to wait when no job is due (default JOBS_POLL_INTERVAL)')
+        parser.add_argument('--once', action='store_true',
+                            help='Run the due jobs one by one, then exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = work_off()
+            self.stdout.write(self.style.SUCCESS(f"Ran {done} job(s)"))
+            return
+
+        stop_event = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop_event.set())
+        self.stdout.write("Job worker started")
+        run_worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            stop_event=stop_event,
+        )
+        self.stdout.write("Job worker stopped")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from artists.weaviate.ingest import INGEST_CHUNK_SIZE, INGEST_WORKERS
+from artists.weaviate.sync import sync_weaviate
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring the Weaviate Artworks collection in line with Postgres: index new or changed artworks, "
+        "patch changed authors and delete objects no artwork points to. Meant to run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report what would change')
+        parser.add_argument('--workers', type=int, default=INGEST_WORKERS,
+                            help='Concurrent image downloads (default %(default)s)')
+        parser.add_argument('--chunk-size', type=int, default=INGEST_CHUNK_SIZE,
+                            help='Rows and objects written per batch (default %(default)s)')
+
+    def handle(self, *args, **options):
+        report = sync_weaviate(
+            dry_run=options['dry_run'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            progress=lambda progress: self.stdout.write(str(progress)),
+        )
+        if report.ingest and report.ingest.failed_artwork_ids:
+            self.stderr.write(f"Failed artworks: {', '.join(map(str, report.ingest.failed_artwork_ids))}")
+        prefix = "Dry run" if options['dry_run'] else "Done"
+        self.stdout.write(self.style.SUCCESS(f"{prefix}: {report}"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from artists.weaviate.author_similarity import QUERY_WORKERS, SIMILAR_AUTHORS_LIMIT, update_author_similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute author centroid vectors for authors whose artworks changed and refresh "
+        "similar_authors_postgres_ids from them. Meant to run after sync_weaviate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Re-query the similar authors of every author, not only the affected ones')
+        parser.add_argument('--limit', type=int, default=SIMILAR_AUTHORS_LIMIT,
+                            help='Similar authors stored per author (default %(default)s)')
+        parser.add_argument('--workers', type=int, default=QUERY_WORKERS,
+                            help='Concurrent Weaviate queries (default %(default)s)')
+
+    def handle(self, *args, **options):
+        report = update_author_similarity(
+            full=options['full'],
+            limit=options['limit'],
+            workers=options['workers'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done: {report}"))
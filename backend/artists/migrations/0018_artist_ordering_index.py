@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0017_alter_artist_auctions_turnover_2023_h1_usd'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='artist',
+            options={'ordering': ['firstname', 'surname', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='artist',
+            index=models.Index(fields=['firstname', 'surname', 'id'], name='artist_ordering_idx'),
+        ),
+    ]
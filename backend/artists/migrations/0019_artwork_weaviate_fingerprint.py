@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0018_artist_ordering_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artwork',
+            name='picture_image_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='artwork',
+            name='weaviate_indexed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0021_arweaveupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('arweave_upload', 'Arweave upload'), ('weaviate_index', 'Weaviate indexing'), ('weaviate_metadata', 'Weaviate metadata update')], max_length=32),
+        ),
+    ]
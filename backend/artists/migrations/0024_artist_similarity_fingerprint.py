@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0023_weaviatealias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artist',
+            name='similarity_fingerprint',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -24,6 +25,8 @@ class Artist(models.Model):
     profile_image_url = models.URLField(blank=True, null=True)  # saved to Arweave
     profile_image_weaviate_id = models.CharField(max_length=200, blank=True)
     similar_authors_postgres_ids = ArrayField(models.CharField(max_length=200), blank=True, default=list)
+    # sha256 of the artwork objects (and method) the author's centroid was computed from; see author_similarity.py
+    similarity_fingerprint = models.CharField(max_length=64, blank=True)
     media_types = ArrayField(
         models.CharField(max_length=50, choices=MEDIA_TYPE_CHOICES),
         blank=True,
@@ -38,7 +41,11 @@ class Artist(models.Model):
         return f"{self.firstname or ''} {self.surname or ''}"
 
     class Meta:
-        ordering = ['firstname', 'surname']
+        # id makes the ordering total, which keyset pagination relies on
+        ordering = ['firstname', 'surname', 'id']
+        indexes = [
+            models.Index(fields=['firstname', 'surname', 'id'], name='artist_ordering_idx'),
+        ]
 
 
 class Artwork(models.Model):
@@ -50,6 +57,79 @@ class Artwork(models.Model):
     sizeY = models.IntegerField(null=True, blank=True, validators=[MinValueValidator(0)])
     sizeX = models.IntegerField(null=True, blank=True, validators=[MinValueValidator(0)])
     picture_image_weaviate_id = models.CharField(max_length=200, blank=True)
+    picture_image_hash = models.CharField(max_length=64, blank=True)  # sha256 of the normalized image in Weaviate
+    weaviate_indexed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.title
+
+    def reset_weaviate_index(self):
+        """Forget the indexed image, e.g. after the picture changed; the next save or sync re-indexes it."""
+        self.picture_image_weaviate_id = ''
+        self.picture_image_hash = ''
+        self.weaviate_indexed_at = None
+
+
+class Job(models.Model):
+    """A unit of background work (Arweave upload, Weaviate indexing) run by ``manage.py run_jobs``."""
+    ARWEAVE_UPLOAD = 'arweave_upload'
+    WEAVIATE_INDEX = 'weaviate_index'
+    WEAVIATE_METADATA = 'weaviate_metadata'
+    KIND_CHOICES = [
+        (ARWEAVE_UPLOAD, 'Arweave upload'),
+        (WEAVIATE_INDEX, 'Weaviate indexing'),
+        (WEAVIATE_METADATA, 'Weaviate metadata update'),
+    ]
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    artist = models.ForeignKey(Artist, null=True, blank=True, on_delete=models.CASCADE)
+    artwork = models.ForeignKey(Artwork, null=True, blank=True, on_delete=models.CASCADE)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(default='', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        target = f"artwork {self.artwork_id}" if self.artwork_id else f"artist {self.artist_id}"
+        return f"{self.get_kind_display()} of {target} ({self.status})"
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status', 'kind', 'run_after'], name='job_queue_idx'),
+        ]
+
+
+class ArweaveUpload(models.Model):
+    """A file already stored on Arweave, keyed by the sha256 of its bytes so it is never paid for twice."""
+    content_hash = models.CharField(max_length=64, unique=True)
+    url = models.URLField()
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.url
+
+
+class WeaviateAlias(models.Model):
+    """Logical Weaviate collection name and the physical collection currently serving it."""
+    name = models.CharField(max_length=64, unique=True)
+    collection = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} -> {self.collection}"
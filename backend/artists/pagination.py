@@ -0,0 +1,96 @@
+"""
+Keyset (cursor) pagination helpers for list endpoints.
+
+A cursor is the url-safe base64 of the ordering values of the last row on the
+previous page. The next page is fetched with a ``WHERE (a, b, c) > (...)``
+style filter, so the cost of a page does not grow with its position in the
+table the way OFFSET pagination does.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded for the given ordering."""
+    pass
+
+
+def encode_cursor(values):
+    """Encode ordering values of a row into an opaque cursor string."""
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Decode a cursor produced by ``encode_cursor`` into a list of ``length`` values."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def cursor_values_for(model, ordering, values):
+    """
+    Convert decoded cursor ``values`` to the types of ``model``'s ordering fields.
+
+    A cursor is client input: ``None``, nested lists or objects, or values
+    that do not fit the field raise ``InvalidCursor`` instead of failing the
+    query.
+    """
+    converted = []
+    for name, value in zip(ordering, values):
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise InvalidCursor("Invalid cursor")
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            converted.append(value)
+            continue
+        try:
+            converted.append(field.to_python(value))
+        except (ValidationError, TypeError, ValueError) as exc:
+            raise InvalidCursor("Invalid cursor") from exc
+    return converted
+
+
+def keyset_filter(ordering, values):
+    """Build a Q matching rows strictly after ``values`` in ascending ``ordering``."""
+    condition = Q()
+    for index, field in enumerate(ordering):
+        step = Q(**{f"{field}__gt": values[index]})
+        for previous_field, previous_value in zip(ordering[:index], values[:index]):
+            step &= Q(**{previous_field: previous_value})
+        condition |= step
+    return condition
+
+
+def paginate_keyset(queryset, ordering, page_size, cursor=None):
+    """
+    Return one page of ``queryset`` and the cursor of the following page.
+
+    ``ordering`` must be ascending and end with a unique field (e.g. ``id``).
+    Returns a tuple ``(rows, next_cursor)``; ``next_cursor`` is None on the
+    last page.
+    """
+    ordering = list(ordering)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = cursor_values_for(queryset.model, ordering, decode_cursor(cursor, len(ordering)))
+        queryset = queryset.filter(keyset_filter(ordering, values))
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field) for field in ordering)
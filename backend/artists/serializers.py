@@ -15,7 +15,20 @@ class ArtworkSerializer(serializers.ModelSerializer):
         ]  # add the fields you want to include
 
 
-class ArtistSerializer(serializers.ModelSerializer):
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer that takes an optional ``fields`` argument limiting the output fields."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            allowed = set(fields)
+            for field_name in set(self.fields) - allowed:
+                self.fields.pop(field_name)
+
+
+class ArtistSerializer(DynamicFieldsModelSerializer):
     artworks = ArtworkSerializer(source='artwork_set', many=True, read_only=True)
 
     class Meta:
@@ -0,0 +1,28 @@
+"""Signal handlers keeping cached artist data in sync with the database."""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_artists_listing, invalidate_search_row
+from .models import Artist, Artwork
+
+
+@receiver([post_save, post_delete], sender=Artist)
+@receiver([post_save, post_delete], sender=Artwork)
+def invalidate_artist_caches(sender, **kwargs):
+    # Invalidate after commit, otherwise a concurrent request could cache the
+    # pre-commit rows under the new version.
+    transaction.on_commit(invalidate_artists_listing)
+
+
+@receiver([post_save, post_delete], sender=Artist)
+def invalidate_author_search_row(sender, instance, **kwargs):
+    # Read the pk now, delete() sets it to None before the commit
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_search_row('author', pk))
+
+
+@receiver([post_save, post_delete], sender=Artwork)
+def invalidate_artwork_search_row(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_search_row('artwork', pk))
@@ -4,11 +4,19 @@ Test suite for artists app.
 Tests are organized by category:
 - test_helpers.py: Shared test utilities
 - test_ssrf_protection.py: SSRF protection tests
-- test_search.py: Search functionality tests
-- test_image_processing.py: Image processing tests
-- test_arweave.py: Arweave upload tests
-- test_weaviate.py: Weaviate connection tests
+- test_search.py: Search functionality, result hydration cache and denormalized result tests
+- test_image_processing.py: Image resizing, normalization and peak memory benchmark tests
+- test_arweave.py: Arweave upload, dedup, upload sources, uploader reuse and chunk pipelining tests (local stand-in gateway)
+- test_weaviate.py: Weaviate connection and client pool tests
 - test_rate_limiting.py: Rate limiting tests
 - test_authentication.py: Authentication and authorization tests
 - test_admin.py: Admin panel integration tests
+- test_artists_list.py: Artists listing, pagination, field selection and caching tests
+- test_export.py: Streaming registry export tests
+- test_search_cache.py: Image search result and query embedding cache tests, similar authors grouping tests
+- test_ingest.py: Bulk Weaviate ingestion tests
+- test_sync.py: Incremental Weaviate/Postgres sync tests
+- test_jobs.py: Background job queue tests
+- test_schema.py: Weaviate schema migration, collection alias, vector index configuration and index benchmark tests
+- test_author_similarity.py: Author centroid, similar authors graph and resumable similar authors job tests
 """
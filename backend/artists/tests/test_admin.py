@@ -1,12 +1,10 @@
 """Tests for admin panel integration and failure handling."""
-import logging
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from unittest.mock import patch, Mock
 
-from ..models import Artwork, Artist
-from .test_helpers import suppress_logger
+from ..models import Artwork, Artist, Job
 
 
 class AdminPanelIntegrationTests(TestCase):
@@ -39,41 +37,23 @@ class AdminPanelIntegrationTests(TestCase):
         self.artwork_admin = ArtworkAdmin(Artwork, site)
         self.client = Client()
     
-    def test_admin_save_handles_arweave_upload_failure(self):
-        """Test that admin save_model handles Arweave upload failures gracefully."""
-        # Create a mock request
+    def test_admin_profile_image_save_queues_upload(self):
+        """Saving a new profile image queues an Arweave upload instead of uploading in the request."""
         mock_request = Mock()
         mock_request.user = self.admin_user
-        
-        # Create a form with changed profile_image
-        # Note: We're testing the admin method directly, so we simulate the form state
         form = Mock()
         form.changed_data = ['profile_image']
-        
-        # Mock upload_to_arweave to fail
-        with patch('artists.admin.upload_to_arweave') as mock_upload:
-            mock_upload.side_effect = Exception("Arweave upload failed")
-            
-            # The admin save_model should handle the exception
-            # Since the actual implementation catches exceptions in views but may not in admin,
-            # we verify it doesn't crash the entire save operation
-            try:
-                # If profile_image is in changed_data, admin tries to upload
-                # But if upload fails, it should not prevent the model from being saved
-                # (The actual behavior depends on implementation - we test it doesn't crash)
-                self.artist_admin.save_model(
-                    request=mock_request,
-                    obj=self.artist,
-                    form=form,
-                    change=True
-                )
-            except Exception as e:
-                # If exception is raised, it should be a specific one we can handle
-                # The key is that the admin doesn't crash unexpectedly
-                self.assertIsInstance(e, Exception)
-    
-    def test_admin_artwork_save_handles_arweave_failure(self):
-        """Test that ArtworkAdmin save_model handles Arweave failures."""
+        self.artist.profile_image = "profile.png"
+
+        self.artist_admin.save_model(request=mock_request, obj=self.artist, form=form, change=True)
+
+        job = Job.objects.get()
+        self.assertEqual(job.kind, Job.ARWEAVE_UPLOAD)
+        self.assertEqual(job.artist, self.artist)
+        self.assertEqual(job.status, Job.PENDING)
+
+    def test_admin_artwork_picture_save_queues_upload_once(self):
+        """Saving a new artwork picture queues one upload job, even when saved twice."""
         artwork = Artwork.objects.create(
             artist=self.artist,
             title="Test Work",
@@ -82,32 +62,20 @@ class AdminPanelIntegrationTests(TestCase):
             sizeY=100,
             sizeX=100,
         )
-        
         mock_request = Mock()
         mock_request.user = self.admin_user
-        
         form = Mock()
         form.changed_data = ['picture']
-        
-        # Mock upload to fail
-        with patch('artists.admin.upload_to_arweave') as mock_upload:
-            mock_upload.side_effect = Exception("Upload failed")
-            
-            # Should handle gracefully - may raise exception but shouldn't crash unexpectedly
-            try:
-                self.artwork_admin.save_model(
-                    request=mock_request,
-                    obj=artwork,
-                    form=form,
-                    change=True
-                )
-            except Exception as e:
-                # Exception is acceptable, but should be handled at a higher level
-                # The key test is that we can verify the behavior
-                self.assertIsInstance(e, Exception)
-    
-    def test_admin_handles_weaviate_failure_gracefully(self):
-        """Test that admin handles Weaviate connection failures."""
+
+        self.artwork_admin.save_model(request=mock_request, obj=artwork, form=form, change=True)
+        self.artwork_admin.save_model(request=mock_request, obj=artwork, form=form, change=True)
+
+        job = Job.objects.get()
+        self.assertEqual(job.kind, Job.ARWEAVE_UPLOAD)
+        self.assertEqual(job.artwork, artwork)
+
+    def test_admin_queues_indexing_for_unindexed_artwork(self):
+        """An artwork with an Arweave URL but no Weaviate id gets an indexing job."""
         artwork = Artwork.objects.create(
             artist=self.artist,
             title="Test Work",
@@ -117,31 +85,27 @@ class AdminPanelIntegrationTests(TestCase):
             sizeY=100,
             sizeX=100,
         )
-        
         mock_request = Mock()
         mock_request.user = self.admin_user
-        
         form = Mock()
         form.changed_data = []
-        
-        # Mock Weaviate to fail (return None)
-        with patch('artists.admin.add_image_to_weaviate', return_value=None):
-            with suppress_logger('artists.admin', level=logging.ERROR):
-                # Should still save the artwork even if Weaviate fails
-                try:
-                    self.artwork_admin.save_model(
-                        request=mock_request,
-                        obj=artwork,
-                        form=form,
-                        change=True
-                    )
-                    # Verify artwork was saved
-                    artwork.refresh_from_db()
-                    self.assertIsNotNone(artwork.id)
-                except Exception as e:
-                    # If exception is raised, verify it's expected
-                    self.assertIsInstance(e, Exception)
-    
+
+        self.artwork_admin.save_model(request=mock_request, obj=artwork, form=form, change=True)
+
+        artwork.refresh_from_db()
+        self.assertIsNotNone(artwork.id)
+        self.assertEqual(Job.objects.get().kind, Job.WEAVIATE_INDEX)
+
+    def test_artwork_changelist_shows_job_status(self):
+        artwork = Artwork.objects.create(artist=self.artist, title="Test Work", picture_url="https://arweave.net/test")
+        Job.objects.create(kind=Job.WEAVIATE_INDEX, artwork=artwork, status=Job.FAILED)
+        self.client.force_login(self.admin_user)
+
+        response = self.client.get(reverse('admin:artists_artwork_changelist'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Weaviate indexing: Failed")
+
     def test_admin_upload_endpoint_integration(self):
         """Test that admin can use the upload endpoint through the API."""
         self.client.force_login(self.admin_user)
@@ -0,0 +1,168 @@
+"""Tests for the artists listing endpoint."""
+from django.test import SimpleTestCase, TestCase, Client
+
+from ..models import Artwork, Artist
+from ..cache import get_artists_cache
+from ..pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+class CursorEncodingTests(SimpleTestCase):
+    def test_cursor_round_trip(self):
+        values = ["Anna", "Novák", 42]
+        self.assertEqual(decode_cursor(encode_cursor(values), 3), values)
+
+    def test_garbage_cursor_raises(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor("not-a-cursor!", 3)
+
+    def test_cursor_with_wrong_length_raises(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor(["Anna", 1]), 3)
+
+
+class ArtistsEndpointTests(TestCase):
+    def setUp(self):
+        get_artists_cache().clear()
+        self.client = Client()
+        self.url = '/artists/'
+        self.artists = []
+        # Duplicate names make the id tiebreaker matter for the cursor
+        for i, (firstname, surname) in enumerate([
+            ("Anna", "Black"), ("Anna", "Black"), ("Anna", "White"),
+            ("Bob", "Black"), ("Cecil", ""), ("", "Nameless"),
+        ]):
+            artist = Artist.objects.create(firstname=firstname, surname=surname, notes=f"Artist {i}")
+            Artwork.objects.create(artist=artist, title=f"Work {i}", picture_url=f"https://example.com/{i}.png")
+            self.artists.append(artist)
+
+    def _expected_order(self):
+        return [a.id for a in sorted(self.artists, key=lambda a: (a.firstname, a.surname, a.id))]
+
+    def test_unpaginated_list_prefetches_artworks(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual([a['id'] for a in data], self._expected_order())
+        self.assertEqual(len(data[0]['artworks']), 1)
+
+    def test_cursor_pagination_walks_all_artists_once(self):
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {'page_size': 4}
+            if cursor:
+                params['cursor'] = cursor
+            body = self.client.get(self.url, params).json()
+            self.assertTrue(body['success'])
+            seen.extend(a['id'] for a in body['data']['results'])
+            cursor = body['data']['next_cursor']
+            pages += 1
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 2)
+        self.assertEqual(seen, self._expected_order())
+
+    def test_field_selection_skips_artworks(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'fields': 'id,name,profile_image_url', 'page_size': 10})
+
+        results = response.json()['data']['results']
+        self.assertEqual(set(results[0]), {'id', 'name', 'profile_image_url'})
+
+    def test_include_artworks_with_field_selection(self):
+        response = self.client.get(self.url, {'fields': 'id,name', 'include': 'artworks'})
+
+        data = response.json()['data']
+        self.assertEqual(set(data[0]), {'id', 'name', 'artworks'})
+        self.assertEqual(len(data[0]['artworks']), 1)
+
+    def test_invalid_cursor_returns_400(self):
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Invalid cursor')
+
+    def test_well_formed_cursor_with_wrong_types_returns_400(self):
+        for values in (["a", "b", "x"], ["a", "b", None], ["a", ["b"], 1], ["a", "b", {"id": 1}]):
+            with self.subTest(values=values):
+                response = self.client.get(self.url, {'cursor': encode_cursor(values)})
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Invalid cursor')
+
+    def test_unknown_field_returns_400(self):
+        response = self.client.get(self.url, {'fields': 'id,password'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+
+class ArtistsListingCacheTests(TestCase):
+    def setUp(self):
+        get_artists_cache().clear()
+        self.client = Client()
+        self.url = '/artists/'
+        self.artist = Artist.objects.create(firstname="Anna", surname="Black")
+        self.artwork = Artwork.objects.create(artist=self.artist, title="Work", picture_url="https://example.com/a.png")
+
+    def test_response_has_validators(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+    def test_repeated_request_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_variants_are_cached_separately(self):
+        full = self.client.get(self.url)
+        light = self.client.get(self.url, {'fields': 'id,name'})
+
+        self.assertNotEqual(full['ETag'], light['ETag'])
+        self.assertNotIn('artworks', light.json()['data'][0])
+
+    def test_artist_save_invalidates_cache(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artist.firstname = "Hana"
+            self.artist.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'][0]['firstname'], "Hana")
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_artwork_delete_invalidates_cache(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artwork.delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['data'][0]['artworks'], [])
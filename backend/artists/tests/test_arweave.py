@@ -1,10 +1,21 @@
 """Tests for Arweave upload functionality and failure handling."""
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import requests
 from django.test import TestCase, Client
 from django.urls import reverse
-from django.core.files.uploadedfile import SimpleUploadedFile
-from unittest.mock import patch
+from django.core.files.uploadedfile import InMemoryUploadedFile, SimpleUploadedFile, TemporaryUploadedFile
+from unittest.mock import Mock, patch
 
-from ..models import Artist
+from ..arweave_storage import ArweaveUploadError, content_hash, reset_arweave_uploader, upload_to_arweave
+from ..models import Artist, ArweaveUpload
 from .test_helpers import suppress_logger
 
 
@@ -80,7 +91,6 @@ class ArweaveUploadFailureTests(TestCase):
         
         # Mock upload_to_arweave to raise a network error
         with patch('artists.views.upload_to_arweave') as mock_upload:
-            import requests
             mock_upload.side_effect = requests.exceptions.ConnectionError("Network unreachable")
             with suppress_logger('django.request'), suppress_logger('root'):
                 response = self.client.post(url, {'file': file})
@@ -88,3 +98,330 @@ class ArweaveUploadFailureTests(TestCase):
         self.assertEqual(response.status_code, 500)
         body = response.json()
         self.assertFalse(body['success'])
+
+
+class StandInGateway:
+    """Minimal local Arweave gateway accepting /tx and /chunk posts after a delay."""
+
+    def __init__(self, delay=0.05, fail_chunks=False):
+        self.delay = delay
+        self.fail_chunks = fail_chunks
+        self.chunks = []
+        self.transactions = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                # The anchor and price a real transaction reads when it is built and signed
+                body = b'0' if self.path.startswith('/price/') else b'A' * 64
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with gateway.lock:
+                    gateway.in_flight += 1
+                    gateway.max_in_flight = max(gateway.max_in_flight, gateway.in_flight)
+                time.sleep(gateway.delay)
+                with gateway.lock:
+                    gateway.in_flight -= 1
+                    if self.path == '/tx':
+                        gateway.transactions += 1
+                    elif not gateway.fail_chunks:
+                        gateway.chunks.append(body)
+                status = 500 if self.path == '/chunk' and gateway.fail_chunks else 200
+                self.send_response(status)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'OK')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeTransaction:
+    """Signed transaction stand-in: splits its file handler into fixed-size chunks."""
+    CHUNK_SIZE = 4
+
+    def __init__(self, wallet, file_handler=None, file_path=None):
+        self.api_url = wallet.api_url
+        self.id = 'tx-id'
+        self.tags = {}
+        self.file_handler = file_handler
+        self.data_size = os.path.getsize(file_path) if file_path else 0
+        self.chunks = None
+
+    def add_tag(self, name, value):
+        self.tags[name] = value
+
+    def sign(self):
+        self.chunks = {'chunks': list(range(0, self.data_size, self.CHUNK_SIZE))}
+
+    def get_chunk(self, index):
+        self.file_handler.seek(self.chunks['chunks'][index])
+        return {'offset': str(index), 'chunk': self.file_handler.read(self.CHUNK_SIZE)}
+
+
+class FakeUploader:
+    """Posts the transaction header like the library uploader, leaving the chunks to us."""
+
+    def __init__(self, tx, file_handler):
+        self.tx = tx
+        self.tx_posted = False
+        self.chunk_index = 0
+
+    @property
+    def is_complete(self):
+        return self.tx_posted and self.chunk_index == len(self.tx.chunks['chunks'])
+
+    def upload_chunk(self):
+        requests.post(f"{self.tx.api_url}/tx", json={'id': self.tx.id}).raise_for_status()
+        self.tx_posted = True
+
+
+class ArweaveChunkPipelineTests(TestCase):
+    """Upload against a local stand-in gateway."""
+
+    def setUp(self):
+        fd, self.file_path = tempfile.mkstemp(suffix='.png')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'0123456789abcdefghijklmnopqrstuv')  # 8 chunks of 4 bytes
+        self.addCleanup(os.remove, self.file_path)
+        self.addCleanup(reset_arweave_uploader)
+        self.wallet = patch('artists.arweave_storage.arweave.Wallet', return_value=Mock(api_url=None)).start()
+        self.addCleanup(patch.stopall)
+
+    def upload(self, gateway, concurrency, source=None, filename=None):
+        with self.settings(ARWEAVE_GATEWAY_URL=gateway.url, ARWEAVE_CHUNK_CONCURRENCY=concurrency), \
+                patch('artists.arweave_storage.Transaction', FakeTransaction), \
+                patch('artists.arweave_storage.get_uploader', FakeUploader):
+            return upload_to_arweave(source or self.file_path, filename=filename)
+
+    def test_chunks_are_posted_concurrently(self):
+        with StandInGateway(delay=0.1) as gateway:
+            url = self.upload(gateway, concurrency=4)
+
+        self.assertEqual(url, f"{gateway.url}/tx-id")
+        self.assertEqual(gateway.transactions, 1)
+        self.assertEqual(
+            ''.join(c['chunk'] for c in sorted(gateway.chunks, key=lambda c: int(c['offset']))),
+            '0123456789abcdefghijklmnopqrstuv',
+        )
+        self.assertEqual(gateway.max_in_flight, 4)
+
+    def test_concurrency_of_one_is_serial(self):
+        with StandInGateway(delay=0.01) as gateway:
+            self.upload(gateway, concurrency=1)
+
+        self.assertEqual(len(gateway.chunks), 8)
+        self.assertEqual(gateway.max_in_flight, 1)
+
+    def test_buffer_upload_is_chunked_from_memory(self):
+        with StandInGateway(delay=0) as gateway:
+            self.upload(gateway, concurrency=2, source=b'abcdefghij', filename='picture.webp')
+
+        self.assertEqual(
+            ''.join(c['chunk'] for c in sorted(gateway.chunks, key=lambda c: int(c['offset']))),
+            'abcdefghij',
+        )
+
+    def test_in_memory_upload_is_chunked_from_its_buffer(self):
+        file = InMemoryUploadedFile(BytesIO(b'abcdefghij'), 'file', 'a.webp', 'image/webp', 10, None)
+
+        with StandInGateway(delay=0) as gateway:
+            self.upload(gateway, concurrency=2, source=file)
+
+        self.assertEqual(
+            ''.join(c['chunk'] for c in sorted(gateway.chunks, key=lambda c: int(c['offset']))),
+            'abcdefghij',
+        )
+        # Every view of the buffer was released, so the upload can still be closed
+        file.close()
+
+    def test_wallet_and_session_are_reused_between_uploads(self):
+        with StandInGateway(delay=0) as gateway:
+            self.upload(gateway, concurrency=2)
+            self.upload(gateway, concurrency=2, source=b'another picture byte', filename='b.png')
+
+        self.wallet.assert_called_once()
+        self.assertEqual(len(gateway.chunks), 8 + 5)
+
+    def test_rejected_chunk_fails_upload(self):
+        with StandInGateway(delay=0, fail_chunks=True) as gateway:
+            with self.assertRaises(ArweaveUploadError):
+                self.upload(gateway, concurrency=2)
+
+
+def throwaway_jwk():
+    """A fresh RSA key in the JWK form of an Arweave wallet file."""
+    from Crypto.PublicKey import RSA
+
+    key = RSA.generate(2048)
+
+    def encode(number):
+        return base64.urlsafe_b64encode(number.to_bytes((number.bit_length() + 7) // 8, 'big')).rstrip(b'=').decode()
+
+    return {
+        'kty': 'RSA', 'e': encode(key.e), 'n': encode(key.n), 'd': encode(key.d), 'p': encode(key.p),
+        'q': encode(key.q), 'dp': encode(key.d % (key.p - 1)), 'dq': encode(key.d % (key.q - 1)),
+        'qi': encode(pow(key.q, -1, key.p)),
+    }
+
+
+class ArweaveTransactionChunkTests(TestCase):
+    """Upload real signed transactions of the arweave client to a local stand-in gateway."""
+
+    # Three chunks of at most 256 KiB, so the chunks are not sent in the transaction body
+    DATA = os.urandom(600 * 1024)
+
+    def setUp(self):
+        fd, self.wallet_path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(throwaway_jwk(), f)
+        self.addCleanup(os.remove, self.wallet_path)
+        self.addCleanup(reset_arweave_uploader)
+
+    def upload(self, source, filename=None):
+        with StandInGateway(delay=0) as gateway, self.settings(
+            ARWEAVE_WALLET_PATH=self.wallet_path, ARWEAVE_GATEWAY_URL=gateway.url, ARWEAVE_CHUNK_CONCURRENCY=2,
+        ):
+            url = upload_to_arweave(source, filename=filename)
+        return gateway, url
+
+    def assertReassembles(self, gateway):
+        self.assertEqual(gateway.transactions, 1)
+        chunks = sorted(gateway.chunks, key=lambda c: int(c['offset']))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual({c['data_size'] for c in chunks}, {str(len(self.DATA))})
+        data = b''.join(base64.urlsafe_b64decode(c['chunk'] + '=' * (-len(c['chunk']) % 4)) for c in chunks)
+        self.assertEqual(data, self.DATA)
+
+    def test_file_backed_transaction(self):
+        fd, file_path = tempfile.mkstemp(suffix='.bin')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.DATA)
+        self.addCleanup(os.remove, file_path)
+
+        gateway, url = self.upload(file_path)
+
+        self.assertTrue(url.startswith(f"{gateway.url}/"))
+        self.assertReassembles(gateway)
+
+    def test_bytes_backed_transaction(self):
+        gateway, _ = self.upload(memoryview(bytearray(self.DATA)), filename='data.bin')
+
+        self.assertReassembles(gateway)
+
+
+class ArweaveUploadViewTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.client = Client()
+        self.client.force_login(User.objects.create_user(username='admin', password='x', is_staff=True))
+        self.artist = Artist.objects.create(firstname="Test", surname="Artist")
+
+    def test_small_upload_is_sent_from_memory(self):
+        url = reverse('upload_to_arweave', kwargs={'pk': self.artist.pk})
+        file = SimpleUploadedFile("test.jpg", b"fake-image-bytes", content_type="image/jpeg")
+
+        with patch('artists.views.upload_to_arweave', return_value="https://arweave.net/abc") as mock_upload:
+            response = self.client.post(url, {'file': file})
+
+        self.assertEqual(response.status_code, 200)
+        uploaded = mock_upload.call_args.args[0]
+        self.assertFalse(hasattr(uploaded, 'temporary_file_path'))
+        self.assertEqual(uploaded.name, "test.jpg")
+
+
+class ArweaveUploadDedupTests(TestCase):
+    """Content already on Arweave is not uploaded again."""
+
+    def setUp(self):
+        fd, self.file_path = tempfile.mkstemp(suffix='.png')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'png-bytes')
+        self.addCleanup(os.remove, self.file_path)
+
+    def test_first_upload_is_recorded_and_repeats_are_skipped(self):
+        uploader = Mock()
+        uploader.upload_file.return_value = "https://arweave.net/first"
+
+        with patch('artists.arweave_storage.get_arweave_uploader', return_value=uploader):
+            first = upload_to_arweave(self.file_path)
+            again = upload_to_arweave(self.file_path)
+            from_buffer = upload_to_arweave(b'png-bytes', filename='copy.png')
+
+        self.assertEqual([first, again, from_buffer], ["https://arweave.net/first"] * 3)
+        uploader.upload_file.assert_called_once_with(self.file_path)
+        uploader.upload_bytes.assert_not_called()
+        upload = ArweaveUpload.objects.get()
+        self.assertEqual(upload.content_hash, content_hash(b'png-bytes'))
+        self.assertEqual(upload.size, len(b'png-bytes'))
+
+    def test_failed_upload_is_not_recorded(self):
+        uploader = Mock()
+        uploader.upload_bytes.side_effect = ArweaveUploadError("rejected")
+
+        with patch('artists.arweave_storage.get_arweave_uploader', return_value=uploader):
+            with self.assertRaises(ArweaveUploadError):
+                upload_to_arweave(b'png-bytes', filename='x.png')
+
+        self.assertFalse(ArweaveUpload.objects.exists())
+
+
+class ArweaveUploadSourceTests(TestCase):
+    """upload_to_arweave reads uploads where they already are, never via a new temporary file."""
+
+    def setUp(self):
+        self.uploader = Mock()
+        self.uploader.upload_file.return_value = "https://arweave.net/file"
+        self.uploader.upload_bytes.return_value = "https://arweave.net/bytes"
+        patcher = patch('artists.arweave_storage.get_arweave_uploader', return_value=self.uploader)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_in_memory_upload_is_sent_from_its_buffer(self):
+        file = InMemoryUploadedFile(BytesIO(b"in-memory"), 'file', 'a.webp', 'image/webp', 9, None)
+        # The view is released after the upload, so read it during the call
+        sent = []
+        self.uploader.upload_bytes.side_effect = (
+            lambda data, filename: sent.append((bytes(data), filename)) or "https://arweave.net/bytes"
+        )
+
+        upload_to_arweave(file)
+
+        self.assertEqual(sent, [(b"in-memory", 'a.webp')])
+        # The buffer export was released, so the upload can still be closed
+        file.close()
+
+    def test_spooled_upload_is_sent_from_its_temporary_file(self):
+        file = TemporaryUploadedFile('big.png', 'image/png', 7, None)
+        file.write(b"on-disk")
+        file.flush()
+
+        upload_to_arweave(file)
+
+        self.uploader.upload_file.assert_called_once_with(file.temporary_file_path())
+        file.close()
+
+    def test_chunk_iterator_is_joined(self):
+        upload_to_arweave(iter([b"chunk-1", b"chunk-2"]), filename='c.png')
+
+        self.uploader.upload_bytes.assert_called_once_with(b"chunk-1chunk-2", 'c.png')
@@ -0,0 +1,238 @@
+"""Tests for the author centroid similarity graph and the image-search based similar authors job."""
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from unittest.mock import MagicMock, patch
+
+from ..cache import get_artists_cache, search_row_key
+from ..models import Artist, Artwork
+from ..weaviate import author_similarity
+from ..weaviate.author_similarity import mean_centroid, medoid, update_author_similarity
+from ..weaviate.data_helpers import populate_all_authors_similar_ids, read_checkpoint
+
+
+class FakeAuthorsIndex:
+    """In-memory stand-in for the Artworks vectors and the Authors collection."""
+
+    def __init__(self):
+        self.artwork_vectors = {}
+        self.centroids = {}
+        self.stored = []
+        self.queried = []
+
+    def fetch_artwork_vectors(self, uuids):
+        return {uuid: self.artwork_vectors[uuid] for uuid in uuids if uuid in self.artwork_vectors}
+
+    def fetch_author_centroids(self, author_ids):
+        return {author_id: self.centroids[author_id] for author_id in author_ids if author_id in self.centroids}
+
+    def store_author_centroids(self, centroids, counts):
+        self.stored.extend(centroids)
+        self.centroids.update(centroids)
+        return set()
+
+    def delete_author_centroids(self, author_ids):
+        for author_id in author_ids:
+            self.centroids.pop(author_id, None)
+
+    def nearest_authors(self, author_id, vector, limit):
+        self.queried.append(author_id)
+        ranked = sorted(
+            (other for other in self.centroids if other != author_id),
+            key=lambda other: -sum(x * y for x, y in zip(vector, self.centroids[other])),
+        )
+        return [str(other) for other in ranked[:limit]]
+
+
+class CentroidTests(TestCase):
+    def test_mean_is_normalized(self):
+        for component in mean_centroid([[2.0, 0.0], [0.0, 3.0]]):
+            self.assertAlmostEqual(component, 2 ** -0.5)
+
+    def test_medoid_ignores_outlier(self):
+        vectors = [[1.0, 0.1], [1.0, 0.0], [1.0, -0.1], [-1.0, 0.0]]
+
+        self.assertEqual(medoid(vectors), [1.0, 0.0])
+
+
+class UpdateAuthorSimilarityTests(TestCase):
+    def setUp(self):
+        self.index = FakeAuthorsIndex()
+        for name in ('fetch_artwork_vectors', 'fetch_author_centroids', 'store_author_centroids',
+                     'delete_author_centroids', 'nearest_authors'):
+            patch.object(author_similarity, name, getattr(self.index, name)).start()
+        self.addCleanup(patch.stopall)
+
+        self.red = self._artist('Red', [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0]])
+        self.pink = self._artist('Pink', [[0.8, 0.2, 0.0]])
+        self.blue = self._artist('Blue', [[0.1, 0.0, 1.0]])
+
+    def _artist(self, name, vectors):
+        artist = Artist.objects.create(firstname=name, surname='Painter')
+        for vector in vectors:
+            self._artwork(artist, vector)
+        return artist
+
+    def _artwork(self, artist, vector):
+        artwork = Artwork.objects.create(artist=artist, picture_url='https://arweave.net/a')
+        artwork.picture_image_weaviate_id = f'00000000-0000-0000-0000-{artwork.id:012d}'
+        artwork.save()
+        self.index.artwork_vectors[artwork.picture_image_weaviate_id] = vector
+        return artwork
+
+    def _similar(self, artist):
+        artist.refresh_from_db()
+        return artist.similar_authors_postgres_ids
+
+    def test_first_run_builds_every_centroid_and_list(self):
+        report = update_author_similarity(limit=2)
+
+        self.assertEqual(report.recomputed, 3)
+        self.assertEqual(self._similar(self.red), [str(self.pink.id), str(self.blue.id)])
+        self.assertEqual(self._similar(self.blue)[0], str(self.red.id))
+
+    def test_unchanged_authors_are_not_recomputed(self):
+        update_author_similarity(limit=2)
+        self.index.stored.clear()
+        self.index.queried.clear()
+
+        report = update_author_similarity(limit=2)
+
+        self.assertEqual(report.recomputed, 0)
+        self.assertEqual(self.index.stored, [])
+        self.assertEqual(self.index.queried, [])
+
+    def test_only_changed_author_gets_a_new_centroid(self):
+        update_author_similarity(limit=1)
+        self.index.stored.clear()
+        self._artwork(self.blue, [1.0, 0.05, 0.0])
+
+        report = update_author_similarity(limit=1)
+
+        self.assertEqual(self.index.stored, [self.blue.id])
+        self.assertEqual(report.recomputed, 1)
+
+    @override_settings(AUTHOR_CENTROID_METHOD='medoid')
+    def test_changing_method_recomputes_everyone(self):
+        with override_settings(AUTHOR_CENTROID_METHOD='mean'):
+            update_author_similarity(limit=2)
+        self.index.stored.clear()
+
+        update_author_similarity(limit=2)
+
+        self.assertCountEqual(self.index.stored, [self.red.id, self.pink.id, self.blue.id])
+
+    def test_command_invalidates_the_listing_and_search_rows(self):
+        get_artists_cache().clear()
+        etag = self.client.get('/artists/')['ETag']
+        get_artists_cache().set(search_row_key('author', self.red.id), {'similar_authors_postgres_ids': []})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('update_author_similarity', '--limit', '2', stdout=StringIO())
+
+        response = self.client.get('/artists/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIsNone(get_artists_cache().get(search_row_key('author', self.red.id)))
+
+    def test_author_without_artworks_is_removed_from_lists(self):
+        update_author_similarity(limit=2)
+        Artwork.objects.filter(artist=self.pink).update(picture_image_weaviate_id='')
+
+        report = update_author_similarity(limit=2)
+
+        self.assertEqual(report.removed, 1)
+        self.assertNotIn(self.pink.id, self.index.centroids)
+        self.assertEqual(self._similar(self.pink), [])
+        self.assertNotIn(str(self.pink.id), self._similar(self.red))
+
+
+class PopulateSimilarAuthorsTests(TestCase):
+    def setUp(self):
+        self.artists = [Artist.objects.create(firstname=f'Artist{i}', surname='Painter') for i in range(5)]
+        for artist in self.artists[:4]:
+            Artwork.objects.create(artist=artist, picture_url=f'https://arweave.net/{artist.id}')
+        self.fetch = patch('artists.weaviate.data_helpers.url_to_image_bytes',
+                           side_effect=lambda url: url.encode()).start()
+        self.search = patch('artists.weaviate.data_helpers.search_similar_authors_ids_by_image_data',
+                            side_effect=self._search).start()
+        self.addCleanup(patch.stopall)
+        checkpoint_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(checkpoint_dir.cleanup)
+        self.checkpoint = os.path.join(checkpoint_dir.name, 'similar.checkpoint')
+        self.failing = self.artists[2].id
+
+    def _search(self, image_bytes, limit):
+        artist_id = int(image_bytes.rsplit(b'/', 1)[-1])
+        if artist_id == self.failing:
+            raise ConnectionError('gateway timeout')
+        return MagicMock(objects=[MagicMock(properties={'author_psql_id': str(artist_id + 100)})])
+
+    def _similar(self, artist):
+        artist.refresh_from_db()
+        return artist.similar_authors_postgres_ids
+
+    def test_failures_and_missing_pictures_do_not_stop_the_run(self):
+        report = populate_all_authors_similar_ids(workers=3, batch_size=2, checkpoint_path=self.checkpoint,
+                                                  progress=None)
+
+        self.assertEqual((report.updated, report.failed, report.skipped), (3, 1, 1))
+        self.assertEqual(report.failed_artist_ids, [self.artists[2].id])
+        self.assertEqual(self._similar(self.artists[0]), [str(self.artists[0].id + 100)])
+        self.assertEqual(self._similar(self.artists[2]), [])
+        self.assertEqual(set(report.timings), {'select', 'fetch', 'search', 'save'})
+
+    def test_run_resumes_after_checkpoint(self):
+        self.failing = None
+        populate_all_authors_similar_ids(batch_size=2, checkpoint_path=self.checkpoint, progress=None)
+        self.assertEqual(read_checkpoint(self.checkpoint), self.artists[-1].id)
+        self.search.reset_mock()
+
+        report = populate_all_authors_similar_ids(batch_size=2, checkpoint_path=self.checkpoint, progress=None)
+
+        self.assertEqual(report.total, 0)
+        self.search.assert_not_called()
+
+    def test_checkpoint_is_written_after_each_batch(self):
+        self.failing = None
+        checkpoints = []
+
+        populate_all_authors_similar_ids(batch_size=2, checkpoint_path=self.checkpoint,
+                                         progress=lambda report: checkpoints.append(read_checkpoint(self.checkpoint)))
+
+        self.assertEqual(checkpoints, [self.artists[1].id, self.artists[3].id, self.artists[4].id])
+
+    def test_resumed_run_retries_failed_artists(self):
+        populate_all_authors_similar_ids(batch_size=2, checkpoint_path=self.checkpoint, progress=None)
+        self.assertEqual(read_checkpoint(self.checkpoint), self.artists[1].id)
+        self.failing = None
+
+        report = populate_all_authors_similar_ids(batch_size=2, checkpoint_path=self.checkpoint, progress=None)
+
+        self.assertEqual((report.total, report.updated, report.failed), (3, 2, 0))
+        self.assertEqual(self._similar(self.artists[2]), [str(self.artists[2].id + 100)])
+        self.assertEqual(read_checkpoint(self.checkpoint), self.artists[-1].id)
+
+    def test_own_author_is_left_out_of_the_similar_ids(self):
+        self.failing = None
+        self.search.side_effect = lambda image_bytes, limit: MagicMock(objects=[
+            MagicMock(properties={'author_psql_id': str(self.artists[0].id)}),
+            MagicMock(properties={'author_psql_id': str(self.artists[1].id)}),
+        ])
+
+        populate_all_authors_similar_ids(limit=1, batch_size=2, progress=None)
+
+        self.assertEqual(self.search.call_args.args[1], 2)
+        self.assertEqual(self._similar(self.artists[0]), [str(self.artists[1].id)])
+        self.assertEqual(self._similar(self.artists[1]), [str(self.artists[0].id)])
+
+    def test_saved_similar_ids_invalidate_cached_artist_data(self):
+        self.failing = None
+        get_artists_cache().set(search_row_key('author', self.artists[0].id), {'similar_authors_postgres_ids': []})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            populate_all_authors_similar_ids(batch_size=2, progress=None)
+
+        self.assertIsNone(get_artists_cache().get(search_row_key('author', self.artists[0].id)))
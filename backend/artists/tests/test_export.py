@@ -0,0 +1,63 @@
+"""Tests for the streaming registry export."""
+import json
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Artwork, Artist
+from ..export import iter_json
+from ..cache import get_artists_cache
+
+
+class ExportArtistsTests(TestCase):
+    def setUp(self):
+        get_artists_cache().clear()
+        self.client = Client()
+        self.url = reverse('export_artists')
+        for i in range(5):
+            artist = Artist.objects.create(firstname=f"First{i}", surname=f"Last{i}", notes=f"Artist {i}")
+            for j in range(2):
+                Artwork.objects.create(artist=artist, title=f"Work {i}-{j}", picture_url=f"https://example.com/{i}-{j}.png")
+
+    def _read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_json_export_matches_listing(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        body = json.loads(self._read(response))
+        listing = self.client.get('/artists/').json()
+        self.assertEqual(body, listing)
+
+    def test_ndjson_export_one_artist_per_line(self):
+        response = self.client.get(self.url, {'output': 'ndjson'})
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = self._read(response).splitlines()
+        self.assertEqual(len(lines), 5)
+        first = json.loads(lines[0])
+        self.assertEqual(first['firstname'], 'First0')
+        self.assertEqual(len(first['artworks']), 2)
+
+    def test_export_reads_in_chunks(self):
+        # One server-side cursor for artists plus one artwork prefetch per chunk of 2
+        with self.assertNumQueries(4):
+            chunks = list(iter_json(chunk_size=2))
+
+        self.assertEqual(len(chunks), 5)  # opening, three batches, closing
+        self.assertEqual(len(json.loads(''.join(chunks))['data']), 5)
+
+    def test_empty_registry_is_valid_json(self):
+        Artist.objects.all().delete()
+
+        body = json.loads(self._read(self.client.get(self.url)))
+
+        self.assertEqual(body, {'success': True, 'data': [], 'error': None})
+
+    def test_unknown_output_returns_400(self):
+        response = self.client.get(self.url, {'output': 'xml'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
@@ -1,8 +1,11 @@
 """Shared test utilities and helpers."""
 
 from contextlib import contextmanager
+from io import BytesIO
 import logging
 
+from PIL import Image
+
 
 class DummyImage:
     """Mimics the weaviate response object shape"""
@@ -13,6 +16,13 @@ class DummyImage:
         }
 
 
+def make_image_bytes(size=(8, 8), color=(255, 0, 0), format="PNG"):
+    """Encode a solid-colour image, for code paths that decode uploads."""
+    buffer = BytesIO()
+    Image.new("RGB", size, color=color).save(buffer, format=format)
+    return buffer.getvalue()
+
+
 @contextmanager
 def suppress_logger(name, level=logging.CRITICAL):
     """Temporarily raise logger level to suppress noisy logs."""
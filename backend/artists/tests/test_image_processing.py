@@ -1,4 +1,6 @@
 """Tests for image processing functionality."""
+import logging
+import tracemalloc
 from django.test import TestCase
 from unittest.mock import patch
 from io import BytesIO
@@ -7,9 +9,15 @@ from PIL import Image
 
 from ..weaviate import (
     resize_image_if_needed,
+    resize_image_bytes_if_needed,
+    normalize_image_bytes,
+    url_to_base64,
+    url_to_image_bytes,
     WeaviateImageError,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class ResizeImageIfNeededTests(TestCase):
     def _make_base64_image(self, size=(200, 200), mode="RGBA", format="PNG"):
@@ -45,3 +53,165 @@ class ResizeImageIfNeededTests(TestCase):
         with patch('artists.weaviate.service.MAX_IMAGE_PIXELS', 10):
             with self.assertRaises(WeaviateImageError):
                 resize_image_if_needed(b64_image, max_size_mb=max_size_mb)
+
+
+class ResizeImageBytesIfNeededTests(TestCase):
+    def _make_image_bytes(self, size=(200, 200), mode="RGB", format="PNG"):
+        img = Image.new(mode, size, color=(0, 128, 255))
+        buffer = BytesIO()
+        img.save(buffer, format=format)
+        return buffer.getvalue()
+
+    def test_returns_input_object_when_under_limit(self):
+        img_bytes = self._make_image_bytes()
+
+        self.assertIs(resize_image_bytes_if_needed(img_bytes, max_size_mb=1), img_bytes)
+
+    def test_shrinks_to_jpeg_bytes(self):
+        img_bytes = self._make_image_bytes(size=(2000, 2000), mode="RGBA")
+        max_size_mb = 0.01
+
+        result = resize_image_bytes_if_needed(img_bytes, max_size_mb=max_size_mb)
+
+        self.assertIsInstance(result, bytes)
+        self.assertLessEqual(len(result), int(max_size_mb * 1024 * 1024))
+        with Image.open(BytesIO(result)) as img:
+            self.assertEqual(img.format, "JPEG")
+            self.assertEqual(img.mode, "RGB")
+
+    def test_invalid_bytes_raise(self):
+        with self.assertRaises(WeaviateImageError):
+            resize_image_bytes_if_needed(b"not an image", max_size_mb=0.000001)
+
+
+class NormalizeImageBytesTests(TestCase):
+    def _make_image_bytes(self, size, mode="RGB", format="JPEG"):
+        img = Image.new(mode, size)
+        buffer = BytesIO()
+        img.save(buffer, format=format)
+        return buffer.getvalue()
+
+    def test_downscales_longest_side_to_max_dimension(self):
+        img_bytes = self._make_image_bytes((4000, 2000))
+
+        result = normalize_image_bytes(img_bytes, max_dimension=512)
+
+        with Image.open(BytesIO(result)) as img:
+            self.assertEqual(img.format, "JPEG")
+            self.assertEqual(img.size, (512, 256))
+
+    def test_converts_alpha_images_to_rgb(self):
+        img_bytes = self._make_image_bytes((1000, 1000), mode="RGBA", format="PNG")
+
+        result = normalize_image_bytes(img_bytes, max_dimension=100)
+
+        with Image.open(BytesIO(result)) as img:
+            self.assertEqual(img.mode, "RGB")
+            self.assertEqual(img.size, (100, 100))
+
+    def test_small_image_returned_unchanged(self):
+        img_bytes = self._make_image_bytes((200, 100))
+
+        self.assertIs(normalize_image_bytes(img_bytes, max_dimension=512), img_bytes)
+
+    def test_max_dimension_defaults_to_setting(self):
+        img_bytes = self._make_image_bytes((800, 800))
+
+        with self.settings(WEAVIATE_IMAGE_MAX_DIMENSION=64):
+            result = normalize_image_bytes(img_bytes)
+
+        with Image.open(BytesIO(result)) as img:
+            self.assertEqual(img.size, (64, 64))
+
+    def test_decompression_bomb_guard_raises(self):
+        img_bytes = self._make_image_bytes((100, 100))
+
+        with patch('artists.weaviate.service.MAX_IMAGE_PIXELS', 10):
+            with self.assertRaises(WeaviateImageError):
+                normalize_image_bytes(img_bytes, max_dimension=50)
+
+
+class ImagePipelinePeakMemoryBenchmark(TestCase):
+    """
+    Peak Python heap of the download-to-query-payload path, measured with
+    tracemalloc and reported as multiples of the downloaded image size.
+    """
+
+    def _measure_peak(self, func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            result = func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak, result
+
+    def _serve(self, image_bytes):
+        class DummyResponse:
+            status_code = 200
+            headers = {'content-type': 'image/jpeg'}
+
+            def raise_for_status(self):
+                return None
+
+            def iter_content(self, chunk_size=8192):
+                # Fresh chunk objects, as a real socket read allocates them
+                for start in range(0, len(image_bytes), chunk_size):
+                    yield image_bytes[start:start + chunk_size]
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, exc_type, exc_val, exc_tb):
+                return False
+
+        class DummySession:
+            def mount(self, prefix, adapter):
+                pass
+
+            def get(self, *args, **kwargs):
+                return DummyResponse()
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, exc_type, exc_val, exc_tb):
+                return False
+
+        pinned = ("example.com", "93.184.216.34", 443)
+        return (
+            patch('artists.weaviate.service.is_safe_url', return_value=pinned),
+            patch('artists.weaviate.service.requests.Session', side_effect=DummySession),
+        )
+
+    def test_full_bytes_path_peak_stays_near_two_image_copies(self):
+        # Noise keeps the JPEG large (a few MB) so copies dominate the measurement
+        img = Image.effect_noise((2000, 1500), 64).convert("RGB")
+        buffer = BytesIO()
+        img.save(buffer, format="JPEG", quality=90)
+        img_bytes = buffer.getvalue()
+        del img, buffer
+        self.assertLess(len(img_bytes), 8 * 1024 * 1024)
+        url = "https://example.com/large.jpg"
+
+        def bytes_path():
+            return base64.b64encode(normalize_image_bytes(url_to_image_bytes(url), max_dimension=512))
+
+        def base64_path():
+            b64 = resize_image_if_needed(url_to_base64(url))
+            return base64.b64encode(normalize_image_bytes(base64.b64decode(b64), max_dimension=512))
+
+        is_safe_url_patch, session_patch = self._serve(img_bytes)
+        with is_safe_url_patch, session_patch:
+            bytes_peak, payload = self._measure_peak(bytes_path)
+            base64_peak, _ = self._measure_peak(base64_path)
+
+        logger.info(
+            "Image pipeline peak memory for a %d byte image: bytes path %.2fx, base64 path %.2fx",
+            len(img_bytes), bytes_peak / len(img_bytes), base64_peak / len(img_bytes),
+        )
+        # The streamed chunks and their join are the only full-size buffers
+        self.assertLess(bytes_peak, 2.5 * len(img_bytes))
+        self.assertLess(bytes_peak, base64_peak)
+        # The payload sent to the vectorizer is the downscaled image, not the download
+        self.assertLess(len(payload), len(img_bytes) // 4)
@@ -0,0 +1,138 @@
+"""Tests for bulk ingestion of artwork images into Weaviate."""
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from unittest.mock import MagicMock, patch
+
+from ..models import Artist, Artwork
+from ..weaviate.ingest import artworks_to_ingest, ingest_artworks
+from ..weaviate.service import ArtworkImage, artwork_object_uuid
+from .test_helpers import suppress_logger
+
+
+IMAGE = ArtworkImage(base64='aW1hZ2U=', content_hash='ab' * 32)
+
+
+class IngestArtworksTests(TestCase):
+    def setUp(self):
+        self.artist = Artist.objects.create(firstname="Test", surname="Artist")
+        self.artworks = [
+            Artwork.objects.create(artist=self.artist, title=f"Work {i}", picture_url=f"https://example.com/{i}.png")
+            for i in range(5)
+        ]
+        Artwork.objects.create(artist=self.artist, title="No picture")
+
+        self.collection = MagicMock()
+        self.collection.batch.failed_objects = []
+        self.batch = self.collection.batch.dynamic.return_value.__enter__.return_value
+        client = MagicMock()
+        client.collections.get.return_value = self.collection
+        context = MagicMock()
+        context.__enter__.return_value = client
+        patcher = patch('artists.weaviate.ingest.get_weaviate_client', return_value=context)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.collection.query.fetch_objects.return_value.objects = []
+        self.fetch = patch('artists.weaviate.ingest.fetch_artwork_image', return_value=IMAGE).start()
+        self.addCleanup(patch.stopall)
+
+    def test_indexes_artworks_in_chunks_and_saves_ids(self):
+        progress = []
+
+        report = ingest_artworks(chunk_size=2, workers=3, progress=progress.append)
+
+        self.assertEqual(report.total, 5)
+        self.assertEqual(report.indexed, 5)
+        self.assertEqual(self.collection.batch.dynamic.call_count, 3)
+        self.assertEqual(self.batch.add_object.call_count, 5)
+        self.assertEqual(len(progress), 3)
+        for artwork in Artwork.objects.filter(picture_url__isnull=False):
+            self.assertTrue(artwork.picture_image_weaviate_id)
+
+    def test_rerun_skips_indexed_artworks(self):
+        ingest_artworks(chunk_size=10)
+        self.fetch.reset_mock()
+
+        report = ingest_artworks(chunk_size=10)
+
+        self.assertEqual(report.total, 0)
+        self.fetch.assert_not_called()
+
+    def test_failed_downloads_and_rejected_objects_are_reported(self):
+        failing = self.artworks[1]
+
+        def fetch(url):
+            if url == failing.picture_url:
+                raise OSError("timeout")
+            return IMAGE
+        self.fetch.side_effect = fetch
+
+        def reject_third(properties, uuid):
+            if properties['artwork_psql_id'] == str(self.artworks[2].id):
+                self.collection.batch.failed_objects = [MagicMock(object_=MagicMock(uuid=uuid))]
+        self.batch.add_object.side_effect = reject_third
+
+        with suppress_logger('artists.weaviate.ingest'):
+            report = ingest_artworks(chunk_size=10)
+
+        self.assertEqual(report.indexed, 3)
+        self.assertEqual(sorted(report.failed_artwork_ids), [self.artworks[1].id, self.artworks[2].id])
+        self.assertEqual(Artwork.objects.filter(picture_image_weaviate_id='', picture_url__isnull=False).count(), 2)
+
+    def test_images_already_in_weaviate_are_not_sent_again(self):
+        stored = artwork_object_uuid(self.artworks[0].id, IMAGE.content_hash)
+        self.collection.query.fetch_objects.return_value.objects = [MagicMock(uuid=stored)]
+
+        report = ingest_artworks(chunk_size=10)
+
+        self.assertEqual(report.indexed, 5)
+        self.assertEqual(report.unchanged, 1)
+        self.assertEqual(self.batch.add_object.call_count, 4)
+        self.artworks[0].refresh_from_db()
+        self.assertEqual(self.artworks[0].picture_image_weaviate_id, stored)
+
+    def test_reindexed_artwork_with_a_new_image_replaces_its_old_object(self):
+        old = artwork_object_uuid(self.artworks[0].id, 'cd' * 32)
+        Artwork.objects.filter(pk=self.artworks[0].pk).update(picture_image_weaviate_id=old)
+        current = artwork_object_uuid(self.artworks[1].id, IMAGE.content_hash)
+        Artwork.objects.filter(pk=self.artworks[1].pk).update(picture_image_weaviate_id=current)
+
+        ingest_artworks(artworks_to_ingest(reindex=True), chunk_size=10)
+
+        self.collection.data.delete_many.assert_called_once()
+        where = self.collection.data.delete_many.call_args.kwargs['where']
+        self.assertEqual(where.value, [old])
+        self.artworks[0].refresh_from_db()
+        self.assertEqual(
+            self.artworks[0].picture_image_weaviate_id, artwork_object_uuid(self.artworks[0].id, IMAGE.content_hash)
+        )
+
+    def test_rejected_replacement_keeps_the_old_object(self):
+        old = artwork_object_uuid(self.artworks[0].id, 'cd' * 32)
+        Artwork.objects.filter(pk=self.artworks[0].pk).update(picture_image_weaviate_id=old)
+
+        def reject_first(properties, uuid):
+            if properties['artwork_psql_id'] == str(self.artworks[0].id):
+                self.collection.batch.failed_objects = [MagicMock(object_=MagicMock(uuid=uuid))]
+        self.batch.add_object.side_effect = reject_first
+
+        with suppress_logger('artists.weaviate.ingest'):
+            ingest_artworks(artworks_to_ingest(reindex=True), chunk_size=10)
+
+        self.collection.data.delete_many.assert_not_called()
+        self.artworks[0].refresh_from_db()
+        self.assertEqual(self.artworks[0].picture_image_weaviate_id, old)
+
+    def test_start_after_resumes_from_artwork_id(self):
+        artworks = artworks_to_ingest(start_after=self.artworks[2].id)
+
+        self.assertEqual(list(artworks.values_list('id', flat=True)), [a.id for a in self.artworks[3:]])
+
+    def test_management_command_reports_throughput(self):
+        out = StringIO()
+
+        call_command('index_artworks', '--workers', '2', '--chunk-size', '4', stdout=out)
+
+        self.assertIn("5 indexed", out.getvalue())
+        self.assertIn("artworks/s", out.getvalue())
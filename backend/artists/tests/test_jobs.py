@@ -0,0 +1,175 @@
+"""Tests for the database-backed background job queue."""
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest.mock import patch
+
+from ..jobs import claim_jobs, enqueue_job, queue_image_upload, run_job, work_off
+from ..models import Artist, ArweaveUpload, Artwork, Job
+from .test_helpers import suppress_logger
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.artist = Artist.objects.create(firstname="Test", surname="Artist")
+        self.artwork = Artwork.objects.create(artist=self.artist, picture_url="https://arweave.net/test")
+        self.delete_replaced = patch('artists.jobs.delete_replaced_artwork_objects').start()
+        self.addCleanup(patch.stopall)
+
+    def test_pending_job_is_reused_when_enqueued_again(self):
+        first = enqueue_job(Job.WEAVIATE_INDEX, artwork=self.artwork)
+        second = enqueue_job(Job.WEAVIATE_INDEX, artwork=self.artwork)
+
+        self.assertEqual(first.id, second.id)
+
+    def test_claim_marks_jobs_running_and_skips_future_jobs(self):
+        due = enqueue_job(Job.WEAVIATE_INDEX, artwork=self.artwork)
+        other = Artwork.objects.create(artist=self.artist, picture_url="https://arweave.net/other")
+        Job.objects.create(kind=Job.WEAVIATE_INDEX, artwork=other, run_after=timezone.now() + timedelta(hours=1))
+
+        claimed = claim_jobs(10)
+
+        self.assertEqual([job.id for job in claimed], [due.id])
+        due.refresh_from_db()
+        self.assertEqual(due.status, Job.RUNNING)
+        self.assertEqual(due.attempts, 1)
+
+    @override_settings(JOBS_KIND_CONCURRENCY={'arweave_upload': 1, 'weaviate_index': 1})
+    def test_kind_concurrency_counts_running_jobs(self):
+        Job.objects.create(kind=Job.WEAVIATE_INDEX, artwork=self.artwork, status=Job.RUNNING, locked_at=timezone.now())
+        for _ in range(2):
+            artwork = Artwork.objects.create(artist=self.artist, picture_url="https://arweave.net/x")
+            enqueue_job(Job.WEAVIATE_INDEX, artwork=artwork)
+            enqueue_job(Job.ARWEAVE_UPLOAD, artwork=artwork)
+
+        claimed = claim_jobs(10)
+
+        self.assertEqual([job.kind for job in claimed], [Job.ARWEAVE_UPLOAD])
+
+    def test_stale_running_job_is_reclaimed(self):
+        stale = Job.objects.create(
+            kind=Job.WEAVIATE_INDEX, artwork=self.artwork, status=Job.RUNNING, attempts=1,
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+
+        claimed = claim_jobs(1)
+
+        self.assertEqual(claimed[0].id, stale.id)
+        self.assertEqual(claimed[0].attempts, 2)
+
+    def test_failed_job_is_retried_later_then_marked_failed(self):
+        enqueue_job(Job.WEAVIATE_INDEX, artwork=self.artwork)
+        Job.objects.update(max_attempts=2)
+
+        with patch('artists.jobs.add_image_to_weaviate', return_value=None), suppress_logger('artists.jobs'):
+            job = run_job(claim_jobs(1)[0])
+            self.assertEqual(job.status, Job.PENDING)
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertIn("Failed to add artwork", job.last_error)
+
+            Job.objects.update(run_after=timezone.now())
+            job = run_job(claim_jobs(1)[0])
+
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(Job.objects.get().attempts, 2)
+
+    def test_index_job_records_weaviate_id(self):
+        enqueue_job(Job.WEAVIATE_INDEX, artwork=self.artwork)
+
+        with patch('artists.jobs.add_image_to_weaviate', return_value=('uuid-1', 'hash-1')) as add:
+            self.assertEqual(work_off(), 1)
+
+        add.assert_called_once_with(self.artwork.id, self.artist.id, "https://arweave.net/test", metadata=None)
+        self.artwork.refresh_from_db()
+        self.assertEqual(self.artwork.picture_image_weaviate_id, 'uuid-1')
+        self.assertEqual(self.artwork.picture_image_hash, 'hash-1')
+        self.delete_replaced.assert_called_once_with(self.artwork.id, 'uuid-1')
+        self.assertIsNotNone(self.artwork.weaviate_indexed_at)
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
+
+    def test_upload_job_sets_url_removes_file_and_queues_indexing(self):
+        media_root = tempfile.mkdtemp()
+        with open(os.path.join(media_root, 'picture.png'), 'wb') as f:
+            f.write(b'png')
+        with self.settings(MEDIA_ROOT=media_root):
+            artwork = Artwork.objects.create(artist=self.artist, picture='picture.png')
+            enqueue_job(Job.ARWEAVE_UPLOAD, artwork=artwork)
+
+            with patch('artists.jobs.upload_to_arweave', return_value='https://arweave.net/new') as upload, \
+                    patch('artists.jobs.add_image_to_weaviate', return_value=('uuid-2', 'hash-2')):
+                self.assertEqual(work_off(), 2)
+
+        upload.assert_called_once_with(os.path.join(media_root, 'picture.png'))
+        self.assertFalse(os.path.exists(os.path.join(media_root, 'picture.png')))
+        artwork.refresh_from_db()
+        self.assertEqual(artwork.picture_url, 'https://arweave.net/new')
+        self.assertEqual(artwork.picture_image_weaviate_id, 'uuid-2')
+        self.delete_replaced.assert_called_once_with(artwork.id, 'uuid-2')
+
+    def test_known_image_is_linked_without_upload_job(self):
+        media_root = tempfile.mkdtemp()
+        with open(os.path.join(media_root, 'again.png'), 'wb') as f:
+            f.write(b'png')
+        ArweaveUpload.objects.create(
+            content_hash=hashlib.sha256(b'png').hexdigest(), url='https://arweave.net/known', size=3
+        )
+        with self.settings(MEDIA_ROOT=media_root):
+            artwork = Artwork.objects.create(artist=self.artist, picture='again.png')
+            self.assertIsNone(queue_image_upload(artwork))
+
+        artwork.refresh_from_db()
+        self.assertEqual(artwork.picture_url, 'https://arweave.net/known')
+        self.assertFalse(os.path.exists(os.path.join(media_root, 'again.png')))
+        self.assertEqual(list(Job.objects.values_list('kind', flat=True)), [Job.WEAVIATE_INDEX])
+
+    def test_new_image_queues_upload_job(self):
+        media_root = tempfile.mkdtemp()
+        with open(os.path.join(media_root, 'new.png'), 'wb') as f:
+            f.write(b'png')
+        with self.settings(MEDIA_ROOT=media_root):
+            job = queue_image_upload(Artwork.objects.create(artist=self.artist, picture='new.png'))
+
+        self.assertEqual(job.kind, Job.ARWEAVE_UPLOAD)
+
+    @override_settings(WEAVIATE_DENORMALIZED_METADATA=True)
+    def test_metadata_job_patches_the_indexed_artwork(self):
+        self.artwork.picture_image_weaviate_id = 'uuid-1'
+        self.artwork.title = "Dawn"
+        self.artwork.save()
+        not_indexed = Artwork.objects.create(artist=self.artist, picture_url="https://arweave.net/not-indexed")
+        enqueue_job(Job.WEAVIATE_METADATA, artwork=self.artwork)
+        enqueue_job(Job.WEAVIATE_METADATA, artwork=not_indexed)
+
+        with patch('artists.jobs.update_object_properties') as update:
+            self.assertEqual(work_off(), 2)
+
+        update.assert_called_once()
+        updates = update.call_args.args[0]
+        self.assertEqual(list(updates), ['uuid-1'])
+        self.assertEqual(updates['uuid-1']['title'], "Dawn")
+        self.assertNotIn('author_firstname', updates['uuid-1'])
+
+    def test_upload_job_without_file_fails_permanently(self):
+        artwork = Artwork.objects.create(artist=self.artist, picture='missing.png')
+        enqueue_job(Job.ARWEAVE_UPLOAD, artwork=artwork)
+
+        with suppress_logger('artists.jobs'):
+            work_off()
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 1)
+
+    def test_run_jobs_once_command(self):
+        enqueue_job(Job.WEAVIATE_INDEX, artwork=self.artwork)
+        out = StringIO()
+
+        with patch('artists.jobs.add_image_to_weaviate', return_value=('uuid-1', 'hash-1')):
+            call_command('run_jobs', '--once', stdout=out)
+
+        self.assertIn("Ran 1 job(s)", out.getvalue())
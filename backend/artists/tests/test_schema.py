@@ -0,0 +1,309 @@
+"""Tests for non-destructive Weaviate schema migrations and collection aliases."""
+import uuid
+from itertools import count
+from types import SimpleNamespace
+from django.test import TestCase, override_settings
+from unittest.mock import MagicMock, patch
+from weaviate.collections.classes.config import BQConfig, PQConfig
+
+from ..models import WeaviateAlias
+from ..weaviate.aliases import ARTWORKS, clear_alias_cache, resolve_collection, set_alias
+from ..weaviate.index_benchmark import exact_neighbours, synthetic_vectors
+from ..weaviate.schema import artworks_properties, diff_schema, migrate_schema
+from ..weaviate.vector_index import VectorIndexSpec, diff_vector_index, estimate_index_memory
+
+
+def live_config(properties, vectorizer='img2vec-neural', index_type='hnsw', quantizer=None, **index_params):
+    index_config = {'distance_metric': 'cosine', 'ef': -1, 'ef_construction': 128, 'max_connections': 32,
+                    'quantizer': quantizer, **index_params}
+    return SimpleNamespace(
+        properties=[SimpleNamespace(name=name, data_type=data_type) for name, data_type in properties],
+        vectorizer=vectorizer,
+        vector_index_type=index_type,
+        vector_index_config=SimpleNamespace(**index_config),
+    )
+
+
+BASE_PROPERTIES = [('artwork_psql_id', 'text'), ('author_psql_id', 'text'), ('image_hash', 'text'), ('image', 'blob')]
+
+
+def uid(i):
+    """A valid object uuid, ``Filter.by_id`` rejects anything else."""
+    return str(uuid.UUID(int=i))
+
+
+class SchemaDiffTests(TestCase):
+    def test_live_schema_is_in_sync(self):
+        self.assertTrue(diff_schema(live_config(BASE_PROPERTIES), artworks_properties(False)).in_sync)
+
+    def test_missing_properties_are_added(self):
+        diff = diff_schema(live_config(BASE_PROPERTIES), artworks_properties(True))
+
+        self.assertFalse(diff.incompatible)
+        self.assertIn('title', [spec.name for spec in diff.add_properties])
+
+    def test_type_and_vectorizer_changes_are_incompatible(self):
+        properties = [('artwork_psql_id', 'int'), *BASE_PROPERTIES[1:]]
+
+        diff = diff_schema(live_config(properties, vectorizer='none'), artworks_properties(False))
+
+        self.assertEqual(len(diff.incompatible), 2)
+        self.assertTrue(diff.vectorizer_changed)
+
+
+class VectorIndexDiffTests(TestCase):
+    def test_unset_parameters_are_not_enforced(self):
+        config = live_config(BASE_PROPERTIES, index_type='flat')
+
+        self.assertEqual(diff_vector_index(config, VectorIndexSpec()), ([], []))
+
+    def test_query_time_parameters_are_mutable(self):
+        mutable, immutable = diff_vector_index(live_config(BASE_PROPERTIES), VectorIndexSpec(ef=128))
+
+        self.assertEqual(mutable, ['ef is -1, wanted 128'])
+        self.assertEqual(immutable, [])
+
+    def test_build_parameters_and_bq_need_a_rebuild(self):
+        spec = VectorIndexSpec(max_connections=64, compression='bq')
+
+        mutable, immutable = diff_vector_index(live_config(BASE_PROPERTIES), spec)
+
+        self.assertEqual(mutable, [])
+        self.assertEqual(len(immutable), 2)
+
+    def test_pq_is_enabled_in_place(self):
+        mutable, _ = diff_vector_index(live_config(BASE_PROPERTIES), VectorIndexSpec(compression='pq'))
+
+        self.assertEqual(mutable, ['compression is none, wanted pq'])
+
+    def test_live_quantizer_is_recognised(self):
+        pq_config = live_config(BASE_PROPERTIES, quantizer=MagicMock(spec=PQConfig))
+        bq_config = live_config(BASE_PROPERTIES, quantizer=MagicMock(spec=BQConfig))
+
+        self.assertEqual(diff_vector_index(pq_config, VectorIndexSpec(compression='pq')), ([], []))
+        self.assertEqual(
+            diff_vector_index(bq_config, VectorIndexSpec(compression='pq')), ([], ['compression is bq, wanted pq'])
+        )
+
+    def test_flat_index_rejects_pq(self):
+        with self.assertRaises(ValueError):
+            VectorIndexSpec(index_type='flat', compression='pq')
+
+    def test_compression_shrinks_estimated_memory(self):
+        plain = estimate_index_memory(10000, 2048, VectorIndexSpec())
+        pq = estimate_index_memory(10000, 2048, VectorIndexSpec(compression='pq'))
+        bq = estimate_index_memory(10000, 2048, VectorIndexSpec(compression='bq'))
+
+        self.assertLess(bq, pq)
+        self.assertLess(pq, plain)
+
+
+class IndexBenchmarkTests(TestCase):
+    def test_synthetic_vectors_are_reproducible_unit_vectors(self):
+        vectors = synthetic_vectors(20, 8, clusters=3)
+
+        self.assertEqual(vectors, synthetic_vectors(20, 8, clusters=3))
+        self.assertAlmostEqual(sum(x * x for x in vectors[0]), 1.0)
+
+    def test_exact_neighbours_include_the_query_vector(self):
+        vectors = synthetic_vectors(50, 8, clusters=5)
+
+        neighbours = exact_neighbours(vectors, vectors[7], 5)
+
+        self.assertEqual(len(neighbours), 5)
+        self.assertIn(7, neighbours)
+
+
+class MigrateSchemaTests(TestCase):
+    def setUp(self):
+        clear_alias_cache()
+        self.addCleanup(clear_alias_cache)
+        self.collections = {}
+        self.client = MagicMock()
+        self.client.collections.exists.side_effect = lambda name: name in self.collections
+        self.client.collections.get.side_effect = lambda name: self.collections[name]
+        self.client.collections.create.side_effect = self._create
+        context = MagicMock()
+        context.__enter__.return_value = self.client
+        patch('artists.weaviate.schema.get_weaviate_client', return_value=context).start()
+        self.addCleanup(patch.stopall)
+
+    def _create(self, name, **kwargs):
+        self.collections[name] = self._collection(BASE_PROPERTIES)
+        return self.collections[name]
+
+    def _collection(self, properties, objects=()):
+        collection = MagicMock()
+        collection.config.get.return_value = live_config(properties)
+        collection.iterator.side_effect = lambda **kwargs: iter(list(objects))
+        collection.batch.failed_objects = []
+        return collection
+
+    def test_missing_collection_is_created(self):
+        report = migrate_schema(denormalized=False)
+
+        self.assertTrue(report.created)
+        self.assertIn(ARTWORKS, self.collections)
+        self.client.collections.delete.assert_not_called()
+
+    def test_new_properties_are_added_in_place(self):
+        live = self.collections[ARTWORKS] = self._collection(BASE_PROPERTIES)
+
+        report = migrate_schema(denormalized=True)
+
+        self.assertIn('title', report.added_properties)
+        self.assertEqual(live.config.add_property.call_count, len(report.added_properties))
+        self.client.collections.create.assert_not_called()
+        self.assertFalse(WeaviateAlias.objects.exists())
+
+    @override_settings(WEAVIATE_VECTOR_INDEX={'ef': '256'})
+    def test_mutable_index_parameters_are_updated_in_place(self):
+        live = self.collections[ARTWORKS] = self._collection(BASE_PROPERTIES)
+
+        report = migrate_schema(denormalized=False)
+
+        self.assertEqual(report.reconfigured, ['ef is -1, wanted 256'])
+        live.config.update.assert_called_once()
+        self.client.collections.create.assert_not_called()
+
+    @override_settings(WEAVIATE_VECTOR_INDEX={'compression': 'pq'})
+    def test_pq_waits_for_training_data(self):
+        live = self.collections[ARTWORKS] = self._collection(BASE_PROPERTIES)
+        live.aggregate.over_all.return_value.total_count = 50
+
+        report = migrate_schema(denormalized=False)
+
+        self.assertEqual(report.reconfigured, [])
+        self.assertEqual(len(report.deferred), 1)
+        live.config.update.assert_not_called()
+
+    def test_dry_run_changes_nothing(self):
+        live = self.collections[ARTWORKS] = self._collection(BASE_PROPERTIES)
+
+        report = migrate_schema(denormalized=True, dry_run=True)
+
+        self.assertTrue(report.added_properties)
+        live.config.add_property.assert_not_called()
+
+    def test_incompatible_change_is_rebuilt_behind_alias_with_vectors(self):
+        objects = [SimpleNamespace(uuid=uid(i), properties={'artwork_psql_id': str(i)},
+                                   vector={'default': [0.1, 0.2]}) for i in range(3)]
+        self.collections[ARTWORKS] = self._collection(
+            [('artwork_psql_id', 'int'), *BASE_PROPERTIES[1:]], objects
+        )
+
+        report = migrate_schema(denormalized=False, settle=0)
+
+        shadow = self.collections[report.rebuilt_into]
+        batch = shadow.batch.fixed_size.return_value.__enter__.return_value
+        # Every object is copied once, and again by the catch-up pass since the mock shadow stays empty
+        self.assertEqual(report.copied, 3)
+        self.assertEqual(batch.add_object.call_args.kwargs['vector'], [0.1, 0.2])
+        self.assertEqual(resolve_collection(), report.rebuilt_into)
+        self.client.collections.delete.assert_not_called()
+
+
+class StoredCollection:
+    """Collection holding its objects, each stamped with a last update time from a shared clock."""
+
+    def __init__(self, clock, properties=BASE_PROPERTIES):
+        self.clock = clock
+        self.objects = {}
+        self.config = MagicMock()
+        self.config.get.return_value = live_config(properties)
+        self.batch = MagicMock()
+        self.batch.failed_objects = []
+        self.batch.fixed_size.return_value.__enter__.return_value.add_object.side_effect = self.put
+        self.data = MagicMock()
+        self.data.delete_many.side_effect = lambda where: [self.objects.pop(u, None) for u in where.value]
+
+    def put(self, properties, uuid, vector=None):
+        self.objects[str(uuid)] = (properties, vector, next(self.clock))
+
+    def iterator(self, include_vector=False, return_metadata=None, return_properties=None):
+        for obj_uuid, (properties, vector, updated) in list(self.objects.items()):
+            yield SimpleNamespace(uuid=obj_uuid, properties=properties, vector={'default': vector},
+                                  metadata=SimpleNamespace(last_update_time=updated))
+
+
+class SchemaCatchUpTests(TestCase):
+    """What other processes write to the old collection while the alias switches is not lost."""
+
+    def setUp(self):
+        clear_alias_cache()
+        self.addCleanup(clear_alias_cache)
+        self.clock = count()
+        self.live = StoredCollection(self.clock, [('artwork_psql_id', 'int'), *BASE_PROPERTIES[1:]])
+        for i in range(4):
+            self.live.put({'artwork_psql_id': str(i)}, uid(i), [float(i)])
+        self.collections = {ARTWORKS: self.live}
+        client = MagicMock()
+        client.collections.exists.side_effect = lambda name: name in self.collections
+        client.collections.get.side_effect = lambda name: self.collections[name]
+        client.collections.create.side_effect = self._create
+        context = MagicMock()
+        context.__enter__.return_value = client
+        patch('artists.weaviate.schema.get_weaviate_client', return_value=context).start()
+        self.addCleanup(patch.stopall)
+
+    def _create(self, name, **kwargs):
+        self.collections[name] = StoredCollection(self.clock)
+        return self.collections[name]
+
+    def migrate_while(self, write):
+        """Run a rebuild, calling ``write(shadow)`` while it waits for other processes to settle."""
+        def settle(seconds):
+            write(self.collections[resolve_collection(cached=False)])
+        with patch('artists.weaviate.schema.time.sleep', side_effect=settle):
+            return migrate_schema(denormalized=False)
+
+    def test_updates_and_new_objects_are_copied_again(self):
+        def write(shadow):
+            self.live.put({'artwork_psql_id': '1', 'title': 'replaced'}, uid(1), [9.0])
+            self.live.put({'artwork_psql_id': '7'}, uid(7), [7.0])
+
+        report = self.migrate_while(write)
+
+        shadow = self.collections[report.rebuilt_into]
+        self.assertEqual(report.caught_up, 2)
+        self.assertEqual(shadow.objects[uid(1)][:2], ({'artwork_psql_id': '1', 'title': 'replaced'}, [9.0]))
+        self.assertIn(uid(7), shadow.objects)
+        self.assertEqual(len(shadow.objects), 5)
+
+    def test_deletes_are_applied_and_writes_to_the_new_collection_kept(self):
+        def write(shadow):
+            del self.live.objects[uid(2)]
+            # Processes that already switched write to and delete from the new collection
+            shadow.put({'artwork_psql_id': '8'}, uid(8), [8.0])
+            shadow.put({'artwork_psql_id': '0', 'title': 'newer'}, uid(0), [0.5])
+            del shadow.objects[uid(3)]
+
+        report = self.migrate_while(write)
+
+        shadow = self.collections[report.rebuilt_into]
+        self.assertEqual(report.deleted, 1)
+        self.assertEqual(report.caught_up, 0)
+        self.assertEqual(sorted(shadow.objects), [uid(0), uid(1), uid(8)])
+        self.assertEqual(shadow.objects[uid(0)][0]['title'], 'newer')
+
+
+class AliasTests(TestCase):
+    def setUp(self):
+        clear_alias_cache()
+        self.addCleanup(clear_alias_cache)
+
+    def test_defaults_to_logical_name(self):
+        self.assertEqual(resolve_collection(), ARTWORKS)
+
+    def test_switch_is_seen_after_cache_clear(self):
+        self.assertEqual(resolve_collection(), ARTWORKS)
+        WeaviateAlias.objects.create(name=ARTWORKS, collection='Artworks_2')
+
+        self.assertEqual(resolve_collection(), ARTWORKS)
+        self.assertEqual(resolve_collection(cached=False), 'Artworks_2')
+
+    def test_set_alias_updates_mapping(self):
+        set_alias(ARTWORKS, 'Artworks_3')
+
+        self.assertEqual(resolve_collection(), 'Artworks_3')
+        self.assertEqual(WeaviateAlias.objects.get().collection, 'Artworks_3')
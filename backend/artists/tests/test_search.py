@@ -1,11 +1,15 @@
 """Tests for search functionality."""
-from django.test import TestCase, Client
+from types import SimpleNamespace
+from django.db import transaction
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from unittest.mock import patch
 
+from ..cache import get_artists_cache, search_row_key
 from ..models import Artwork, Artist
-from .test_helpers import DummyImage
+from ..serializers import SearchArtistSerializer
+from .test_helpers import DummyImage, suppress_logger
 
 
 class SearchArtworksByImageURLTest(TestCase):
@@ -101,6 +105,7 @@ class N1QueryFixTestCase(TestCase):
     """Test that the N+1 query fix works correctly - should use only 2 queries regardless of result count"""
     
     def setUp(self):
+        get_artists_cache().clear()
         # Create multiple artists and artworks
         self.artists = []
         self.artworks = []
@@ -152,3 +157,134 @@ class N1QueryFixTestCase(TestCase):
         self.assertIsNone(body['error'])
         data = body['data']
         self.assertEqual(len(data), 10)
+
+    def test_repeated_search_is_hydrated_from_cache(self):
+        dummy_results = [DummyImage(a.id, a.artist_id) for a in self.artworks]
+        url = reverse('search_artworks_by_image_data')
+
+        with patch('artists.views.search_similar_artwork_ids_by_image_data', return_value=dummy_results):
+            first = Client().post(url, {'image': SimpleUploadedFile("a.jpg", b"img"), 'limit': 10})
+            with self.assertNumQueries(0):
+                second = Client().post(url, {'image': SimpleUploadedFile("a.jpg", b"img"), 'limit': 10})
+
+        self.assertEqual(first.json(), second.json())
+
+    def test_denormalized_artworks_are_answered_without_database(self):
+        hit = SimpleNamespace(properties={
+            'artwork_psql_id': str(self.artworks[0].id),
+            'author_psql_id': str(self.artists[0].id),
+            'title': "Stored title",
+            'picture_url': "https://arweave.net/stored",
+            'year': 1999,
+            'size_x': 10,
+            'size_y': 20,
+        })
+        legacy = DummyImage(self.artworks[1].id, self.artists[1].id)
+
+        with patch('artists.views.search_similar_artwork_ids_by_image_data', return_value=[hit]):
+            # The author row only
+            with self.assertNumQueries(1):
+                response = Client().post(reverse('search_artworks_by_image_data'),
+                                         {'image': SimpleUploadedFile("a.jpg", b"img")})
+        with patch('artists.views.search_similar_artwork_ids_by_image_data', return_value=[hit, legacy]):
+            mixed = Client().post(reverse('search_artworks_by_image_data'),
+                                  {'image': SimpleUploadedFile("a.jpg", b"img")})
+
+        row = response.json()['data'][0]
+        self.assertEqual(row['artwork'], {
+            'id': self.artworks[0].id, 'title': "Stored title", 'picture_url': "https://arweave.net/stored",
+            'year': 1999, 'sizeX': 10, 'sizeY': 20,
+        })
+        # Authors have the same full shape whether the artwork was denormalized or not
+        self.assertEqual(row['author'], dict(SearchArtistSerializer(self.artists[0]).data))
+        self.assertEqual(mixed.json()['data'][1]['author'].keys(), row['author'].keys())
+        self.assertEqual([r['artwork']['id'] for r in mixed.json()['data']], [self.artworks[0].id, self.artworks[1].id])
+
+    def test_weaviate_string_ids_are_hydrated(self):
+        dummy_results = [DummyImage(str(self.artworks[0].id), str(self.artists[0].id))]
+
+        with patch('artists.views.search_similar_artwork_ids_by_image_data', return_value=dummy_results):
+            response = Client().post(reverse('search_artworks_by_image_data'),
+                                     {'image': SimpleUploadedFile("a.jpg", b"img")})
+
+        self.assertEqual(response.json()['data'][0]['artwork']['id'], self.artworks[0].id)
+
+    def test_saved_rows_are_hydrated_again(self):
+        dummy_results = [DummyImage(self.artworks[0].id, self.artists[0].id)]
+        url = reverse('search_artworks_by_image_data')
+
+        with patch('artists.views.search_similar_artwork_ids_by_image_data', return_value=dummy_results):
+            Client().post(url, {'image': SimpleUploadedFile("a.jpg", b"img")})
+            with self.captureOnCommitCallbacks(execute=True):
+                self.artworks[0].title = "Renamed"
+                self.artworks[0].save()
+                self.artists[0].firstname = "Renamed"
+                self.artists[0].save()
+            with self.assertNumQueries(2):
+                response = Client().post(url, {'image': SimpleUploadedFile("a.jpg", b"img")})
+
+        row = response.json()['data'][0]
+        self.assertEqual(row['artwork']['title'], "Renamed")
+        self.assertEqual(row['author']['firstname'], "Renamed")
+
+    def test_rows_deleted_inside_a_transaction_are_forgotten(self):
+        artwork, artist = self.artworks[0], self.artists[0]
+        keys = [search_row_key('artwork', artwork.id), search_row_key('author', artist.id)]
+        get_artists_cache().set_many({key: {'id': 0} for key in keys})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                artwork.delete()
+                artist.delete()
+
+        self.assertEqual(get_artists_cache().get_many(keys), {})
+
+
+class CombinedSearchByImageDataTestCase(TestCase):
+    """Test the combined artworks + authors search endpoint."""
+
+    def setUp(self):
+        get_artists_cache().clear()
+        self.artists = []
+        self.artworks = []
+        for i in range(3):
+            artist = Artist.objects.create(firstname=f"First{i}", surname=f"Last{i}")
+            self.artists.append(artist)
+            self.artworks.append(Artwork.objects.create(
+                artist=artist,
+                title=f"Artwork {i}",
+                picture_url=f"https://example.com/art{i}.png",
+            ))
+
+    def test_returns_artworks_and_authors_with_single_hydration(self):
+        artwork_hits = [DummyImage(self.artworks[i].id, self.artists[i].id) for i in range(3)]
+        author_hits = SimpleNamespace(objects=[DummyImage(self.artworks[2].id, self.artists[2].id)])
+        file = SimpleUploadedFile("test.jpg", b"fake-image-bytes", content_type="image/jpeg")
+        url = reverse('search_by_image_data')
+
+        with patch('artists.views.search_similar_artworks_and_authors_by_image_data',
+                   return_value=(artwork_hits, author_hits)) as mock_search:
+            with self.assertNumQueries(2):
+                response = Client().post(url, {'image': file, 'artworks_limit': 3, 'authors_limit': 1})
+
+        mock_search.assert_called_once_with(b"fake-image-bytes", 3, 1)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual([r['artwork']['id'] for r in data['artworks']], [a.id for a in self.artworks])
+        self.assertEqual(len(data['authors']), 1)
+        self.assertEqual(data['authors'][0]['author']['id'], self.artists[2].id)
+
+    def test_missing_image_returns_400(self):
+        response = Client().post(reverse('search_by_image_data'), {})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+    @override_settings(IMAGE_INFERENCE_API='')
+    def test_invalid_image_returns_400(self):
+        with suppress_logger('root'):
+            response = Client().post(reverse('search_by_image_data'),
+                                     {'image': SimpleUploadedFile("a.jpg", b"not an image")})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "Invalid image data")
@@ -0,0 +1,252 @@
+"""Tests for the in-process image search and query embedding caches, and author grouping."""
+import base64
+from io import BytesIO
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from unittest.mock import MagicMock, patch
+
+from ..weaviate import (
+    LRUCache,
+    WeaviateConnectionError,
+    clear_embedding_cache,
+    clear_search_caches,
+    get_image_embedding,
+    search_similar_artwork_ids_by_image_data,
+    search_similar_authors_ids_by_image_data,
+    search_similar_artworks_and_authors_by_image_data,
+    search_similar_authors_by_weaviate_image_id,
+)
+from .test_helpers import make_image_bytes, suppress_logger
+
+
+IMAGE_BYTES = make_image_bytes()
+OTHER_IMAGE_BYTES = make_image_bytes(color=(0, 0, 255))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(max_entries=2, ttl=None)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = LRUCache(max_entries=10, ttl=60, clock=clock)
+        cache.set('a', 1)
+
+        clock.now = 59
+        self.assertEqual(cache.get('a'), 1)
+        clock.now = 60
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class SearchResultCacheTests(SimpleTestCase):
+    def setUp(self):
+        clear_search_caches()
+        self.collection = MagicMock()
+        hit = MagicMock(uuid='00000000-0000-0000-0000-000000000001',
+                        properties={'artwork_psql_id': 1, 'author_psql_id': 2})
+        hit.metadata.distance = 0.1
+        self.collection.query.near_image.return_value.objects = [hit]
+        client = MagicMock()
+        client.collections.get.return_value = self.collection
+        context = MagicMock()
+        context.__enter__.return_value = client
+        patcher = patch('artists.weaviate.queries.get_weaviate_client', return_value=context)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clear_search_caches)
+
+    def test_repeated_image_search_skips_weaviate(self):
+        first = search_similar_artwork_ids_by_image_data(IMAGE_BYTES, 5)
+        second = search_similar_artwork_ids_by_image_data(IMAGE_BYTES, 5)
+
+        self.assertEqual(self.collection.query.near_image.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second[0].properties['artwork_psql_id'], 1)
+        self.assertEqual(second[0].metadata.distance, 0.1)
+
+    def test_cache_key_includes_limit_kind_and_content(self):
+        search_similar_artwork_ids_by_image_data(IMAGE_BYTES, 5)
+        search_similar_artwork_ids_by_image_data(IMAGE_BYTES, 6)
+        search_similar_artwork_ids_by_image_data(OTHER_IMAGE_BYTES, 5)
+        search_similar_authors_ids_by_image_data(IMAGE_BYTES, 5)
+
+        self.assertEqual(self.collection.query.near_image.call_count, 4)
+
+    def test_near_image_receives_downscaled_image(self):
+        large = make_image_bytes(size=(1200, 600))
+
+        with self.settings(WEAVIATE_IMAGE_MAX_DIMENSION=300):
+            search_similar_artwork_ids_by_image_data(large, 5)
+
+        sent = base64.b64decode(self.collection.query.near_image.call_args.kwargs['near_image'])
+        with Image.open(BytesIO(sent)) as img:
+            self.assertEqual(img.size, (300, 150))
+
+    def test_grouped_author_result_keeps_objects_shape(self):
+        result = search_similar_authors_ids_by_image_data(IMAGE_BYTES, 2)
+        cached = search_similar_authors_ids_by_image_data(IMAGE_BYTES, 2)
+
+        self.assertEqual(cached.objects[0].properties['author_psql_id'], 2)
+        self.assertIs(result, cached)
+
+    def test_combined_search_sends_one_near_image(self):
+        artworks, authors = search_similar_artworks_and_authors_by_image_data(IMAGE_BYTES, 10, 2)
+
+        self.collection.query.near_image.assert_called_once()
+        call = self.collection.query.near_image.call_args
+        self.assertEqual(call.kwargs['limit'], 10)
+        self.assertNotIn('group_by', call.kwargs)
+        self.assertEqual([hit.properties['author_psql_id'] for hit in authors.objects], [2])
+        self.assertEqual(len(artworks), 1)
+
+        # Both results are cached for the single-kind searches too
+        search_similar_authors_ids_by_image_data(IMAGE_BYTES, 2)
+        search_similar_artwork_ids_by_image_data(IMAGE_BYTES, 10)
+        self.collection.query.near_image.assert_called_once()
+
+    def test_combined_search_groups_authors_when_candidates_run_short(self):
+        hits = []
+        for index in range(8):
+            hit = MagicMock(uuid=f'00000000-0000-0000-0000-{index:012d}',
+                            properties={'artwork_psql_id': index, 'author_psql_id': 7})
+            hit.metadata.distance = 0.1
+            hits.append(hit)
+        self.collection.query.near_image.return_value.objects = hits
+
+        search_similar_artworks_and_authors_by_image_data(IMAGE_BYTES, 2, 2)
+
+        calls = self.collection.query.near_image.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertIn('group_by', calls[1].kwargs)
+
+
+@override_settings(IMAGE_INFERENCE_API='http://i2v.test')
+class QueryEmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        clear_search_caches()
+        clear_embedding_cache()
+        self.addCleanup(clear_search_caches)
+        self.addCleanup(clear_embedding_cache)
+
+        self.collection = MagicMock()
+        hit = MagicMock(uuid='00000000-0000-0000-0000-000000000001',
+                        properties={'artwork_psql_id': 1, 'author_psql_id': 2})
+        self.collection.query.near_vector.return_value.objects = [hit]
+        client = MagicMock()
+        client.collections.get.return_value = self.collection
+        context = MagicMock()
+        context.__enter__.return_value = client
+        patcher = patch('artists.weaviate.queries.get_weaviate_client', return_value=context)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.session = MagicMock()
+        self.session.post.return_value.json.return_value = {'vector': [0.5, 0.25, 0.125]}
+        session_patcher = patch('artists.weaviate.vectorizer._get_session', return_value=self.session)
+        session_patcher.start()
+        self.addCleanup(session_patcher.stop)
+
+    def test_image_vectorized_once_for_artwork_and_author_search(self):
+        search_similar_artwork_ids_by_image_data(IMAGE_BYTES, 5)
+        search_similar_authors_ids_by_image_data(IMAGE_BYTES, 3)
+
+        self.assertEqual(self.session.post.call_count, 1)
+        self.assertEqual(self.collection.query.near_vector.call_count, 2)
+        self.collection.query.near_image.assert_not_called()
+        grouped_call = self.collection.query.near_vector.call_args_list[1]
+        self.assertEqual(grouped_call.kwargs['near_vector'], [0.5, 0.25, 0.125])
+        self.assertEqual(grouped_call.kwargs['group_by'].number_of_groups, 3)
+
+    def test_combined_search_vectorizes_once(self):
+        artworks, authors = search_similar_artworks_and_authors_by_image_data(IMAGE_BYTES, 4, 2)
+
+        self.assertEqual(self.session.post.call_count, 1)
+        self.assertEqual(artworks[0].properties['artwork_psql_id'], 1)
+        self.assertEqual(authors.objects[0].properties['author_psql_id'], 2)
+
+    def test_embedding_stored_as_float32(self):
+        vector = get_image_embedding(IMAGE_BYTES)
+
+        self.assertEqual(vector.typecode, 'f')
+        self.assertIs(get_image_embedding(IMAGE_BYTES), vector)
+
+    def test_inference_failure_raises_connection_error(self):
+        import requests
+        self.session.post.side_effect = requests.ConnectionError("refused")
+
+        with suppress_logger('artists.weaviate.vectorizer'), suppress_logger('artists.weaviate.queries'):
+            with self.assertRaises(WeaviateConnectionError):
+                search_similar_artwork_ids_by_image_data(IMAGE_BYTES, 5)
+
+
+def make_hit(index, author_id):
+    return MagicMock(uuid=f'00000000-0000-0000-0000-{index:012d}',
+                     properties={'artwork_psql_id': str(index), 'author_psql_id': str(author_id)})
+
+
+class SimilarAuthorsByObjectTests(SimpleTestCase):
+    """Client-side grouping used when ``near_object`` does not accept ``group_by``."""
+
+    def setUp(self):
+        self.candidates = []
+        self.collection = MagicMock()
+        self.collection.query.near_object.side_effect = self._near_object
+        client = MagicMock()
+        client.collections.get.return_value = self.collection
+        context = MagicMock()
+        context.__enter__.return_value = client
+        patcher = patch('artists.weaviate.queries.get_weaviate_client', return_value=context)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _near_object(self, near_object, group_by=None, limit=None, offset=0, **kwargs):
+        if group_by is not None:
+            raise TypeError('group_by is not supported')
+        return MagicMock(objects=self.candidates[offset:offset + limit])
+
+    def _ungrouped_calls(self):
+        return [c for c in self.collection.query.near_object.call_args_list if 'group_by' not in c.kwargs]
+
+    def test_one_query_when_candidates_cover_enough_authors(self):
+        self.candidates = [make_hit(i, i // 2) for i in range(40)]
+
+        authors = search_similar_authors_by_weaviate_image_id('uuid', limit=5)
+
+        self.assertEqual([hit.properties['author_psql_id'] for hit in authors], ['0', '1', '2', '3', '4'])
+        self.assertEqual(len(self._ungrouped_calls()), 1)
+        self.assertEqual(self._ungrouped_calls()[0].kwargs['limit'], 20)
+
+    def test_refetches_next_page_when_one_author_dominates(self):
+        self.candidates = [make_hit(i, 0) for i in range(30)] + [make_hit(30 + i, 1 + i) for i in range(10)]
+
+        authors = search_similar_authors_by_weaviate_image_id('uuid', limit=3)
+
+        self.assertEqual([hit.properties['author_psql_id'] for hit in authors], ['0', '1', '2'])
+        calls = self._ungrouped_calls()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[1].kwargs['offset'], 12)
+
+    def test_stops_when_collection_is_exhausted(self):
+        self.candidates = [make_hit(i, 0) for i in range(3)]
+
+        authors = search_similar_authors_by_weaviate_image_id('uuid', limit=5)
+
+        self.assertEqual(len(authors), 1)
+        self.assertEqual(len(self._ungrouped_calls()), 1)
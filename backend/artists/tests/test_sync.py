@@ -0,0 +1,162 @@
+"""Tests for the incremental Weaviate/Postgres sync."""
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest.mock import MagicMock, patch
+
+from ..models import Artist, Artwork
+from ..weaviate.service import ArtworkImage, artwork_object_uuid
+from ..weaviate.sync import plan_sync, sync_weaviate
+
+HASH = 'ab' * 32
+NEW_IMAGE = ArtworkImage(base64='aW1hZ2U=', content_hash='cd' * 32)
+
+
+class SyncWeaviateTests(TestCase):
+    def setUp(self):
+        self.artist = Artist.objects.create(firstname="Test", surname="Artist")
+        self.other_artist = Artist.objects.create(firstname="Other", surname="Artist")
+        self.objects = []
+
+        self.collection = MagicMock()
+        self.collection.iterator.side_effect = lambda **kwargs: iter(self.objects)
+        self.collection.query.fetch_objects.return_value.objects = []
+        self.collection.batch.failed_objects = []
+        self.batch = self.collection.batch.dynamic.return_value.__enter__.return_value
+        client = MagicMock()
+        client.collections.get.return_value = self.collection
+        context = MagicMock()
+        context.__enter__.return_value = client
+        patch('artists.weaviate.sync.get_weaviate_client', return_value=context).start()
+        patch('artists.weaviate.ingest.get_weaviate_client', return_value=context).start()
+        patch('artists.weaviate.service.get_weaviate_client', return_value=context).start()
+        self.fetch = patch('artists.weaviate.ingest.fetch_artwork_image', return_value=NEW_IMAGE).start()
+        self.addCleanup(patch.stopall)
+
+    def _indexed_artwork(self, artist=None, stored_author=None, image_hash=HASH, **fields):
+        artwork = Artwork.objects.create(artist=self.artist, picture_url="https://arweave.net/a", **fields)
+        obj_uuid = artwork_object_uuid(artwork.id, HASH)
+        self.objects.append(MagicMock(uuid=obj_uuid, properties={
+            'artwork_psql_id': str(artwork.id),
+            'author_psql_id': str((stored_author or self.artist).id),
+            'image_hash': image_hash,
+        }))
+        artwork.picture_image_weaviate_id = obj_uuid
+        if artist is not None:
+            artwork.artist = artist
+        artwork.save()
+        return artwork
+
+    def test_in_sync_artworks_are_left_alone(self):
+        self._indexed_artwork(picture_image_hash=HASH, weaviate_indexed_at=timezone.now())
+
+        report = sync_weaviate()
+
+        self.assertEqual(report.unchanged, 1)
+        self.assertIsNone(report.ingest)
+        self.fetch.assert_not_called()
+        self.collection.data.update.assert_not_called()
+        self.collection.data.delete_many.assert_not_called()
+
+    def test_missing_fingerprint_is_backfilled_without_download(self):
+        artwork = self._indexed_artwork()
+
+        report = sync_weaviate()
+
+        self.assertEqual(report.backfilled, 1)
+        self.fetch.assert_not_called()
+        artwork.refresh_from_db()
+        self.assertEqual(artwork.picture_image_hash, HASH)
+        self.assertIsNotNone(artwork.weaviate_indexed_at)
+
+    def test_changed_author_is_patched(self):
+        artwork = self._indexed_artwork(
+            artist=self.other_artist, picture_image_hash=HASH, weaviate_indexed_at=timezone.now()
+        )
+
+        report = sync_weaviate()
+
+        self.assertEqual(report.updated, 1)
+        self.collection.data.update.assert_called_once_with(
+            uuid=artwork.picture_image_weaviate_id, properties={'author_psql_id': str(self.other_artist.id)}
+        )
+        self.fetch.assert_not_called()
+
+    @override_settings(WEAVIATE_DENORMALIZED_METADATA=True)
+    def test_missing_or_stale_metadata_is_patched(self):
+        artwork = self._indexed_artwork(
+            picture_image_hash=HASH, weaviate_indexed_at=timezone.now(), title="Dawn", year=2001
+        )
+
+        report = sync_weaviate()
+
+        self.assertEqual(report.updated, 1)
+        properties = self.collection.data.update.call_args.kwargs['properties']
+        self.assertNotIn('author_psql_id', properties)
+        self.assertEqual(properties['title'], "Dawn")
+        self.assertEqual(properties['year'], 2001)
+        self.assertEqual(self.collection.iterator.call_args.kwargs['return_properties'][-1], 'size_y')
+        self.fetch.assert_not_called()
+
+        self.objects[0].properties.update(properties)
+        Artwork.objects.filter(id=artwork.id).update(title="Dusk")
+        self.collection.data.update.reset_mock()
+        sync_weaviate()
+        self.collection.data.update.assert_called_once_with(
+            uuid=artwork.picture_image_weaviate_id, properties={'title': "Dusk"}
+        )
+
+    def test_new_and_legacy_artworks_are_ingested_and_replaced_objects_deleted(self):
+        new = Artwork.objects.create(artist=self.artist, picture_url="https://arweave.net/new")
+        legacy = self._indexed_artwork(image_hash=None)
+        legacy_uuid = legacy.picture_image_weaviate_id
+
+        with patch('artists.weaviate.sync._delete_objects') as delete_objects:
+            report = sync_weaviate()
+
+        self.assertEqual(report.ingest.indexed, 2)
+        self.assertEqual(self.batch.add_object.call_count, 2)
+        new.refresh_from_db()
+        legacy.refresh_from_db()
+        self.assertEqual(new.picture_image_weaviate_id, artwork_object_uuid(new.id, NEW_IMAGE.content_hash))
+        self.assertEqual(legacy.picture_image_hash, NEW_IMAGE.content_hash)
+        self.assertEqual(report.deleted, 1)
+        self.assertEqual(delete_objects.call_args.args[0], {legacy_uuid})
+
+    def test_orphans_and_artworks_without_picture_are_cleaned_up(self):
+        removed = self._indexed_artwork(picture_image_hash=HASH)
+        Artwork.objects.filter(id=removed.id).update(picture_url='')
+        self.objects.append(MagicMock(uuid='00000000-0000-0000-0000-0000000000ff', properties={
+            'artwork_psql_id': '999999', 'author_psql_id': '1', 'image_hash': HASH,
+        }))
+
+        report = sync_weaviate()
+
+        self.assertEqual(report.unindexed, 1)
+        self.assertEqual(report.deleted, 2)
+        removed.refresh_from_db()
+        self.assertEqual(removed.picture_image_weaviate_id, '')
+        self.assertEqual(removed.picture_image_hash, '')
+
+    def test_dry_run_writes_nothing(self):
+        Artwork.objects.create(artist=self.artist, picture_url="https://arweave.net/new")
+        self._indexed_artwork()
+
+        plan = plan_sync()
+        report = sync_weaviate(dry_run=True)
+
+        self.assertEqual(len(plan.insert), 1)
+        self.assertEqual(report.to_insert, 1)
+        self.assertEqual(report.backfilled, 1)
+        self.fetch.assert_not_called()
+        self.assertFalse(Artwork.objects.exclude(picture_image_hash='').exists())
+
+    def test_management_command_reports_changes(self):
+        self._indexed_artwork(picture_image_hash=HASH, weaviate_indexed_at=timezone.now())
+        out = StringIO()
+
+        call_command('sync_weaviate', '--dry-run', stdout=out)
+
+        self.assertIn("Dry run", out.getvalue())
+        self.assertIn("1 unchanged", out.getvalue())
@@ -1,14 +1,18 @@
 """Tests for Weaviate connection and integration."""
 import logging
-from django.test import TestCase, Client
+from django.test import SimpleTestCase, TestCase, Client
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from ..models import Artwork, Artist
+from ..weaviate.service import ArtworkImage
 from .test_helpers import suppress_logger
 
 
+IMAGE = ArtworkImage(base64="aW1hZ2U=", content_hash="ab" * 32)
+
+
 class WeaviateConnectionFailureTests(TestCase):
     """Test Weaviate connection failure scenarios."""
     
@@ -50,7 +54,6 @@ class WeaviateConnectionFailureTests(TestCase):
     def test_weaviate_client_context_manager_handles_exception(self):
         """Test that get_weaviate_client context manager properly handles exceptions."""
         from ..weaviate.client import get_weaviate_client
-        import weaviate
         
         # Mock weaviate.connect_to_local to raise an exception
         with patch('artists.weaviate.client.weaviate.connect_to_local') as mock_connect:
@@ -79,9 +82,9 @@ class WeaviateConnectionFailureTests(TestCase):
         mock_context.__enter__.return_value = mock_client
         mock_context.__exit__.return_value = None
         
-        # Mock url_to_base64 to avoid actual image download
+        # Mock the image download
         with patch('artists.weaviate.service.get_weaviate_client', return_value=mock_context):
-            with patch('artists.weaviate.service.url_to_base64', return_value="base64string"):
+            with patch('artists.weaviate.service.fetch_artwork_image', return_value=IMAGE):
                 with patch('artists.weaviate.service.time.sleep'):  # Skip sleep delays
                     with suppress_logger('artists.weaviate.service', level=logging.CRITICAL):
                         # Should return None after all retries fail
@@ -91,3 +94,152 @@ class WeaviateConnectionFailureTests(TestCase):
                             arweave_image_url="https://arweave.net/test"
                         )
                         self.assertIsNone(result)
+
+
+class AddImageToWeaviateTests(SimpleTestCase):
+    """Test the upsert path used when artworks are saved in the admin."""
+
+    def setUp(self):
+        from ..weaviate import clear_ingest_timings
+        clear_ingest_timings()
+        self.collection = MagicMock()
+        self.collection.data.exists.return_value = False
+        client = MagicMock()
+        client.collections.get.return_value = self.collection
+        context = MagicMock()
+        context.__enter__.return_value = client
+        patch('artists.weaviate.service.get_weaviate_client', return_value=context).start()
+        patch('artists.weaviate.service.fetch_artwork_image', return_value=IMAGE).start()
+        self.sleep = patch('artists.weaviate.service.time.sleep').start()
+        self.addCleanup(patch.stopall)
+
+    def _add(self, **kwargs):
+        from ..weaviate.service import add_image_to_weaviate
+        return add_image_to_weaviate(1, 2, "https://arweave.net/test", **kwargs)
+
+    def test_new_object_is_inserted_without_sleeping(self):
+        self.collection.data.exists.side_effect = [False, True]
+
+        uuid, _ = self._add()
+
+        self.collection.data.insert.assert_called_once()
+        self.assertEqual(self.collection.data.insert.call_args.kwargs['uuid'], uuid)
+        self.collection.data.replace.assert_not_called()
+        self.collection.data.delete_by_id.assert_not_called()
+        self.sleep.assert_not_called()
+
+    def test_unchanged_image_is_patched_without_blob(self):
+        self.collection.data.exists.return_value = True
+
+        uuid, _ = self._add()
+
+        self.collection.data.update.assert_called_once()
+        self.assertEqual(self.collection.data.update.call_args.kwargs['uuid'], uuid)
+        self.assertNotIn('image', self.collection.data.update.call_args.kwargs['properties'])
+        self.collection.data.insert.assert_not_called()
+        self.collection.data.delete_by_id.assert_not_called()
+
+    def test_uuid_depends_on_artwork_and_image_content_only(self):
+        from ..weaviate import artwork_object_uuid
+        first, image_hash = self._add(verify=False)
+
+        self.assertEqual(first, artwork_object_uuid(1, image_hash))
+        self.assertEqual(image_hash, IMAGE.content_hash)
+        self.assertNotEqual(first, artwork_object_uuid(1, "cd" * 32))
+        self.assertNotEqual(first, artwork_object_uuid(3, IMAGE.content_hash))
+        self.assertEqual(self.collection.data.insert.call_args.kwargs['properties']['image_hash'], IMAGE.content_hash)
+
+    def test_replaced_objects_keep_only_the_current_image(self):
+        from ..weaviate.service import delete_replaced_artwork_objects
+        current, _ = self._add(verify=False)
+
+        delete_replaced_artwork_objects(1, current)
+
+        where = self.collection.data.delete_many.call_args.kwargs['where']
+        self.assertEqual([f.value for f in where.filters], ['1', current])
+
+    def test_verification_can_be_skipped(self):
+        self.assertIsNotNone(self._add(verify=False))
+        self.collection.data.exists.assert_called_once()
+
+    def test_retries_back_off_exponentially(self):
+        self.collection.data.insert.side_effect = Exception("unavailable")
+
+        with self.settings(WEAVIATE_INGEST_MAX_RETRIES=4, WEAVIATE_INGEST_BACKOFF_BASE=1, WEAVIATE_INGEST_BACKOFF_MAX=3):
+            with patch('artists.weaviate.service.random.uniform', side_effect=lambda low, high: high) as uniform:
+                with suppress_logger('artists.weaviate.service'):
+                    self.assertIsNone(self._add())
+
+        self.assertEqual([c.args for c in uniform.call_args_list], [(0, 1), (0, 2), (0, 3)])
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1, 2, 3])
+
+    def test_step_timings_are_recorded(self):
+        from ..weaviate import get_ingest_timings
+        self._add(verify=False)
+
+        timings = get_ingest_timings()
+
+        self.assertEqual(set(timings), {'fetch', 'upsert'})
+        self.assertEqual(timings['upsert']['count'], 1)
+        self.assertGreaterEqual(timings['fetch']['max'], 0)
+
+
+class WeaviateClientPoolTests(SimpleTestCase):
+    """Test the per-process Weaviate client pool."""
+
+    def _make_pool(self, **kwargs):
+        from ..weaviate.client import WeaviateClientPool
+        self.connect = MagicMock(side_effect=lambda: MagicMock())
+        kwargs.setdefault('size', 2)
+        kwargs.setdefault('timeout', 0.1)
+        return WeaviateClientPool(connect=self.connect, **kwargs)
+
+    def test_client_is_reused_between_borrows(self):
+        pool = self._make_pool()
+        with pool.client() as first:
+            pass
+        with pool.client() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(self.connect.call_count, 1)
+        first.close.assert_not_called()
+
+    def test_pool_size_bounds_concurrent_clients(self):
+        pool = self._make_pool(size=1)
+        client = pool.acquire()
+        with self.assertRaises(TimeoutError):
+            pool.acquire()
+        pool.release(client)
+        self.assertIs(pool.acquire(), client)
+
+    def test_unhealthy_idle_client_is_replaced(self):
+        pool = self._make_pool(healthcheck_interval=0)
+        with pool.client() as first:
+            first.is_ready.return_value = False
+        with pool.client() as second:
+            pass
+        self.assertIsNot(first, second)
+        first.close.assert_called_once()
+        self.assertEqual(self.connect.call_count, 2)
+
+    def test_client_discarded_after_connection_failure(self):
+        pool = self._make_pool()
+        with suppress_logger('artists.weaviate.client'):
+            with self.assertRaises(RuntimeError):
+                with pool.client() as first:
+                    first.is_ready.side_effect = Exception("connection reset")
+                    raise RuntimeError("query failed")
+        first.close.assert_called_once()
+        with pool.client() as second:
+            pass
+        self.assertIsNot(first, second)
+
+    def test_forked_process_does_not_reuse_parent_clients(self):
+        pool = self._make_pool()
+        with pool.client() as parent_client:
+            pass
+        with patch('artists.weaviate.client.os.getpid', return_value=pool._pid + 1):
+            with pool.client() as child_client:
+                pass
+        self.assertIsNot(parent_client, child_client)
+        parent_client.close.assert_not_called()
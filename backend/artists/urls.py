@@ -14,9 +14,11 @@ from . import views
 
 urlpatterns = [
     path('', artists_endpoint),
+    path('export/', views.export_artists_endpoint, name='export_artists'),
     path('upload-to-arweave/<int:pk>/', views.upload_to_arweave_view, name='upload_to_arweave'),
     path('search-artworks-by-image-url/', views.search_artworks_by_image_url, name='search_artworks_by_image_url'),
     path('search-artworks-by-image-data/', views.search_artworks_by_image_data, name='search_artworks_by_image_data'),
     path('search-authors-by-image-data/', views.search_authors_by_image_data, name='search_authors_by_image_data'),
     path('search-authors-by-image-url/', views.search_authors_by_image_url, name='search_authors_by_image_url'),
+    path('search-by-image-data/', views.search_by_image_data, name='search_by_image_data'),
 ]
@@ -1,24 +1,34 @@
 import logging
-import os
-from tempfile import NamedTemporaryFile
 
 from .serializers import ArtistSerializer, ArtworkSerializer, SearchArtistSerializer
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAdminUser
 from artists.arweave_storage import upload_to_arweave
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from .weaviate import (
     search_similar_artwork_ids_by_image_url,
     search_similar_artwork_ids_by_image_data,
     search_similar_authors_ids_by_image_data,
     search_similar_authors_ids_by_image_url,
+    search_similar_artworks_and_authors_by_image_data,
     WeaviateConnectionError,
     WeaviateImageError,
     WeaviateSecurityError,
 )
+from .weaviate.metadata import artwork_row_from_properties
 from .models import Artwork, Artist
 from .throttles import SearchAnonThrottle, SearchUserThrottle
 from .response import success, failure
+from .pagination import InvalidCursor, paginate_keyset
+from .export import EXPORT_FORMATS, iter_json, iter_ndjson
+from .cache import compute_etag, get_artists_cache, get_listing_state, get_search_rows, listing_cache_key
+
+ARTIST_LIST_DEFAULT_PAGE_SIZE = 50
+ARTIST_LIST_MAX_PAGE_SIZE = 200
+ARTIST_LIST_INCLUDES = {'artworks'}
 
 
 def get_validated_limit(data, key, default=2, min_val=1, max_val=100):
@@ -30,42 +40,164 @@ def get_validated_limit(data, key, default=2, min_val=1, max_val=100):
         return default
 
 
-def _build_image_search_response(images_list):
+def parse_csv_param(data, key):
+    """Split a comma separated query parameter into a list of non-empty values."""
+    raw = data.get(key) or ''
+    return [value.strip() for value in raw.split(',') if value.strip()]
+
+
+def _result_id(image, prop):
+    try:
+        return int(image.properties.get(prop))
+    except (TypeError, ValueError):
+        return None
+
+
+def _load_search_rows(kind, ids):
+    if kind == 'artwork':
+        return {a.id: dict(ArtworkSerializer(a).data) for a in Artwork.objects.filter(id__in=ids)}
+    return {a.id: dict(SearchArtistSerializer(a).data) for a in Artist.objects.filter(id__in=ids)}
+
+
+def _hydrate_search_results(*images_lists):
+    """
+    Serialized Artwork and Artist rows referenced by any of the result lists.
+
+    Artworks of hits carrying denormalized metadata are skipped. The rows
+    come from the search row cache in one round-trip; only misses hit the
+    database, with at most one query per model.
+    """
+    artwork_ids = set()
+    author_ids = set()
+    for images_list in images_lists:
+        for img in images_list:
+            artwork_id = _result_id(img, 'artwork_psql_id')
+            author_id = _result_id(img, 'author_psql_id')
+            # Artworks with denormalized metadata are answered from the hit itself
+            if artwork_id is not None and not artwork_row_from_properties(img.properties):
+                artwork_ids.add(artwork_id)
+            if author_id is not None:
+                author_ids.add(author_id)
+
+    if not artwork_ids and not author_ids:
+        return {}, {}
+    rows = get_search_rows({'artwork': artwork_ids, 'author': author_ids}, _load_search_rows)
+    return rows['artwork'], rows['author']
+
+
+def _build_image_search_response(images_list, hydrated=None):
     if not images_list:
         return []
 
-    artwork_ids = [img.properties.get('artwork_psql_id') for img in images_list if img.properties.get('artwork_psql_id')]
-    author_ids = [img.properties.get('author_psql_id') for img in images_list if img.properties.get('author_psql_id')]
-    artworks = {a.id: a for a in Artwork.objects.filter(id__in=artwork_ids)}
-    authors = {a.id: a for a in Artist.objects.filter(id__in=author_ids)}
+    artworks, authors = hydrated or _hydrate_search_results(images_list)
 
     response_data = []
     for image in images_list:
-        artwork_id = image.properties.get('artwork_psql_id')
-        author_id = image.properties.get('author_psql_id')
-        
-        if artwork_id is None or author_id is None:
-            continue
-            
-        artwork = artworks.get(artwork_id)
-        author = authors.get(author_id)
+        artwork = artwork_row_from_properties(image.properties) or artworks.get(_result_id(image, 'artwork_psql_id'))
+        author = authors.get(_result_id(image, 'author_psql_id'))
 
         if artwork and author:
             response_data.append({
-                'artwork': ArtworkSerializer(artwork).data,
-                'author': SearchArtistSerializer(author).data,
+                'artwork': artwork,
+                'author': author,
             })
 
     return response_data
 
 
+def _build_artists_listing(selected_fields, page_size=None, cursor=None):
+    """Serialize the artists listing; ``page_size=None`` returns the unpaginated list."""
+    queryset = Artist.objects.all()
+    if selected_fields is None or 'artworks' in selected_fields:
+        queryset = queryset.prefetch_related('artwork_set')
+
+    if page_size is None:
+        return ArtistSerializer(queryset, many=True, fields=selected_fields).data
+
+    artists, next_cursor = paginate_keyset(queryset, Artist._meta.ordering, page_size, cursor=cursor)
+    serializer = ArtistSerializer(artists, many=True, fields=selected_fields)
+    return {'results': serializer.data, 'next_cursor': next_cursor}
+
+
 # Public endpoint - anyone can browse artists
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def artists_endpoint(request):
-    models = Artist.objects.all()
-    serializer = ArtistSerializer(models, many=True)
-    return success(serializer.data)
+    """
+    List artists.
+
+    Without pagination parameters the whole registry is returned as a list.
+    Passing ``page_size`` and/or ``cursor`` switches to keyset pagination and
+    returns ``{"results": [...], "next_cursor": ...}``. ``fields`` limits the
+    serialized fields; nested relations are then only added via ``include``.
+
+    Payloads are cached per listing version (bumped on every Artist/Artwork
+    save or delete) and served with ETag/Last-Modified, answering 304 to
+    matching conditional requests.
+    """
+    fields = parse_csv_param(request.GET, 'fields')
+    include = parse_csv_param(request.GET, 'include')
+
+    unknown_includes = set(include) - ARTIST_LIST_INCLUDES
+    if unknown_includes:
+        return failure(f"Unknown include: {', '.join(sorted(unknown_includes))}", status=400)
+    unknown_fields = set(fields) - set(ArtistSerializer.Meta.fields)
+    if unknown_fields:
+        return failure(f"Unknown fields: {', '.join(sorted(unknown_fields))}", status=400)
+
+    selected_fields = None
+    if fields:
+        selected_fields = fields + [name for name in include if name not in fields]
+
+    page_size = None
+    cursor = request.GET.get('cursor')
+    if cursor is not None or 'page_size' in request.GET:
+        page_size = get_validated_limit(
+            request.GET, 'page_size', default=ARTIST_LIST_DEFAULT_PAGE_SIZE, max_val=ARTIST_LIST_MAX_PAGE_SIZE
+        )
+
+    state = get_listing_state()
+    cache = get_artists_cache()
+    cache_key = listing_cache_key(state['version'], [selected_fields, page_size, cursor])
+    cached = cache.get(cache_key)
+    if cached is None:
+        try:
+            data = _build_artists_listing(selected_fields, page_size, cursor)
+        except InvalidCursor:
+            return failure('Invalid cursor', status=400)
+        cached = {'data': data, 'etag': compute_etag(data)}
+        cache.set(cache_key, cached)
+
+    not_modified = get_conditional_response(
+        request, etag=cached['etag'], last_modified=state['last_modified']
+    )
+    if not_modified is not None:
+        return not_modified
+
+    response = success(cached['data'])
+    response['ETag'] = cached['etag']
+    response['Last-Modified'] = http_date(state['last_modified'])
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+# Public endpoint - full registry export for sync jobs, streamed in batches
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def export_artists_endpoint(request):
+    """
+    Stream every artist with its artworks.
+
+    ``?output=json`` (default) streams the standard envelope with all artists
+    in ``data``; ``?output=ndjson`` streams one artist object per line.
+    """
+    output = request.GET.get('output', 'json')
+    if output not in EXPORT_FORMATS:
+        return failure(f"output must be one of: {', '.join(EXPORT_FORMATS)}", status=400)
+
+    if output == 'ndjson':
+        return StreamingHttpResponse(iter_ndjson(), content_type='application/x-ndjson')
+    return StreamingHttpResponse(iter_json(), content_type='application/json')
 
 
 # Protected endpoint - only admin users can upload to Arweave
@@ -83,24 +215,13 @@ def upload_to_arweave_view(request, pk):
     if file.content_type and not file.content_type.startswith('image/'):
         return failure('Only image uploads are allowed', status=400)
 
-    temp_path = None
     try:
-        if hasattr(file, 'temporary_file_path'):
-            temp_path = file.temporary_file_path()
-        else:
-            with NamedTemporaryFile(delete=False, suffix='.upload') as tmp:
-                for chunk in file.chunks():
-                    tmp.write(chunk)
-                temp_path = tmp.name
-
-        arweave_url = upload_to_arweave(temp_path)
+        # Read from Django's temporary file if it spooled the upload to disk, otherwise from memory
+        arweave_url = upload_to_arweave(file)
         return success({'url': arweave_url})
     except Exception as exc:
         logging.exception("Arweave upload failed")
         return failure('Upload failed', status=500)
-    finally:
-        if temp_path and not hasattr(file, 'temporary_file_path') and os.path.exists(temp_path):
-            os.remove(temp_path)
 
 
 # Public endpoint - anyone can search by image (rate limited)
@@ -152,6 +273,40 @@ def search_authors_by_image_url(request):
         return failure(str(e), status=400)
 
 
+# Public endpoint - anyone can search artworks and authors with one image (rate limited)
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([SearchAnonThrottle, SearchUserThrottle])
+def search_by_image_data(request):
+    """Return similar artworks and similar authors for one uploaded image."""
+    image_file = request.FILES.get('image')
+    artworks_limit = get_validated_limit(request.data, 'artworks_limit', default=10)
+    authors_limit = get_validated_limit(request.data, 'authors_limit', default=2)
+
+    if not image_file:
+        return failure('Image data not provided', status=400)
+
+    try:
+        image_data_bytes = image_file.read()
+
+        similar_artworks, similar_authors = search_similar_artworks_and_authors_by_image_data(
+            image_data_bytes, artworks_limit, authors_limit
+        )
+        artworks_list = list(similar_artworks)
+        authors_list = list(similar_authors.objects)
+        hydrated = _hydrate_search_results(artworks_list, authors_list)
+        return success({
+            'artworks': _build_image_search_response(artworks_list, hydrated),
+            'authors': _build_image_search_response(authors_list, hydrated),
+        })
+    except WeaviateConnectionError as e:
+        logging.exception("Weaviate connection error in search_by_image_data")
+        return failure('Search service is temporarily unavailable', status=503)
+    except (WeaviateImageError, WeaviateSecurityError) as e:
+        logging.exception("Image or security error in search_by_image_data")
+        return failure(str(e), status=400)
+
+
 # Public endpoint - anyone can search artworks by image (rate limited)
 @api_view(['POST'])
 @permission_classes([AllowAny])
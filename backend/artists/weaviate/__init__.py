@@ -5,17 +5,29 @@ This module provides functionality for:
 - Image processing and security validation
 - Adding images to Weaviate
 - Querying similar images and authors
+- Caching search results by image content hash
+- Timing ingest steps
 """
 
 # Client connection
-from .client import get_weaviate_client, PinnedDNSAdapter
+from .client import (
+    get_weaviate_client,
+    get_weaviate_client_pool,
+    close_weaviate_clients,
+    WeaviateClientPool,
+    PinnedDNSAdapter,
+)
 
 # Business logic / Service layer
 from .service import (
     add_image_to_weaviate,
     url_to_base64,
+    url_to_image_bytes,
     is_safe_url,
     resize_image_if_needed,
+    resize_image_bytes_if_needed,
+    normalize_image_bytes,
+    artwork_object_uuid,
 )
 
 # Query functions
@@ -25,14 +37,39 @@ from .queries import (
     search_similar_authors_ids_by_image_url,
     search_similar_artwork_ids_by_image_url,
     search_similar_artwork_ids_by_image_data,
+    search_similar_artworks_and_authors_by_image_data,
     search_similar_images_by_weaviate_image_id,
     search_similar_authors_by_weaviate_image_id,
     search_similar_images_by_vector,
+    search_similar_authors_by_vector,
     read_all_artworks,
     get_image_by_weaviate_id,
     remove_by_weaviate_id,
 )
 
+# Search caches
+from .cache import (
+    LRUCache,
+    SearchHit,
+    GroupedSearchResult,
+    image_content_hash,
+    get_search_result_cache,
+    clear_search_caches,
+)
+
+# Query embeddings
+from .vectorizer import (
+    get_image_embedding,
+    image_vectorizer_enabled,
+    clear_embedding_cache,
+)
+
+# Ingest step timings
+from .metrics import (
+    get_ingest_timings,
+    clear_ingest_timings,
+)
+
 # Exceptions
 from .exceptions import (
     WeaviateException,
@@ -44,24 +81,47 @@ from .exceptions import (
 __all__ = [
     # Client
     'get_weaviate_client',
+    'get_weaviate_client_pool',
+    'close_weaviate_clients',
+    'WeaviateClientPool',
     'PinnedDNSAdapter',
     # Service
     'add_image_to_weaviate',
     'url_to_base64',
+    'url_to_image_bytes',
     'is_safe_url',
     'resize_image_if_needed',
+    'resize_image_bytes_if_needed',
+    'normalize_image_bytes',
+    'artwork_object_uuid',
     # Queries
     'search_similar_authors_ids_by_base64',
     'search_similar_authors_ids_by_image_data',
     'search_similar_authors_ids_by_image_url',
     'search_similar_artwork_ids_by_image_url',
     'search_similar_artwork_ids_by_image_data',
+    'search_similar_artworks_and_authors_by_image_data',
     'search_similar_images_by_weaviate_image_id',
     'search_similar_authors_by_weaviate_image_id',
     'search_similar_images_by_vector',
+    'search_similar_authors_by_vector',
     'read_all_artworks',
     'get_image_by_weaviate_id',
     'remove_by_weaviate_id',
+    # Search caches
+    'LRUCache',
+    'SearchHit',
+    'GroupedSearchResult',
+    'image_content_hash',
+    'get_search_result_cache',
+    'clear_search_caches',
+    # Query embeddings
+    'get_image_embedding',
+    'image_vectorizer_enabled',
+    'clear_embedding_cache',
+    # Ingest step timings
+    'get_ingest_timings',
+    'clear_ingest_timings',
     # Exceptions
     'WeaviateException',
     'WeaviateConnectionError',
@@ -0,0 +1,72 @@
+"""
+Collection aliases for Weaviate.
+
+The Weaviate server in use has no native aliases, so the physical
+collection behind the logical ``Artworks`` name is recorded in Postgres
+(``WeaviateAlias``). Switching it is a single row update; every process
+re-reads the mapping after ``WEAVIATE_ALIAS_TTL`` seconds, so readers move
+to a rebuilt collection without a restart. Without a row the collection is
+simply called ``Artworks``.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import ProgrammingError
+
+from artists.models import WeaviateAlias
+
+logger = logging.getLogger(__name__)
+
+ARTWORKS = "Artworks"
+
+_resolved = {}
+_lock = threading.Lock()
+
+
+def alias_ttl():
+    return getattr(settings, 'WEAVIATE_ALIAS_TTL', 30.0)
+
+
+def resolve_collection(alias=ARTWORKS, cached=True):
+    """
+    Name of the collection currently serving ``alias``.
+
+    Cached per process for ``WEAVIATE_ALIAS_TTL`` seconds. Before the
+    ``WeaviateAlias`` table is migrated the logical name is used; other
+    database errors propagate.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _resolved.get(alias)
+    if cached and entry is not None and entry[0] > now:
+        return entry[1]
+
+    try:
+        collection = WeaviateAlias.objects.values_list('collection', flat=True).get(name=alias)
+    except WeaviateAlias.DoesNotExist:
+        collection = alias
+    except ProgrammingError as e:
+        # e.g. ``migrate`` itself, before the table exists
+        collection = alias
+        logger.warning(f"Could not read Weaviate alias {alias}, using {collection}: {e}")
+    with _lock:
+        _resolved[alias] = (now + alias_ttl(), collection)
+    return collection
+
+
+def set_alias(alias, collection):
+    """Point ``alias`` at ``collection`` (other processes follow within the TTL)."""
+    WeaviateAlias.objects.update_or_create(name=alias, defaults={'collection': collection})
+    clear_alias_cache()
+
+
+def clear_alias_cache():
+    with _lock:
+        _resolved.clear()
+
+
+def artworks_collection(weaviate_client):
+    """The collection currently serving ``Artworks``."""
+    return weaviate_client.collections.get(resolve_collection(ARTWORKS))
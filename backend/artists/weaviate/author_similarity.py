@@ -0,0 +1,308 @@
+"""
+Author similarity graph from per-author centroid vectors.
+
+Every author with indexed artworks gets one object in the ``Authors``
+collection whose vector is the centroid of their artwork vectors: the
+normalized mean, or the medoid (the artwork vector closest to all the
+others, robust to a single outlier work). ``similar_authors_postgres_ids``
+is then the nearest authors to that centroid, found with one
+``near_vector`` query per author, run concurrently over the client pool.
+No image is downloaded or vectorized again: the artwork vectors are read
+from the Artworks collection.
+
+Updates are incremental. An author's ``similarity_fingerprint`` hashes the
+artwork objects (content-derived uuids) and the method the centroid was
+computed from, so only authors whose artworks were added, removed or
+replaced get a new centroid. The neighbour lists re-queried are theirs,
+those that point to them and those of their new neighbours; ``full=True``
+re-queries every author.
+
+The vectors are averaged here rather than with the ``ref2vec-centroid``
+module so the medoid is available and the Authors objects do not hold
+references into a collection that ``migrate_schema()`` may rebuild.
+"""
+import hashlib
+import logging
+import math
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+import weaviate.classes as wvc
+from django.conf import settings
+from django.db import transaction
+from weaviate.classes.query import Filter
+from weaviate.util import generate_uuid5
+
+from artists.cache import invalidate_artists_listing, invalidate_search_rows
+from artists.models import Artist, Artwork
+
+from .aliases import artworks_collection
+from .client import get_weaviate_client
+
+logger = logging.getLogger(__name__)
+
+AUTHORS = "Authors"
+CENTROID_METHODS = ("mean", "medoid")
+SIMILAR_AUTHORS_LIMIT = 10
+QUERY_WORKERS = 4
+FETCH_CHUNK_SIZE = 100
+
+
+@dataclass
+class AuthorSimilarityReport:
+    """Counters of an author similarity update."""
+    authors: int = 0
+    recomputed: int = 0
+    removed: int = 0
+    updated: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self):
+        return (
+            f"{self.recomputed}/{self.authors} author centroids recomputed, {self.removed} removed, "
+            f"{self.updated} neighbour lists updated in {self.elapsed:.1f}s"
+        )
+
+
+def centroid_method():
+    method = getattr(settings, 'AUTHOR_CENTROID_METHOD', 'mean')
+    if method not in CENTROID_METHODS:
+        raise ValueError(f"Unknown author centroid method {method!r}, expected one of {CENTROID_METHODS}")
+    return method
+
+
+def author_object_uuid(author_psql_id):
+    return str(generate_uuid5(str(author_psql_id), AUTHORS))
+
+
+def author_fingerprint(artwork_object_ids, method):
+    """Fingerprint of a centroid; empty for authors without indexed artworks."""
+    if not artwork_object_ids:
+        return ''
+    return hashlib.sha256(f"{method}:{','.join(sorted(artwork_object_ids))}".encode()).hexdigest()
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _cosine_distance(a, b):
+    return 1.0 - sum(x * y for x, y in zip(a, b))
+
+
+def mean_centroid(vectors):
+    """Normalized mean of ``vectors``."""
+    vectors = [_normalize(vector) for vector in vectors]
+    return _normalize([sum(values) / len(vectors) for values in zip(*vectors)])
+
+
+def medoid(vectors):
+    """The vector of ``vectors`` with the smallest total cosine distance to the others."""
+    vectors = [_normalize(vector) for vector in vectors]
+    return min(vectors, key=lambda candidate: sum(_cosine_distance(candidate, other) for other in vectors))
+
+
+def centroid(vectors, method):
+    return medoid(vectors) if method == "medoid" else mean_centroid(vectors)
+
+
+def authors_collection(weaviate_client):
+    """The Authors collection, created on first use; its vectors are supplied, never vectorized."""
+    if not weaviate_client.collections.exists(AUTHORS):
+        return weaviate_client.collections.create(
+            name=AUTHORS,
+            properties=[
+                wvc.config.Property(name="author_psql_id", data_type=wvc.config.DataType.TEXT,
+                                    description="id of the author in posgresql"),
+                wvc.config.Property(name="artwork_count", data_type=wvc.config.DataType.INT,
+                                    description="artworks the centroid was computed from"),
+            ],
+            vectorizer_config=wvc.config.Configure.Vectorizer.none(),
+            vector_index_config=wvc.config.Configure.VectorIndex.hnsw(
+                distance_metric=wvc.config.VectorDistances.COSINE,
+            ),
+        )
+    return weaviate_client.collections.get(AUTHORS)
+
+
+def _chunks(items, size=FETCH_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _fetch_vectors(collection, uuids):
+    """``{uuid: vector}`` of the objects of ``collection`` with these ids."""
+    vectors = {}
+    for chunk in _chunks(uuids):
+        response = collection.query.fetch_objects(
+            filters=Filter.by_id().contains_any(chunk),
+            limit=len(chunk),
+            include_vector=True,
+            return_properties=[],
+        )
+        for obj in response.objects:
+            vector = (obj.vector or {}).get('default')
+            if vector:
+                vectors[str(obj.uuid)] = vector
+    return vectors
+
+
+def fetch_artwork_vectors(uuids):
+    with get_weaviate_client() as weaviate_client:
+        return _fetch_vectors(artworks_collection(weaviate_client), uuids)
+
+
+def fetch_author_centroids(author_ids):
+    """``{author_id: centroid}`` of the authors stored in the Authors collection."""
+    by_uuid = {author_object_uuid(author_id): author_id for author_id in author_ids}
+    with get_weaviate_client() as weaviate_client:
+        vectors = _fetch_vectors(authors_collection(weaviate_client), by_uuid)
+    return {by_uuid[obj_uuid]: vector for obj_uuid, vector in vectors.items()}
+
+
+def store_author_centroids(centroids, counts):
+    """Upsert the ``{author_id: centroid}`` objects; returns the ids Weaviate rejected."""
+    with get_weaviate_client() as weaviate_client:
+        collection = authors_collection(weaviate_client)
+        with collection.batch.fixed_size(batch_size=FETCH_CHUNK_SIZE) as batch:
+            for author_id, vector in centroids.items():
+                batch.add_object(
+                    properties={"author_psql_id": str(author_id), "artwork_count": counts[author_id]},
+                    uuid=author_object_uuid(author_id),
+                    vector=vector,
+                )
+        return {int(failed.object_.properties["author_psql_id"]) for failed in collection.batch.failed_objects}
+
+
+def delete_author_centroids(author_ids):
+    with get_weaviate_client() as weaviate_client:
+        collection = authors_collection(weaviate_client)
+        for chunk in _chunks(author_object_uuid(author_id) for author_id in author_ids):
+            collection.data.delete_many(where=Filter.by_id().contains_any(chunk))
+
+
+def nearest_authors(author_id, vector, limit):
+    """Ids (as strings) of the ``limit`` authors closest to ``vector``, other than ``author_id``."""
+    with get_weaviate_client() as weaviate_client:
+        response = authors_collection(weaviate_client).query.near_vector(
+            near_vector=vector,
+            limit=limit + 1,
+            return_properties=["author_psql_id"],
+        )
+    similar = [obj.properties["author_psql_id"] for obj in response.objects]
+    return [similar_id for similar_id in similar if similar_id != str(author_id)][:limit]
+
+
+def _artwork_objects_by_author():
+    objects = defaultdict(list)
+    rows = (
+        Artwork.objects.exclude(picture_image_weaviate_id='')
+        .exclude(picture_url__isnull=True).exclude(picture_url='')
+        .values_list('artist_id', 'picture_image_weaviate_id')
+    )
+    for artist_id, obj_uuid in rows.iterator(chunk_size=2000):
+        objects[artist_id].append(obj_uuid)
+    return objects
+
+
+def _recompute_centroids(artists, objects, method):
+    """Centroids of ``artists`` from their artwork vectors; returns ``{artist_id: centroid}``."""
+    vectors = fetch_artwork_vectors(uuid for artist in artists for uuid in objects[artist.id])
+    centroids, counts = {}, {}
+    for artist in artists:
+        artwork_vectors = [vectors[uuid] for uuid in objects[artist.id] if uuid in vectors]
+        if artwork_vectors:
+            centroids[artist.id] = centroid(artwork_vectors, method)
+            counts[artist.id] = len(artwork_vectors)
+    rejected = store_author_centroids(centroids, counts) if centroids else set()
+    for author_id in rejected:
+        logger.warning(f"Weaviate rejected the centroid of author {author_id}")
+        del centroids[author_id]
+    return centroids
+
+
+def _requery(author_ids, centroids, limit, workers):
+    """New neighbour lists ``{author_id: [similar ids]}``; centroids not given are read from Weaviate."""
+    missing = [author_id for author_id in author_ids if author_id not in centroids]
+    vectors = {**fetch_author_centroids(missing), **{a: centroids[a] for a in author_ids if a in centroids}}
+    queried = [author_id for author_id in author_ids if author_id in vectors]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = executor.map(lambda author_id: nearest_authors(author_id, vectors[author_id], limit), queried)
+        return dict(zip(queried, results))
+
+
+def update_author_similarity(full=False, limit=SIMILAR_AUTHORS_LIMIT, workers=QUERY_WORKERS):
+    """
+    Recompute the centroids of authors whose artworks changed and refresh
+    the affected ``similar_authors_postgres_ids``. Returns a report.
+    """
+    started = time.monotonic()
+    method = centroid_method()
+    objects = _artwork_objects_by_author()
+    artists = list(Artist.objects.only('id', 'similarity_fingerprint', 'similar_authors_postgres_ids'))
+    report = AuthorSimilarityReport(authors=sum(1 for artist in artists if objects.get(artist.id)))
+
+    changed, removed = [], []
+    for artist in artists:
+        fingerprint = author_fingerprint(objects.get(artist.id), method)
+        if fingerprint != artist.similarity_fingerprint:
+            (changed if fingerprint else removed).append(artist)
+            artist.similarity_fingerprint = fingerprint
+
+    centroids = _recompute_centroids(changed, objects, method) if changed else {}
+    # Authors whose artworks have no vector yet are retried on the next run
+    for artist in changed:
+        if artist.id not in centroids:
+            artist.similarity_fingerprint = ''
+    if removed:
+        delete_author_centroids([artist.id for artist in removed])
+    report.recomputed, report.removed = len(centroids), len(removed)
+
+    by_id = {artist.id: artist for artist in artists}
+    moved = {str(author_id) for author_id in [*centroids, *(artist.id for artist in removed)]}
+    if full:
+        to_query = [artist_id for artist_id in by_id if objects.get(artist_id)]
+    else:
+        to_query = list(centroids) + [
+            artist.id for artist in artists
+            if artist.id not in centroids and moved.intersection(artist.similar_authors_postgres_ids)
+        ]
+    neighbours = _requery(to_query, centroids, limit, workers) if to_query else {}
+    if not full:
+        # A moved author may now belong to the lists of its new neighbours
+        new_neighbours = {
+            int(similar_id) for author_id in centroids for similar_id in neighbours.get(author_id, [])
+        } - set(neighbours)
+        neighbours.update(_requery([a for a in new_neighbours if a in by_id], {}, limit, workers))
+
+    for artist in removed:
+        neighbours[artist.id] = []
+    # Centroids of deleted artists are dropped the first time they come up
+    orphans = {int(similar_id) for similar_ids in neighbours.values() for similar_id in similar_ids} - set(by_id)
+    if orphans:
+        delete_author_centroids(orphans)
+    updated = []
+    for author_id, similar_ids in neighbours.items():
+        artist = by_id[author_id]
+        similar_ids = [similar_id for similar_id in similar_ids if int(similar_id) not in orphans]
+        if artist.similar_authors_postgres_ids != similar_ids:
+            artist.similar_authors_postgres_ids = similar_ids
+            updated.append(artist)
+    report.updated = len(updated)
+
+    to_save = {artist.id: artist for artist in [*changed, *removed, *updated]}.values()
+    Artist.objects.bulk_update(
+        list(to_save), ['similarity_fingerprint', 'similar_authors_postgres_ids'], batch_size=FETCH_CHUNK_SIZE
+    )
+    if updated:
+        # bulk_update sends no post_save signals
+        transaction.on_commit(invalidate_artists_listing)
+        transaction.on_commit(partial(invalidate_search_rows, 'author', [artist.id for artist in updated]))
+    report.elapsed = time.monotonic() - started
+    logger.info(f"Author similarity: {report}")
+    return report
@@ -0,0 +1,117 @@
+"""In-process caches for Weaviate image searches."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from django.conf import settings
+
+from .metadata import METADATA_PROPERTIES
+
+
+def image_content_hash(image_bytes):
+    """Return the hex SHA-256 of image bytes, used as the identity of a query image."""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries=1024, ttl=600.0, clock=time.monotonic):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires_at = self._clock() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@dataclass(frozen=True)
+class SearchHitMetadata:
+    distance: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """Minimal, cacheable copy of a Weaviate result object (ids, denormalized metadata and distance)."""
+    uuid: str
+    properties: dict
+    metadata: SearchHitMetadata = field(default_factory=SearchHitMetadata)
+
+    @classmethod
+    def from_weaviate(cls, obj):
+        properties = obj.properties or {}
+        metadata = getattr(obj, 'metadata', None)
+        hit_properties = {
+            'artwork_psql_id': properties.get('artwork_psql_id'),
+            'author_psql_id': properties.get('author_psql_id'),
+        }
+        hit_properties.update({name: properties[name] for name in METADATA_PROPERTIES if name in properties})
+        return cls(
+            uuid=str(obj.uuid),
+            properties=hit_properties,
+            metadata=SearchHitMetadata(distance=getattr(metadata, 'distance', None)),
+        )
+
+
+@dataclass(frozen=True)
+class GroupedSearchResult:
+    """Result of a grouped (one hit per author) search, shaped like Weaviate's GroupByReturn."""
+    objects: List[Any]
+
+
+_search_result_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_search_result_cache():
+    """Return the process-wide search result cache, creating it from settings on first use."""
+    global _search_result_cache
+    if _search_result_cache is None:
+        with _cache_lock:
+            if _search_result_cache is None:
+                _search_result_cache = LRUCache(
+                    max_entries=getattr(settings, 'WEAVIATE_SEARCH_CACHE_SIZE', 1024),
+                    ttl=getattr(settings, 'WEAVIATE_SEARCH_CACHE_TTL', 600.0),
+                )
+    return _search_result_cache
+
+
+def clear_search_caches():
+    """Drop cached search results, e.g. after the index changed."""
+    if _search_result_cache is not None:
+        _search_result_cache.clear()
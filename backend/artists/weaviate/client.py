@@ -1,6 +1,12 @@
 """Weaviate client connection management."""
+import atexit
+import os
+import queue
+import threading
+import time
 import weaviate
 from contextlib import contextmanager
+from django.conf import settings
 from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse, urlunparse
 import logging
@@ -51,23 +57,159 @@ class PinnedDNSAdapter(HTTPAdapter):
         return super().proxy_manager_for(proxy, **proxy_kwargs)
 
 
+class WeaviateClientPool:
+    """
+    Per-process pool of connected Weaviate clients.
+
+    Clients are created lazily up to ``size`` and handed out exclusively, so a
+    search request reuses an already open gRPC channel instead of paying for a
+    fresh handshake and readiness check. Idle clients are health-checked before
+    reuse and replaced when they stop answering. The pool remembers the PID it
+    was filled in: a forked gunicorn worker drops the inherited clients (without
+    closing the parent's channels) and connects its own.
+    """
+
+    def __init__(self, size=4, timeout=10.0, healthcheck_interval=30.0, connect=None):
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._last_checked = {}
+
+    def _new_client(self):
+        connect = self._connect or weaviate.connect_to_local
+        client = connect()
+        logger.info("Connected to local Weaviate instance")
+        self._last_checked[id(client)] = time.monotonic()
+        return client
+
+    def _ensure_process(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    logger.debug("Process forked, discarding inherited Weaviate clients")
+                    self._reset_state()
+
+    def _is_healthy(self, client):
+        last_checked = self._last_checked.get(id(client), 0)
+        if time.monotonic() - last_checked < self.healthcheck_interval:
+            return True
+        try:
+            healthy = client.is_ready()
+        except Exception:
+            logger.warning("Weaviate client health check failed", exc_info=True)
+            healthy = False
+        if healthy:
+            self._last_checked[id(client)] = time.monotonic()
+        return healthy
+
+    def _discard(self, client):
+        self._last_checked.pop(id(client), None)
+        try:
+            client.close()
+            logger.debug("Closed local Weaviate client")
+        except Exception:
+            logger.exception("Error while closing local Weaviate client")
+
+    def acquire(self):
+        """Borrow a healthy client, connecting a new one if needed."""
+        self._ensure_process()
+        slots = self._slots
+        if not slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No Weaviate client available within {self.timeout}s")
+        try:
+            while True:
+                try:
+                    client = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._new_client()
+                if self._is_healthy(client):
+                    return client
+                logger.info("Reconnecting unhealthy Weaviate client")
+                self._discard(client)
+        except Exception:
+            slots.release()
+            raise
+
+    def release(self, client, discard=False):
+        """Return a borrowed client to the pool, or close it when ``discard`` is set."""
+        if self._pid != os.getpid():
+            # Borrowed before a fork; the slot belongs to the old state.
+            return
+        if discard:
+            self._discard(client)
+        else:
+            self._idle.put(client)
+        self._slots.release()
+
+    def close_all(self):
+        """Close every idle client (used at shutdown and in tests)."""
+        if self._pid != os.getpid():
+            self._reset_state()
+            return
+        while True:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(client)
+
+    @contextmanager
+    def client(self):
+        client = self.acquire()
+        discard = False
+        try:
+            yield client
+        except Exception:
+            # Keep the client only if the failure was not caused by the connection itself.
+            self._last_checked.pop(id(client), None)
+            discard = not self._is_healthy(client)
+            raise
+        finally:
+            self.release(client, discard=discard)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_weaviate_client_pool():
+    """Return the process-wide client pool, creating it from settings on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = WeaviateClientPool(
+                    size=getattr(settings, 'WEAVIATE_POOL_SIZE', 4),
+                    timeout=getattr(settings, 'WEAVIATE_POOL_TIMEOUT', 10.0),
+                    healthcheck_interval=getattr(settings, 'WEAVIATE_HEALTHCHECK_INTERVAL', 30.0),
+                )
+    return _pool
+
+
+def close_weaviate_clients():
+    """Close all pooled clients of this process."""
+    if _pool is not None:
+        _pool.close_all()
+
+
+atexit.register(close_weaviate_clients)
+
+
 @contextmanager
 def get_weaviate_client():
-    """Context manager for handling Weaviate client connections."""
-    client = None
-    logger.debug("Connecting to local Weaviate instance")
+    """Context manager that borrows a client from the process-wide pool."""
+    logger.debug("Borrowing Weaviate client from pool")
     try:
-        client = weaviate.connect_to_local()
-        logger.info("Connected to local Weaviate instance")
-        yield client
+        with get_weaviate_client_pool().client() as client:
+            yield client
     except Exception:
-        logger.exception("Failed to connect to local Weaviate instance")
+        logger.exception("Weaviate client operation failed")
         raise
-    finally:
-        if client is not None:
-            try:
-                client.close()
-                logger.debug("Closed local Weaviate client")
-            except Exception:
-                logger.exception("Error while closing local Weaviate client")
-                raise
@@ -1,40 +1,19 @@
-import weaviate
-import weaviate.classes as wvc
+from .schema import migrate_schema
 
-def create_schema():
-    try:
-        client = weaviate.connect_to_local()
-        client.collections.delete(["Artworks"])
 
-        artworks = client.collections.create(
-            name="Artworks",
-            properties=[
-                wvc.config.Property(
-                    name="artwork_psql_id",
-                    data_type=wvc.config.DataType.TEXT,
-                    description="id of the artwork in posgresql",
-                ),
-                wvc.config.Property(
-                    name="author_psql_id",
-                    data_type=wvc.config.DataType.TEXT,
-                    description="id of the author in posgresql",
-                ),
-                wvc.config.Property(
-                    name="image",
-                    data_type=wvc.config.DataType.BLOB,
-                    description="image",
-                ),
-            ],
-            # the img2vec-neural Weaviate module
-            vectorizer_config=wvc.config.Configure.Vectorizer.img2vec_neural(image_fields=["image"]),
-            # vector_index_type=VectorIndexType.HNSW
-        )
+def create_schema(denormalized=None):
+    """
+    Create the Artworks collection, or migrate it in place.
 
-        print('artworks: ', artworks)
+    Nothing is deleted: new properties are added to the live collection and
+    incompatible changes are rebuilt into a shadow collection behind the
+    ``Artworks`` alias (see ``schema.py``). With ``denormalized`` (default
+    ``WEAVIATE_DENORMALIZED_METADATA``) the collection also stores the
+    artwork display fields (title, picture url, year and size).
+    """
+    report = migrate_schema(denormalized=denormalized)
+    print('artworks: ', report)
+    return report
 
-        schema = client.collections.list_all(simple=False)  # Use `simple=False` to get comprehensive information
-        print(schema)
-    finally:
-        client.close()
-
-# python -c "from artists.weaviate.create_schema import create_schema; create_schema()"
\ No newline at end of file
+# python -c "from artists.weaviate.create_schema import create_schema; create_schema()"
+# or: python manage.py migrate_weaviate_schema
@@ -1,49 +1,110 @@
-import weaviate
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+from typing import List, Optional
+
+from django.db import transaction
+
+from artists.cache import invalidate_artists_listing, invalidate_search_rows
 from artists.models import Artwork, Artist
-from django.core.files.storage import default_storage
-from artists.weaviate import add_image_to_weaviate, search_similar_authors_ids_by_image_url
+from artists.weaviate import search_similar_authors_ids_by_image_data, search_similar_authors_ids_by_image_url
+from artists.weaviate.ingest import ingest_artworks
+from artists.weaviate.metrics import StepTimings
+from artists.weaviate.service import url_to_image_bytes
 
-# python -c "from artists.weaviate.data_helpers import add_all_artworks_to_weaviate; add_all_artworks_to_weaviate();"
-'''
-python -c "
-import os
-import django
-django.setup()
-from artists.weaviate.data_helpers import add_all_artworks_to_weaviate;
-add_all_artworks_to_weaviate()
-"
-'''
-def add_all_artworks_to_weaviate():
+logger = logging.getLogger(__name__)
 
+SIMILAR_AUTHORS_WORKERS = 8
+SIMILAR_AUTHORS_BATCH_SIZE = 50
+
+# python manage.py index_artworks
+def add_all_artworks_to_weaviate(**kwargs):
+    """Index every artwork that has no Weaviate id yet (see ``artists.weaviate.ingest``)."""
     print("Adding all artworks to Weaviate")
-    artworks_psql = Artwork.objects.all()
-    for artwork in artworks_psql:
-        artwork_psql_id = artwork.id
-        author_psql_id = artwork.artist.id
-        arweave_image_url = artwork.picture_url
-        picture_image_weaviate_id = artwork.picture_image_weaviate_id
+    report = ingest_artworks(progress=print, **kwargs)
+    print(f"Done: {report}")
+    return report
 
-        print("... picture_image_weaviate_id", picture_image_weaviate_id)
-        # If the image is stored locally, get the absolute URL
-        if not picture_image_weaviate_id and artwork.picture:
-            print("--- arweave_image_url", arweave_image_url)
-            # arweave_image_url = default_storage.url(artwork.picture.name)
 
-            if arweave_image_url:
-                uuid = add_image_to_weaviate(str(artwork_psql_id), str(author_psql_id), arweave_image_url)
-                artwork.picture_image_weaviate_id = uuid
-                artwork.save()
+def _other_author_ids(artist_id, similar_images, limit):
+    """``author_psql_id`` of the hits, without the author itself (as ``nearest_authors`` does)."""
+    similar_ids = [image.properties['author_psql_id'] for image in similar_images.objects]
+    return [similar_id for similar_id in similar_ids if similar_id != str(artist_id)][:limit]
 
 
 def populate_similar_authors_postgres_ids(artist, image_url, limit=10):
-    similar_images = search_similar_authors_ids_by_image_url(image_url, limit)
-    similar_ids = [image.properties['author_psql_id'] for image in similar_images.objects]
+    similar_images = search_similar_authors_ids_by_image_url(image_url, limit + 1)
+    similar_ids = _other_author_ids(artist.id, similar_images, limit)
     print("... similar authors ids", artist.name, similar_ids)
     artist.similar_authors_postgres_ids = similar_ids
     artist.save()
 
 
+@dataclass
+class SimilarAuthorsReport:
+    """Counters of a ``populate_all_authors_similar_ids`` run."""
+    total: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    last_artist_id: Optional[int] = None
+    elapsed: float = 0.0
+    failed_artist_ids: List[int] = field(default_factory=list)
+    # {stage: {'count', 'total', 'mean', 'max'}}, see StepTimings.snapshot()
+    timings: dict = field(default_factory=dict)
+
+    def __str__(self):
+        return (
+            f"{self.updated + self.skipped + self.failed}/{self.total} artists processed, {self.updated} updated, "
+            f"{self.skipped} without a picture, {self.failed} failed in {self.elapsed:.1f}s "
+            f"(checkpoint: artist {self.last_artist_id})"
+        )
+
+
+def read_checkpoint(path):
+    """Id of the last artist a previous run finished, or None."""
+    try:
+        with open(path) as f:
+            return int(f.read().strip() or 0) or None
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, artist_id):
+    # Written to a temporary file and renamed, so a crash never leaves a torn checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(str(artist_id))
+    os.replace(tmp_path, path)
+
+
+def _first_picture_urls(artist_ids):
+    """``{artist_id: picture_url}`` of each artist's first artwork with a picture, in one query."""
+    rows = (
+        Artwork.objects.filter(artist_id__in=artist_ids)
+        .exclude(picture_url__isnull=True).exclude(picture_url='')
+        .order_by('artist_id', 'id').distinct('artist_id')
+        .values_list('artist_id', 'picture_url')
+    )
+    return dict(rows)
+
+
+def _similar_ids(artist_id, image_url, limit, timings):
+    with timings.step('fetch'):
+        image_bytes = url_to_image_bytes(image_url)
+    with timings.step('search'):
+        # One extra hit, the picture's own author ranks first
+        similar_images = search_similar_authors_ids_by_image_data(image_bytes, limit + 1)
+    return _other_author_ids(artist_id, similar_images, limit)
+
+
 '''
+python manage.py populate_similar_authors
+or:
 python -c "
 import os
 import django
@@ -52,11 +113,79 @@ from artists.weaviate.data_helpers import populate_all_authors_similar_ids;
 populate_all_authors_similar_ids()
 "
 '''
-def populate_all_authors_similar_ids(limit=10):
-    artists = Artist.objects.all()
-    for artist in artists:
-        first_artwork = artist.artwork_set.first()
-        if first_artwork and first_artwork.picture_url:
-            populate_similar_authors_postgres_ids(artist, first_artwork.picture_url, limit)
-        else:
-            print(f"File not found: {first_artwork.picture.name}")
+def populate_all_authors_similar_ids(limit=10, workers=SIMILAR_AUTHORS_WORKERS, batch_size=SIMILAR_AUTHORS_BATCH_SIZE,
+                                     start_after=None, checkpoint_path=None, progress=print):
+    """
+    Set ``similar_authors_postgres_ids`` of every artist from an image search with their first artwork.
+
+    Artists are processed in id order, ``batch_size`` at a time: the images
+    of a batch are downloaded and searched by ``workers`` threads, so one
+    slow gateway response only holds up its own thread, and the batch is
+    saved with one ``bulk_update``. After every batch the id of the last
+    artist done is written to ``checkpoint_path``, and a run resumes after
+    it (or after ``start_after``). The checkpoint never passes an artist
+    that failed, so a resumed run retries it. ``progress`` is called with the running report and the
+    per-stage timings. ``update_author_similarity`` computes the same field
+    from all of an author's artworks without downloading anything.
+    """
+    if start_after is None and checkpoint_path:
+        start_after = read_checkpoint(checkpoint_path)
+    artists = Artist.objects.order_by('id').only('id', 'similar_authors_postgres_ids')
+    if start_after is not None:
+        artists = artists.filter(id__gt=start_after)
+
+    timings = StepTimings()
+    report = SimilarAuthorsReport(total=artists.count(), last_artist_id=start_after)
+    started = time.monotonic()
+    rows = artists.iterator(chunk_size=batch_size)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+
+            with timings.step('select'):
+                picture_urls = _first_picture_urls([artist.id for artist in batch])
+            futures = {
+                artist.id: executor.submit(_similar_ids, artist.id, picture_urls[artist.id], limit, timings)
+                for artist in batch if artist.id in picture_urls
+            }
+            updated = []
+            for artist in batch:
+                future = futures.get(artist.id)
+                if future is None:
+                    report.skipped += 1
+                    continue
+                try:
+                    artist.similar_authors_postgres_ids = future.result()
+                except Exception as e:
+                    logger.warning(f"Similar authors of artist {artist.id} failed: {e}")
+                    report.failed += 1
+                    report.failed_artist_ids.append(artist.id)
+                else:
+                    updated.append(artist)
+
+            with timings.step('save'):
+                Artist.objects.bulk_update(updated, ['similar_authors_postgres_ids'])
+                report.updated += len(updated)
+                first_failed = report.failed_artist_ids[0] if report.failed_artist_ids else None
+                done = [artist.id for artist in batch if first_failed is None or artist.id < first_failed]
+                if done:
+                    report.last_artist_id = done[-1]
+                    if checkpoint_path:
+                        write_checkpoint(checkpoint_path, report.last_artist_id)
+            if updated:
+                # bulk_update sends no post_save signals
+                transaction.on_commit(invalidate_artists_listing)
+                # Bound now: under an outer transaction the callbacks run after the last batch
+                transaction.on_commit(partial(invalidate_search_rows, 'author', [artist.id for artist in updated]))
+
+            report.elapsed = time.monotonic() - started
+            report.timings = timings.snapshot()
+            if progress is not None:
+                progress(report)
+
+    report.elapsed = time.monotonic() - started
+    report.timings = timings.snapshot()
+    return report
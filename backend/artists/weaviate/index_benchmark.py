@@ -0,0 +1,194 @@
+"""
+Recall, latency and memory of vector index configurations.
+
+Each configuration is loaded into a throwaway collection (no vectorizer)
+with the same synthetic vectors: unit vectors drawn around a number of
+cluster centres, which is closer to image embeddings than uniform noise.
+Queries are perturbed dataset vectors; their exact nearest neighbours are
+computed here by brute force, and recall@k is the share of them the index
+returns. HNSW configurations are queried at every requested ``ef`` without
+being rebuilt, since ``ef`` is a query-time parameter.
+
+Memory is read from Weaviate's Prometheus endpoint when one is given
+(``go_memstats_heap_inuse_bytes`` before loading and after querying; Go
+returns freed memory lazily, so run one configuration per call for exact
+figures); otherwise ``estimate_index_memory()`` is reported.
+"""
+import heapq
+import logging
+import math
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, replace
+from operator import mul
+from typing import List, Optional
+
+import requests
+import weaviate.classes as wvc
+
+from .client import get_weaviate_client
+from .vector_index import FLAT, VectorIndexSpec, estimate_index_memory
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_PREFIX = "IndexBenchmark"
+LOAD_BATCH_SIZE = 200
+
+DEFAULT_CONFIGURATIONS = {
+    "hnsw": VectorIndexSpec(index_type="hnsw"),
+    "hnsw-m16": VectorIndexSpec(index_type="hnsw", max_connections=16, ef_construction=64),
+    "hnsw-m64": VectorIndexSpec(index_type="hnsw", max_connections=64, ef_construction=256),
+    "hnsw-pq": VectorIndexSpec(index_type="hnsw", compression="pq"),
+    "hnsw-bq": VectorIndexSpec(index_type="hnsw", compression="bq"),
+    "flat": VectorIndexSpec(index_type="flat"),
+    "flat-bq": VectorIndexSpec(index_type="flat", compression="bq"),
+}
+DEFAULT_EFS = [-1, 64, 128, 256]
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of one configuration at one ``ef``."""
+    name: str
+    ef: Optional[int]
+    recall: float
+    p50_ms: float
+    p95_ms: float
+    memory_bytes: int
+    memory_measured: bool
+    load_seconds: float
+
+    def __str__(self):
+        ef = "-" if self.ef is None else ("dynamic" if self.ef == -1 else str(self.ef))
+        memory = f"{self.memory_bytes / 2 ** 20:.1f} MiB{'' if self.memory_measured else ' (est.)'}"
+        return (
+            f"{self.name:<12} ef={ef:<8} recall={self.recall:.3f}  p50={self.p50_ms:.1f}ms  "
+            f"p95={self.p95_ms:.1f}ms  memory={memory}  load={self.load_seconds:.1f}s"
+        )
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def synthetic_vectors(count, dims, clusters=50, spread=0.3, seed=0):
+    """``count`` unit vectors of ``dims`` dimensions around ``clusters`` random centres."""
+    rng = random.Random(seed)
+    centres = [[rng.gauss(0, 1) for _ in range(dims)] for _ in range(max(1, clusters))]
+    return [
+        _normalize([c + rng.gauss(0, spread) for c in rng.choice(centres)])
+        for _ in range(count)
+    ]
+
+
+def synthetic_queries(vectors, count, noise=0.1, seed=1):
+    rng = random.Random(seed)
+    return [_normalize([x + rng.gauss(0, noise) for x in rng.choice(vectors)]) for _ in range(count)]
+
+
+def exact_neighbours(vectors, query, k):
+    """Indexes of the ``k`` vectors closest to ``query`` by cosine distance (all are unit vectors)."""
+    return set(heapq.nlargest(k, range(len(vectors)), key=lambda i: sum(map(mul, vectors[i], query))))
+
+
+def vector_uuid(index):
+    return uuid.UUID(int=index + 1)
+
+
+def heap_in_use(metrics_url):
+    """Bytes of Go heap in use by Weaviate, from its Prometheus metrics."""
+    response = requests.get(metrics_url, timeout=10)
+    response.raise_for_status()
+    match = re.search(r"^go_memstats_heap_inuse_bytes\s+(\S+)$", response.text, re.MULTILINE)
+    if not match:
+        raise ValueError(f"{metrics_url} does not report go_memstats_heap_inuse_bytes")
+    return int(float(match.group(1)))
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _load(collection, vectors):
+    with collection.batch.fixed_size(batch_size=LOAD_BATCH_SIZE) as batch:
+        for index, vector in enumerate(vectors):
+            batch.add_object(properties={}, uuid=vector_uuid(index), vector=vector)
+    if collection.batch.failed_objects:
+        raise RuntimeError(f"{len(collection.batch.failed_objects)} benchmark vectors were rejected")
+
+
+def _query(collection, queries, truth, k):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        response = collection.query.near_vector(near_vector=query, limit=k, return_properties=[])
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len({obj.uuid for obj in response.objects} & expected)
+    return hits / (len(queries) * k), _percentile(latencies, 0.5), _percentile(latencies, 0.95)
+
+
+def benchmark_configuration(weaviate_client, name, spec, vectors, queries, truth, k=10, efs=None,
+                            metrics_url=None):
+    """Load ``vectors`` into a throwaway collection configured by ``spec`` and measure it."""
+    collection_name = f"{BENCHMARK_PREFIX}_{re.sub(r'[^0-9A-Za-z]', '_', name)}"
+    if weaviate_client.collections.exists(collection_name):
+        weaviate_client.collections.delete(collection_name)
+    heap_before = heap_in_use(metrics_url) if metrics_url else None
+
+    results = []
+    try:
+        started = time.monotonic()
+        collection = weaviate_client.collections.create(
+            name=collection_name,
+            vectorizer_config=wvc.config.Configure.Vectorizer.none(),
+            vector_index_config=spec.to_config(),
+        )
+        _load(collection, vectors)
+        if spec.compression == "pq":
+            # PQ is trained on the loaded vectors, as migrate_schema() does on a live collection
+            collection.config.update(vector_index_config=spec.to_reconfigure(enable_pq=True))
+        load_seconds = time.monotonic() - started
+
+        for ef in ([None] if spec.kind == FLAT else (efs or [spec.ef if spec.ef is not None else -1])):
+            if ef is not None:
+                collection.config.update(vector_index_config=replace(spec, ef=ef).to_reconfigure())
+            recall, p50, p95 = _query(collection, queries, truth, k)
+            if heap_before is not None:
+                memory, measured = max(0, heap_in_use(metrics_url) - heap_before), True
+            else:
+                memory, measured = estimate_index_memory(len(vectors), len(vectors[0]), spec), False
+            results.append(BenchmarkResult(name, ef, recall, p50, p95, memory, measured, load_seconds))
+            logger.info(str(results[-1]))
+    finally:
+        weaviate_client.collections.delete(collection_name)
+    return results
+
+
+def run_benchmark(configurations=None, count=5000, dims=512, queries=50, k=10, clusters=50, efs=None,
+                  metrics_url=None, seed=0, progress=None) -> List[BenchmarkResult]:
+    """
+    Benchmark ``configurations`` (name -> ``VectorIndexSpec``, default
+    ``DEFAULT_CONFIGURATIONS``) on one synthetic dataset.
+
+    ``progress`` is called with each ``BenchmarkResult``.
+    """
+    configurations = configurations or DEFAULT_CONFIGURATIONS
+    vectors = synthetic_vectors(count, dims, clusters=clusters, seed=seed)
+    query_vectors = synthetic_queries(vectors, queries, seed=seed + 1)
+    truth = [{vector_uuid(i) for i in exact_neighbours(vectors, query, k)} for query in query_vectors]
+
+    results = []
+    with get_weaviate_client() as weaviate_client:
+        for name, spec in configurations.items():
+            for result in benchmark_configuration(
+                weaviate_client, name, spec, vectors, query_vectors, truth, k=k,
+                efs=efs if efs is not None else DEFAULT_EFS, metrics_url=metrics_url,
+            ):
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return results
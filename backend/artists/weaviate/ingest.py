@@ -0,0 +1,198 @@
+"""
+Bulk ingestion of artwork images into Weaviate.
+
+Artworks are processed in chunks: the images of a chunk are downloaded and
+normalized by a bounded thread pool, inserted with one dynamic Weaviate
+batch (the client sizes the batches from the server's latency; images
+already stored under their content-derived UUID are skipped), and the
+resulting ids are written back with a single ``bulk_update``. Progress is
+persisted after every chunk and only artworks without a Weaviate id are
+selected, so an interrupted run resumes where it stopped.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import List
+
+from django.db import transaction
+from django.utils import timezone
+from weaviate.classes.query import Filter
+
+from artists.cache import invalidate_artists_listing
+from artists.models import Artwork
+
+from .cache import clear_search_caches
+from .aliases import artworks_collection
+from .client import get_weaviate_client
+from .metadata import METADATA_MODEL_FIELDS, metadata_enabled, metadata_if_enabled
+from .metrics import ingest_step
+from .service import build_artwork_object, fetch_artwork_image
+
+logger = logging.getLogger(__name__)
+
+INGEST_CHUNK_SIZE = 100
+INGEST_WORKERS = 8
+INDEX_FIELDS = ['picture_image_weaviate_id', 'picture_image_hash', 'weaviate_indexed_at']
+
+
+@dataclass
+class IngestReport:
+    """Counters of an ingestion run."""
+    total: int = 0
+    indexed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    failed_artwork_ids: List[int] = field(default_factory=list)
+
+    @property
+    def processed(self):
+        return self.indexed + self.failed
+
+    @property
+    def throughput(self):
+        """Artworks processed per second."""
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.processed}/{self.total} artworks processed, {self.indexed} indexed "
+            f"({self.unchanged} already up to date), "
+            f"{self.failed} failed in {self.elapsed:.1f}s ({self.throughput:.1f} artworks/s)"
+        )
+
+
+def artworks_to_ingest(reindex=False, start_after=None):
+    """Artworks with a picture URL, ordered by id; unless ``reindex``, only those not yet in Weaviate."""
+    artworks = Artwork.objects.exclude(picture_url__isnull=True).exclude(picture_url='')
+    if not reindex:
+        artworks = artworks.filter(picture_image_weaviate_id='')
+    if start_after is not None:
+        artworks = artworks.filter(id__gt=start_after)
+    return with_ingest_fields(artworks).order_by('id')
+
+
+def with_ingest_fields(artworks):
+    """Limit ``artworks`` to the fields ingestion reads, with the metadata when it is denormalized."""
+    if metadata_enabled():
+        return artworks.only('id', 'artist_id', *INDEX_FIELDS, *METADATA_MODEL_FIELDS)
+    return artworks.only('id', 'artist_id', 'picture_url', *INDEX_FIELDS)
+
+
+def _fetch(artwork):
+    try:
+        with ingest_step('fetch'):
+            return artwork, fetch_artwork_image(artwork.picture_url)
+    except Exception as e:
+        logger.warning(f"Failed to fetch image of artwork {artwork.id}: {e}")
+        return artwork, None
+
+
+def _existing_uuids(collection, uuids):
+    response = collection.query.fetch_objects(
+        filters=Filter.by_id().contains_any(list(uuids)),
+        limit=len(uuids),
+        return_properties=["artwork_psql_id"],
+    )
+    return {str(obj.uuid) for obj in response.objects}
+
+
+def _insert_batch(fetched):
+    """
+    Insert ``(artwork, image)`` pairs with one dynamic batch.
+
+    Objects whose content-derived UUID already exists hold the same image and
+    are not sent again. When a re-indexed artwork's image changed, its
+    previous object is deleted once the new one is stored. Returns
+    ``(indexed_artworks, unchanged_count)``.
+    """
+    objects = {}
+    for artwork, image in fetched:
+        properties, obj_uuid = build_artwork_object(
+            artwork.id, artwork.artist_id, image, metadata_if_enabled(artwork)
+        )
+        objects[obj_uuid] = (artwork, properties)
+
+    with get_weaviate_client() as weaviate_client:
+        collection = artworks_collection(weaviate_client)
+        unchanged = _existing_uuids(collection, objects)
+        with ingest_step('batch_insert'), collection.batch.dynamic() as batch:
+            for obj_uuid, (_, properties) in objects.items():
+                if obj_uuid not in unchanged:
+                    batch.add_object(properties=properties, uuid=obj_uuid)
+        failed_uuids = {str(failed.object_.uuid) for failed in collection.batch.failed_objects}
+        replaced = [
+            artwork.picture_image_weaviate_id for obj_uuid, (artwork, _) in objects.items()
+            if obj_uuid not in failed_uuids and artwork.picture_image_weaviate_id not in ('', obj_uuid)
+        ]
+        if replaced:
+            collection.data.delete_many(where=Filter.by_id().contains_any(replaced))
+
+    for failed in failed_uuids:
+        logger.warning(f"Weaviate rejected artwork {objects[failed][0].id}")
+
+    indexed = []
+    indexed_at = timezone.now()
+    for obj_uuid, (artwork, properties) in objects.items():
+        if obj_uuid not in failed_uuids:
+            artwork.picture_image_weaviate_id = obj_uuid
+            artwork.picture_image_hash = properties["image_hash"]
+            artwork.weaviate_indexed_at = indexed_at
+            indexed.append(artwork)
+    return indexed, len(unchanged)
+
+
+def ingest_artworks(
+    artworks=None,
+    chunk_size=INGEST_CHUNK_SIZE,
+    workers=INGEST_WORKERS,
+    progress=None,
+):
+    """
+    Index ``artworks`` (default: ``artworks_to_ingest()``) in Weaviate.
+
+    ``progress`` is called with the running ``IngestReport`` after every
+    chunk. Returns the final report.
+    """
+    if artworks is None:
+        artworks = artworks_to_ingest()
+    report = IngestReport(total=artworks.count())
+    started = time.monotonic()
+    rows = artworks.iterator(chunk_size=chunk_size)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            fetched = []
+            for artwork, image in executor.map(_fetch, chunk):
+                if image is None:
+                    report.failed += 1
+                    report.failed_artwork_ids.append(artwork.id)
+                else:
+                    fetched.append((artwork, image))
+
+            indexed, unchanged = _insert_batch(fetched) if fetched else ([], 0)
+            if indexed:
+                with ingest_step('save'):
+                    Artwork.objects.bulk_update(indexed, INDEX_FIELDS)
+            missing = {artwork.id for artwork, _ in fetched} - {artwork.id for artwork in indexed}
+            report.indexed += len(indexed)
+            report.unchanged += unchanged
+            report.failed += len(missing)
+            report.failed_artwork_ids.extend(sorted(missing))
+
+            report.elapsed = time.monotonic() - started
+            if progress is not None:
+                progress(report)
+
+    if report.indexed:
+        clear_search_caches()
+        # bulk_update sends no post_save signals
+        transaction.on_commit(invalidate_artists_listing)
+    report.elapsed = time.monotonic() - started
+    return report
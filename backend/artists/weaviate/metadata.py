@@ -0,0 +1,59 @@
+"""
+Artwork display fields denormalized into Weaviate objects.
+
+With ``WEAVIATE_DENORMALIZED_METADATA`` enabled, every Artworks object also
+stores the ``ArtworkSerializer`` fields, so the artwork of a search result
+is built from the returned properties without touching Postgres; objects
+indexed before the mode was enabled are still hydrated from the database
+until the sync patches them. Authors always come from the search row cache
+(``get_search_rows``), so every result carries the full
+``SearchArtistSerializer`` row.
+
+The properties are written by the ingest path, kept current by admin saves
+(``WEAVIATE_METADATA`` jobs) and checked by ``sync_weaviate``.
+"""
+from django.conf import settings
+
+# Weaviate property -> Artwork field
+ARTWORK_METADATA_FIELDS = {
+    'title': 'title',
+    'picture_url': 'picture_url',
+    'year': 'year',
+    'size_x': 'sizeX',
+    'size_y': 'sizeY',
+}
+METADATA_PROPERTIES = list(ARTWORK_METADATA_FIELDS)
+# Fields to load with ``QuerySet.only()`` to build the metadata
+METADATA_MODEL_FIELDS = list(ARTWORK_METADATA_FIELDS.values())
+
+
+def metadata_enabled():
+    return getattr(settings, 'WEAVIATE_DENORMALIZED_METADATA', False)
+
+
+def artwork_metadata(artwork):
+    """Metadata properties of the object of ``artwork``."""
+    return {prop: getattr(artwork, field) for prop, field in ARTWORK_METADATA_FIELDS.items()}
+
+
+def metadata_if_enabled(artwork):
+    """``artwork_metadata(artwork)`` when the mode is enabled, else None."""
+    return artwork_metadata(artwork) if metadata_enabled() else None
+
+
+def artwork_row_from_properties(properties):
+    """
+    The ``ArtworkSerializer`` row of an object, built from its properties.
+
+    Returns None for objects without metadata.
+    """
+    if not properties.get('picture_url'):
+        return None
+    try:
+        artwork_id = int(properties['artwork_psql_id'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    artwork = {'id': artwork_id}
+    artwork.update({field: properties.get(prop) for prop, field in ARTWORK_METADATA_FIELDS.items()})
+    return artwork
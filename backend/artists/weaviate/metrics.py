@@ -0,0 +1,61 @@
+"""Per-process timings of Weaviate ingest steps, and step timings of batch jobs."""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StepTimings:
+    """Thread-safe count, total and max duration per named step; ``label`` prefixes the debug logs."""
+
+    def __init__(self, label="Step"):
+        self.label = label
+        self._steps = {}
+        self._lock = threading.Lock()
+
+    def record(self, step, seconds):
+        with self._lock:
+            count, total, longest = self._steps.get(step, (0, 0.0, 0.0))
+            self._steps[step] = (count + 1, total + seconds, max(longest, seconds))
+
+    def snapshot(self):
+        """Return ``{step: {'count', 'total', 'mean', 'max'}}`` with durations in seconds."""
+        with self._lock:
+            return {
+                step: {'count': count, 'total': total, 'mean': total / count, 'max': longest}
+                for step, (count, total, longest) in self._steps.items()
+            }
+
+    @contextmanager
+    def step(self, step):
+        """Time the enclosed block and record it under ``step``, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.record(step, elapsed)
+            logger.debug(f"{self.label} {step} took {elapsed * 1000:.1f} ms")
+
+    def clear(self):
+        with self._lock:
+            self._steps.clear()
+
+
+_ingest_timings = StepTimings(label="Ingest step")
+
+
+def ingest_step(step):
+    """Time the enclosed block under ``step`` in this process's ingest timings."""
+    return _ingest_timings.step(step)
+
+
+def get_ingest_timings():
+    """Return the ingest step timings recorded by this process."""
+    return _ingest_timings.snapshot()
+
+
+def clear_ingest_timings():
+    _ingest_timings.clear()
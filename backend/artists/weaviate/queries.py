@@ -1,28 +1,163 @@
 """Query functions for Weaviate operations."""
 import base64
 import logging
-from weaviate.classes.query import MetadataQuery, Filter, GroupBy
+import math
+from weaviate.classes.query import MetadataQuery, GroupBy
 
+from .aliases import artworks_collection
 from .client import get_weaviate_client
-from .service import url_to_base64
-from .exceptions import WeaviateConnectionError
+from .service import normalize_image_bytes, url_to_image_bytes
+from .cache import (
+    GroupedSearchResult,
+    SearchHit,
+    clear_search_caches,
+    get_search_result_cache,
+    image_content_hash,
+)
+from .exceptions import WeaviateConnectionError, WeaviateException
+from .metadata import METADATA_PROPERTIES, metadata_enabled
+from .vectorizer import get_image_embedding, image_vectorizer_enabled
 
 logger = logging.getLogger(__name__)
 
+# Candidates fetched per requested author when grouping is done client-side
+AUTHOR_OVERFETCH = 4
+# Weaviate's default QUERY_MAXIMUM_RESULTS
+MAX_QUERY_RESULTS = 10000
+
+
+def _search_cache_key(kind, image_hash, limit):
+    return (kind, image_hash, limit)
+
+
+def search_return_properties():
+    """Properties search results need: the ids, plus the denormalized metadata when enabled."""
+    properties = ["artwork_psql_id", "author_psql_id"]
+    if metadata_enabled():
+        properties += METADATA_PROPERTIES
+    return properties
+
+
+def _query_authors_by_base64(image_data_base64, limit):
+    with get_weaviate_client() as weaviate_client:
+        artworks = artworks_collection(weaviate_client)
+        response = artworks.query.near_image(
+            near_image=image_data_base64,
+            group_by=GroupBy(
+                prop="author_psql_id",
+                number_of_groups=limit,
+                objects_per_group=1
+            ),
+            return_properties=search_return_properties(),
+            return_metadata=MetadataQuery(distance=True)
+        )
+        return GroupedSearchResult(objects=[SearchHit.from_weaviate(obj) for obj in response.objects])
+
+
+def _query_artworks_by_base64(image_data_base64, limit):
+    with get_weaviate_client() as weaviate_client:
+        artworks = artworks_collection(weaviate_client)
+        response = artworks.query.near_image(
+            near_image=image_data_base64,
+            limit=limit,
+            return_properties=search_return_properties(),
+            return_metadata=MetadataQuery(distance=True)
+        )
+        return [SearchHit.from_weaviate(obj) for obj in response.objects]
+
+
+def _first_hit_per_author(objects, authors, limit):
+    """Add the first of ``objects`` of each author to ``authors`` (author id -> hit) until it holds ``limit``."""
+    for obj in objects:
+        if len(authors) >= limit:
+            break
+        author_psql_id = obj.properties.get("author_psql_id")
+        if author_psql_id is not None and author_psql_id not in authors:
+            authors[author_psql_id] = obj
+    return authors
+
+
+def _query_artworks_and_authors_by_base64(image_data_base64, artworks_limit, authors_limit):
+    """
+    Artworks and authors for one ``near_image`` query, so Weaviate vectorizes the image once.
+
+    Over-fetches ``authors_limit * AUTHOR_OVERFETCH`` candidates and groups
+    them by author client-side. Returns ``(artworks, authors)``; ``authors``
+    is None when the candidates cover too few authors and a grouped query is
+    still needed.
+    """
+    fetch = max(artworks_limit, authors_limit * AUTHOR_OVERFETCH)
+    with get_weaviate_client() as weaviate_client:
+        artworks = artworks_collection(weaviate_client)
+        response = artworks.query.near_image(
+            near_image=image_data_base64,
+            limit=fetch,
+            return_properties=search_return_properties(),
+            return_metadata=MetadataQuery(distance=True)
+        )
+    hits = [SearchHit.from_weaviate(obj) for obj in response.objects]
+    authors = _first_hit_per_author(hits, {}, authors_limit)
+    if len(authors) < authors_limit and len(hits) == fetch:
+        return hits[:artworks_limit], None
+    return hits[:artworks_limit], GroupedSearchResult(objects=list(authors.values()))
+
+
+def _query_authors_by_vector(query_vector, limit):
+    return GroupedSearchResult(objects=[
+        SearchHit.from_weaviate(obj) for obj in search_similar_authors_by_vector(query_vector, limit)
+    ])
+
+
+def _query_artworks_by_vector(query_vector, limit):
+    return [SearchHit.from_weaviate(obj) for obj in search_similar_images_by_vector(query_vector, limit)]
+
+
+_IMAGE_QUERIES = {
+    'artworks': (_query_artworks_by_vector, _query_artworks_by_base64),
+    'authors': (_query_authors_by_vector, _query_authors_by_base64),
+}
+
+
+def _cached_image_search(kind, image_bytes, limit, image_data_base64=None, image_hash=None):
+    """
+    Run the ``kind`` image search unless an identical search is cached.
+
+    Results are keyed by the content hash of the image, the query kind and the
+    limit, so a repeated image skips the base64 encoding, the vectorization and
+    the ANN lookup altogether. On a miss, the query embedding is taken from the
+    embedding cache when the inference API is configured (one vectorization per
+    unique image across artwork and author searches); otherwise Weaviate
+    vectorizes the image through ``near_image``. Either way the image is
+    downscaled with ``normalize_image_bytes`` first; ``image_data_base64``
+    must already be normalized.
+    """
+    image_hash = image_hash or image_content_hash(image_bytes)
+    cache = get_search_result_cache()
+    key = _search_cache_key(kind, image_hash, limit)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.debug(f"Search cache hit for {kind} search")
+        return cached
+
+    by_vector, by_base64 = _IMAGE_QUERIES[kind]
+    if image_vectorizer_enabled():
+        query_vector = get_image_embedding(image_bytes, image_hash=image_hash, image_data_base64=image_data_base64)
+        result = by_vector(query_vector.tolist(), limit)
+    else:
+        if image_data_base64 is None:
+            image_data_base64 = base64.b64encode(normalize_image_bytes(image_bytes)).decode('utf-8')
+        result = by_base64(image_data_base64, limit)
+    cache.set(key, result)
+    return result
+
 
 def search_similar_authors_ids_by_base64(image_data_base64, limit=2):
     """Search for similar authors by base64 image data."""
     try:
-        with get_weaviate_client() as weaviate_client:
-            artworks = weaviate_client.collections.get("Artworks")
-            return artworks.query.near_image(
-                near_image=image_data_base64,
-                group_by=GroupBy(
-                    prop="author_psql_id",
-                    number_of_groups=limit,
-                    objects_per_group=1
-                )
-            )
+        return _cached_image_search('authors', base64.b64decode(image_data_base64), limit)
+    except WeaviateException:
+        # Invalid or unsafe images stay 400s in the views
+        raise
     except Exception as e:
         logger.error(f"Error searching similar authors by base64: {e}", exc_info=True)
         raise WeaviateConnectionError(f"Failed to search Weaviate: {str(e)}") from e
@@ -31,9 +166,8 @@ def search_similar_authors_ids_by_base64(image_data_base64, limit=2):
 def search_similar_authors_ids_by_image_data(image_data_bytes, limit=2):
     """Search for similar authors by image data bytes."""
     try:
-        image_data_base64 = base64.b64encode(image_data_bytes).decode('utf-8')
-        return search_similar_authors_ids_by_base64(image_data_base64, limit)
-    except WeaviateConnectionError:
+        return _cached_image_search('authors', image_data_bytes, limit)
+    except WeaviateException:
         raise
     except Exception as e:
         logger.error(f"Error searching similar authors by image data: {e}", exc_info=True)
@@ -43,9 +177,8 @@ def search_similar_authors_ids_by_image_data(image_data_bytes, limit=2):
 def search_similar_authors_ids_by_image_url(image_url, limit=2):
     """Search for similar authors by image URL."""
     try:
-        image_data_base64 = url_to_base64(image_url)
-        return search_similar_authors_ids_by_base64(image_data_base64, limit)
-    except WeaviateConnectionError:
+        return _cached_image_search('authors', url_to_image_bytes(image_url), limit)
+    except WeaviateException:
         raise
     except Exception as e:
         logger.error(f"Error searching similar authors by image URL: {e}", exc_info=True)
@@ -55,14 +188,9 @@ def search_similar_authors_ids_by_image_url(image_url, limit=2):
 def search_similar_artwork_ids_by_image_url(image_url, limit=1):
     """Search for similar artworks by image URL."""
     try:
-        base64_string = url_to_base64(image_url)
-        with get_weaviate_client() as weaviate_client:
-            artworks = weaviate_client.collections.get("Artworks")
-            response = artworks.query.near_image(
-                near_image=base64_string,
-                limit=limit
-            )
-            return response.objects
+        return _cached_image_search('artworks', url_to_image_bytes(image_url), limit)
+    except WeaviateException:
+        raise
     except Exception as e:
         logger.error(f"Error searching similar artworks by image URL: {e}", exc_info=True)
         raise WeaviateConnectionError(f"Failed to search Weaviate: {str(e)}") from e
@@ -71,24 +199,59 @@ def search_similar_artwork_ids_by_image_url(image_url, limit=1):
 def search_similar_artwork_ids_by_image_data(image_data_bytes, limit=2):
     """Search for similar artworks by image data bytes."""
     try:
-        image_data_base64 = base64.b64encode(image_data_bytes).decode('utf-8')
-        with get_weaviate_client() as weaviate_client:
-            artworks = weaviate_client.collections.get("Artworks")
-            response = artworks.query.near_image(
-                near_image=image_data_base64,
-                limit=limit
-            )
-            return response.objects
+        return _cached_image_search('artworks', image_data_bytes, limit)
+    except WeaviateException:
+        raise
     except Exception as e:
         logger.error(f"Error searching similar artworks by image data: {e}", exc_info=True)
         raise WeaviateConnectionError(f"Failed to search Weaviate: {str(e)}") from e
 
 
+def search_similar_artworks_and_authors_by_image_data(image_data_bytes, artworks_limit=10, authors_limit=2):
+    """
+    Search similar artworks and similar authors for one image.
+
+    Returns ``(artworks, authors)`` shaped like the results of
+    ``search_similar_artwork_ids_by_image_data`` and
+    ``search_similar_authors_ids_by_image_data``. The image is hashed,
+    downscaled and encoded once and vectorized once: by the inference API
+    when configured, otherwise by a single over-fetching ``near_image``
+    query whose hits are also grouped by author.
+    """
+    try:
+        image_hash = image_content_hash(image_data_bytes)
+        image_data_base64 = None
+        if not image_vectorizer_enabled():
+            cache = get_search_result_cache()
+            artworks_key = _search_cache_key('artworks', image_hash, artworks_limit)
+            authors_key = _search_cache_key('authors', image_hash, authors_limit)
+            image_data_base64 = base64.b64encode(normalize_image_bytes(image_data_bytes)).decode('utf-8')
+            if cache.get(artworks_key) is None and cache.get(authors_key) is None:
+                artworks, authors = _query_artworks_and_authors_by_base64(
+                    image_data_base64, artworks_limit, authors_limit
+                )
+                cache.set(artworks_key, artworks)
+                if authors is not None:
+                    cache.set(authors_key, authors)
+        artworks = _cached_image_search(
+            'artworks', image_data_bytes, artworks_limit, image_data_base64=image_data_base64, image_hash=image_hash
+        )
+        authors = _cached_image_search(
+            'authors', image_data_bytes, authors_limit, image_data_base64=image_data_base64, image_hash=image_hash
+        )
+        return artworks, authors
+    except WeaviateException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching similar artworks and authors by image data: {e}", exc_info=True)
+        raise WeaviateConnectionError(f"Failed to search Weaviate: {str(e)}") from e
+
+
 def search_similar_images_by_weaviate_image_id(weaviate_image_id, limit=2):
     """Search for similar images by Weaviate image ID."""
     try:
         with get_weaviate_client() as weaviate_client:
-            artworks = weaviate_client.collections.get("Artworks")
+            artworks = artworks_collection(weaviate_client)
             response = artworks.query.near_object(
                 near_object=weaviate_image_id,
                 limit=limit,
@@ -100,11 +263,40 @@ def search_similar_images_by_weaviate_image_id(weaviate_image_id, limit=2):
         raise WeaviateConnectionError(f"Failed to search Weaviate: {str(e)}") from e
 
 
+def _distinct_authors_near_object(artworks, weaviate_image_id, limit, overfetch=AUTHOR_OVERFETCH):
+    """
+    Closest artwork of each of the ``limit`` authors nearest to an object.
+
+    Fetches ``limit * overfetch`` candidates in one query and keeps the
+    first hit per ``author_psql_id``. Only when they cover too few authors
+    is the next page fetched, sized from the share of distinct authors seen
+    so far, so a search takes one or two round trips.
+    """
+    authors = {}
+    offset, page = 0, limit * overfetch
+    while len(authors) < limit and offset < MAX_QUERY_RESULTS:
+        page = min(page, MAX_QUERY_RESULTS - offset)
+        response = artworks.query.near_object(
+            near_object=weaviate_image_id,
+            limit=page,
+            offset=offset,
+            return_properties=search_return_properties(),
+            return_metadata=MetadataQuery(distance=True)
+        )
+        _first_hit_per_author(response.objects, authors, limit)
+        offset += len(response.objects)
+        if len(response.objects) < page:
+            break
+        missing = limit - len(authors)
+        page = max(page, math.ceil(missing * offset / max(1, len(authors)) * 1.5))
+    return list(authors.values())[:limit]
+
+
 def search_similar_authors_by_weaviate_image_id(weaviate_image_id, limit=5):
     """Search for similar authors by Weaviate image ID, excluding duplicates."""
     try:
         with get_weaviate_client() as weaviate_client:
-            artworks = weaviate_client.collections.get("Artworks")
+            artworks = artworks_collection(weaviate_client)
             grouped = GroupBy(
                 prop="author_psql_id",
                 number_of_groups=limit,
@@ -123,30 +315,7 @@ def search_similar_authors_by_weaviate_image_id(weaviate_image_id, limit=5):
                 # Fallback for clients without group_by support on near_object
                 pass
 
-            responses = []
-            filters = None
-
-            for _ in range(limit):
-                response = artworks.query.near_object(
-                    near_object=weaviate_image_id,
-                    limit=1,
-                    filters=filters,
-                    return_metadata=MetadataQuery(distance=True)
-                )
-
-                if not response.objects:
-                    break
-
-                first_object = response.objects[0]
-                responses.append(first_object)
-                author_psql_id = first_object.properties.get("author_psql_id")
-                if author_psql_id is None:
-                    continue
-
-                new_filter = Filter.by_property("author_psql_id").not_equal(author_psql_id)
-                filters = new_filter if filters is None else filters & new_filter
-
-            return responses
+            return _distinct_authors_near_object(artworks, weaviate_image_id, limit)
     except Exception as e:
         logger.error(f"Error searching similar authors by Weaviate image ID: {e}", exc_info=True)
         raise WeaviateConnectionError(f"Failed to search Weaviate: {str(e)}") from e
@@ -156,10 +325,11 @@ def search_similar_images_by_vector(query_vector, limit=2):
     """Search for similar images by vector."""
     try:
         with get_weaviate_client() as weaviate_client:
-            artworks = weaviate_client.collections.get("Artworks")
+            artworks = artworks_collection(weaviate_client)
             response = artworks.query.near_vector(
                 near_vector=query_vector,
                 limit=limit,
+                return_properties=search_return_properties(),
                 return_metadata=MetadataQuery(distance=True)
             )
             return response.objects
@@ -168,11 +338,32 @@ def search_similar_images_by_vector(query_vector, limit=2):
         raise WeaviateConnectionError(f"Failed to search Weaviate: {str(e)}") from e
 
 
+def search_similar_authors_by_vector(query_vector, limit=2):
+    """Search for similar authors by vector, one closest artwork per author."""
+    try:
+        with get_weaviate_client() as weaviate_client:
+            artworks = artworks_collection(weaviate_client)
+            response = artworks.query.near_vector(
+                near_vector=query_vector,
+                group_by=GroupBy(
+                    prop="author_psql_id",
+                    number_of_groups=limit,
+                    objects_per_group=1
+                ),
+                return_properties=search_return_properties(),
+                return_metadata=MetadataQuery(distance=True)
+            )
+            return response.objects
+    except Exception as e:
+        logger.error(f"Error searching similar authors by vector: {e}", exc_info=True)
+        raise WeaviateConnectionError(f"Failed to search Weaviate: {str(e)}") from e
+
+
 def read_all_artworks():
     """Read all artworks from Weaviate (for debugging)."""
     try:
         with get_weaviate_client() as weaviate_client:
-            artworks = weaviate_client.collections.get("Artworks")
+            artworks = artworks_collection(weaviate_client)
             logger.debug("Reading all artworks")
             for item in artworks.iterator():
                 logger.debug(f"Artwork UUID: {item.uuid}, Properties: {item.properties}")
@@ -185,7 +376,7 @@ def get_image_by_weaviate_id(image_id):
     """Get an image by its Weaviate ID."""
     try:
         with get_weaviate_client() as weaviate_client:
-            artworks = weaviate_client.collections.get("Artworks")
+            artworks = artworks_collection(weaviate_client)
             logger.debug(f"Reading image by ID: {image_id}")
             data_object = artworks.query.fetch_object_by_id(image_id)
             logger.debug(f"Retrieved image data: {data_object}")
@@ -199,9 +390,10 @@ def remove_by_weaviate_id(weaviate_id):
     """Remove an image by its Weaviate ID."""
     try:
         with get_weaviate_client() as weaviate_client:
-            artworks = weaviate_client.collections.get("Artworks")
+            artworks = artworks_collection(weaviate_client)
             logger.debug(f"Removing image by ID: {weaviate_id}")
             data_object = artworks.data.delete_by_id(weaviate_id)
+            clear_search_caches()
             logger.debug(f"Removed image data: {data_object}")
             return data_object
     except Exception as e:
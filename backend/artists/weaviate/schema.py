@@ -0,0 +1,317 @@
+"""
+Non-destructive migrations of the Artworks collection.
+
+``migrate_schema()`` diffs the desired collection config against the live
+collection behind the ``Artworks`` alias:
+
+- missing properties are added in place, as are changes to the mutable
+  vector index parameters (see ``vector_index.py``);
+- incompatible changes (a property changing type, another vectorizer or
+  vector index, HNSW build parameters, BQ compression) are
+  applied by building a shadow collection, copying every object into it,
+  pointing the alias at it and applying whatever was written to (or
+  deleted from) the old collection in the meantime. Vectors are copied along, so nothing is
+  re-vectorized unless the vectorizer itself changed. Searches keep using
+  the old collection until the switch. The old collection is kept until
+  ``drop_unused_collections()`` is called.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import weaviate.classes as wvc
+from django.utils import timezone
+from weaviate.classes.query import Filter, MetadataQuery
+
+from .aliases import ARTWORKS, alias_ttl, resolve_collection, set_alias
+from .cache import clear_search_caches
+from .client import get_weaviate_client
+from .metadata import metadata_enabled
+from .vector_index import PQ_MIN_OBJECTS, diff_vector_index, needs_pq, vector_index_spec
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 100
+IMAGE_VECTORIZER = "img2vec-neural"
+
+
+@dataclass(frozen=True)
+class PropertySpec:
+    """Desired definition of one collection property."""
+    name: str
+    data_type: wvc.config.DataType
+    description: str
+    # Properties only returned with results are not indexed
+    indexed: bool = True
+
+    def to_property(self):
+        options = {}
+        if not self.indexed:
+            options['index_filterable'] = False
+            if self.data_type == wvc.config.DataType.TEXT:
+                options['index_searchable'] = False
+        return wvc.config.Property(
+            name=self.name, data_type=self.data_type, description=self.description, **options
+        )
+
+
+def artworks_properties(denormalized=None):
+    """Property specs of the Artworks collection; with ``denormalized`` (see ``metadata.py``) including metadata."""
+    if denormalized is None:
+        denormalized = metadata_enabled()
+    text, number, blob = wvc.config.DataType.TEXT, wvc.config.DataType.INT, wvc.config.DataType.BLOB
+    properties = [
+        PropertySpec("artwork_psql_id", text, "id of the artwork in posgresql"),
+        PropertySpec("author_psql_id", text, "id of the author in posgresql"),
+        PropertySpec("image_hash", text, "sha256 of the normalized image, part of the object uuid"),
+        PropertySpec("image", blob, "image"),
+    ]
+    if denormalized:
+        properties += [
+            PropertySpec("title", text, "artwork title", indexed=False),
+            PropertySpec("picture_url", text, "artwork picture on Arweave", indexed=False),
+            PropertySpec("year", number, "year the artwork was made", indexed=False),
+            PropertySpec("size_x", number, "artwork width", indexed=False),
+            PropertySpec("size_y", number, "artwork height", indexed=False),
+        ]
+    return properties
+
+
+def create_collection(weaviate_client, name, properties, vector_index=None):
+    """Create the collection ``name`` with the Artworks configuration (default vector index: from settings)."""
+    return weaviate_client.collections.create(
+        name=name,
+        properties=[spec.to_property() for spec in properties],
+        # the img2vec-neural Weaviate module
+        vectorizer_config=wvc.config.Configure.Vectorizer.img2vec_neural(image_fields=["image"]),
+        vector_index_config=(vector_index or vector_index_spec()).to_config(),
+    )
+
+
+def _value(enum_or_str):
+    return getattr(enum_or_str, 'value', enum_or_str)
+
+
+@dataclass
+class SchemaDiff:
+    """Differences between the desired and the live collection config."""
+    add_properties: List[PropertySpec] = field(default_factory=list)
+    reconfigure: List[str] = field(default_factory=list)
+    incompatible: List[str] = field(default_factory=list)
+    vectorizer_changed: bool = False
+
+    @property
+    def in_sync(self):
+        return not self.add_properties and not self.reconfigure and not self.incompatible
+
+
+def diff_schema(live_config, properties, vector_index=None):
+    """Compare a live ``CollectionConfig`` with the desired property specs and vector index."""
+    diff = SchemaDiff()
+    live_types = {prop.name: _value(prop.data_type) for prop in live_config.properties}
+    for spec in properties:
+        live_type = live_types.get(spec.name)
+        if live_type is None:
+            diff.add_properties.append(spec)
+        elif live_type != _value(spec.data_type):
+            diff.incompatible.append(f"property {spec.name} is {live_type}, wanted {_value(spec.data_type)}")
+
+    live_vectorizer = _value(live_config.vectorizer)
+    if live_vectorizer != IMAGE_VECTORIZER:
+        diff.incompatible.append(f"vectorizer is {live_vectorizer}, wanted {IMAGE_VECTORIZER}")
+        diff.vectorizer_changed = True
+
+    diff.reconfigure, immutable = diff_vector_index(live_config, vector_index or vector_index_spec())
+    diff.incompatible += immutable
+    return diff
+
+
+@dataclass
+class SchemaMigrationReport:
+    """What ``migrate_schema`` did (or, on a dry run, would do)."""
+    collection: str = ''
+    created: bool = False
+    added_properties: List[str] = field(default_factory=list)
+    reconfigured: List[str] = field(default_factory=list)
+    deferred: List[str] = field(default_factory=list)
+    incompatible: List[str] = field(default_factory=list)
+    rebuilt_into: Optional[str] = None
+    copied: int = 0
+    caught_up: int = 0
+    deleted: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self):
+        if self.created:
+            return f"created {self.collection}"
+        parts = []
+        if self.added_properties:
+            parts.append(f"added {', '.join(self.added_properties)} to {self.collection}")
+        if self.reconfigured:
+            parts.append(f"reconfigured the vector index ({'; '.join(self.reconfigured)})")
+        if self.deferred:
+            parts.append(f"deferred {'; '.join(self.deferred)}")
+        if self.rebuilt_into:
+            parts.append(
+                f"rebuilt {self.collection} into {self.rebuilt_into} ({'; '.join(self.incompatible)}): "
+                f"{self.copied} objects copied, {self.caught_up} caught up, {self.deleted} deleted, "
+                f"{self.failed} failed"
+            )
+        elif self.incompatible:
+            parts.append(f"needs a rebuild: {'; '.join(self.incompatible)}")
+        return (', '.join(parts) or f"{self.collection} is up to date") + f" in {self.elapsed:.1f}s"
+
+
+def _property_names(collection):
+    return [prop.name for prop in collection.config.get().properties]
+
+
+def copy_objects(source, target, with_vectors=True, chunk_size=COPY_CHUNK_SIZE, select=None):
+    """
+    Copy the objects of ``source`` for which ``select(obj)`` is true (all by
+    default) into ``target``.
+
+    Properties, including the image blob, and uuids are kept. With
+    ``with_vectors`` the stored vectors are copied too, so ``target`` does
+    not vectorize again. Returns ``(copied, failed)``.
+    """
+    names = _property_names(source)
+    copied = 0
+    objects = source.iterator(
+        include_vector=with_vectors, return_metadata=MetadataQuery(last_update_time=True), return_properties=names,
+    )
+    with target.batch.fixed_size(batch_size=chunk_size) as batch:
+        for obj in objects:
+            if select is not None and not select(obj):
+                continue
+            vector = (obj.vector or {}).get('default') if with_vectors else None
+            batch.add_object(properties=obj.properties, uuid=obj.uuid, vector=vector)
+            copied += 1
+    failed = len(target.batch.failed_objects)
+    return copied - failed, failed
+
+
+def _update_times(collection):
+    """``{uuid: last update time}`` of every object of ``collection``."""
+    objects = collection.iterator(return_metadata=MetadataQuery(last_update_time=True), return_properties=[])
+    return {str(obj.uuid): obj.metadata.last_update_time for obj in objects}
+
+
+def catch_up(source, target, copied, with_vectors=True, chunk_size=COPY_CHUNK_SIZE):
+    """
+    Apply to ``target`` what was written to ``source`` since it was copied.
+
+    ``copied`` holds the ``_update_times`` of ``target`` when the copy
+    ended. Objects updated in ``source`` after they were copied, or created
+    since, are copied again; objects of the copy since deleted from
+    ``source`` are deleted from ``target``. Objects written to ``target``
+    itself in the meantime are kept. Returns ``(copied, deleted, failed)``.
+    """
+    current = _update_times(target)
+    seen = set()
+
+    def changed(obj):
+        obj_uuid = str(obj.uuid)
+        seen.add(obj_uuid)
+        if obj_uuid in current:
+            return obj.metadata.last_update_time > current[obj_uuid]
+        # Missing objects that were copied have been deleted from target since
+        return obj_uuid not in copied
+
+    caught_up, failed = copy_objects(source, target, with_vectors, chunk_size, select=changed)
+    deleted = [
+        obj_uuid for obj_uuid, updated in current.items()
+        if obj_uuid not in seen and copied.get(obj_uuid) == updated
+    ]
+    for start in range(0, len(deleted), chunk_size):
+        target.data.delete_many(where=Filter.by_id().contains_any(deleted[start:start + chunk_size]))
+    return caught_up, len(deleted), failed
+
+
+def _reconfigure_index(collection, changes, spec, report, dry_run):
+    """Apply the mutable vector index ``changes``; PQ waits until there is enough data to train on."""
+    enable_pq = needs_pq(collection.config.get(), spec)
+    if enable_pq:
+        count = collection.aggregate.over_all(total_count=True).total_count
+        if count < PQ_MIN_OBJECTS:
+            enable_pq = False
+            pq_changes = [change for change in changes if change.startswith('compression')]
+            changes = [change for change in changes if change not in pq_changes]
+            report.deferred += [f"{change} until {PQ_MIN_OBJECTS} objects ({count} now)" for change in pq_changes]
+    report.reconfigured += changes
+    if changes and not dry_run:
+        collection.config.update(vector_index_config=spec.to_reconfigure(enable_pq=enable_pq))
+
+
+def migrate_schema(denormalized=None, rebuild=False, dry_run=False, chunk_size=COPY_CHUNK_SIZE, settle=None):
+    """
+    Bring the collection behind the ``Artworks`` alias to the desired config.
+
+    ``rebuild`` forces a shadow rebuild. After switching the alias, waits
+    ``settle`` seconds (default ``WEAVIATE_ALIAS_TTL``, the time other
+    processes may keep writing to the old collection) and applies what they
+    wrote or deleted (see ``catch_up``).
+    """
+    started = time.monotonic()
+    properties = artworks_properties(denormalized)
+    vector_index = vector_index_spec()
+    live_name = resolve_collection(ARTWORKS, cached=False)
+    report = SchemaMigrationReport(collection=live_name)
+
+    with get_weaviate_client() as weaviate_client:
+        if not weaviate_client.collections.exists(live_name):
+            report.created = True
+            if not dry_run:
+                create_collection(weaviate_client, live_name, properties, vector_index)
+            report.elapsed = time.monotonic() - started
+            return report
+
+        live = weaviate_client.collections.get(live_name)
+        diff = diff_schema(live.config.get(), properties, vector_index)
+        report.incompatible = diff.incompatible
+        if not (diff.incompatible or rebuild):
+            report.added_properties = [spec.name for spec in diff.add_properties]
+            if not dry_run:
+                for spec in diff.add_properties:
+                    live.config.add_property(spec.to_property())
+            if diff.reconfigure:
+                _reconfigure_index(live, diff.reconfigure, vector_index, report, dry_run)
+            report.elapsed = time.monotonic() - started
+            return report
+
+        report.rebuilt_into = f"{ARTWORKS}_{timezone.now():%Y%m%d%H%M%S}"
+        if dry_run:
+            report.elapsed = time.monotonic() - started
+            return report
+
+        shadow = create_collection(weaviate_client, report.rebuilt_into, properties, vector_index)
+        with_vectors = not diff.vectorizer_changed
+        report.copied, report.failed = copy_objects(live, shadow, with_vectors, chunk_size)
+        copied = _update_times(shadow)
+        set_alias(ARTWORKS, report.rebuilt_into)
+        clear_search_caches()
+        logger.info(f"Weaviate alias {ARTWORKS} now points to {report.rebuilt_into}")
+
+        time.sleep(alias_ttl() if settle is None else settle)
+        report.caught_up, report.deleted, failed = catch_up(live, shadow, copied, with_vectors, chunk_size)
+        report.failed += failed
+        if needs_pq(shadow.config.get(), vector_index):
+            _reconfigure_index(shadow, ["compression is none, wanted pq"], vector_index, report, dry_run)
+
+    report.elapsed = time.monotonic() - started
+    return report
+
+
+def drop_unused_collections(dry_run=False):
+    """Delete ``Artworks_*`` collections (and ``Artworks`` itself) the alias no longer points to."""
+    current = resolve_collection(ARTWORKS, cached=False)
+    with get_weaviate_client() as weaviate_client:
+        unused = [
+            name for name in weaviate_client.collections.list_all(simple=True)
+            if name != current and (name == ARTWORKS or name.startswith(f"{ARTWORKS}_"))
+        ]
+        if unused and not dry_run:
+            weaviate_client.collections.delete(unused)
+    return unused
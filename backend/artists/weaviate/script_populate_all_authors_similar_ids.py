@@ -6,4 +6,5 @@ django.setup()
 
 from artists.weaviate.data_helpers import populate_all_authors_similar_ids
 
+# Prefer `python manage.py populate_similar_authors`, which resumes from a checkpoint
 populate_all_authors_similar_ids()
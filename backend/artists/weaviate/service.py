@@ -3,20 +3,28 @@ import base64
 import requests
 import socket
 import ipaddress
+import random
 import time
 import logging
+from dataclasses import dataclass
 from urllib.parse import urlparse, urlunparse
 from PIL import Image
 from PIL import UnidentifiedImageError
 from io import BytesIO
+from django.conf import settings
+from weaviate.classes.query import Filter
 from weaviate.util import generate_uuid5
 
+from .cache import clear_search_caches, image_content_hash
+from .aliases import artworks_collection
 from .client import get_weaviate_client, PinnedDNSAdapter, _format_netloc
 from .exceptions import WeaviateImageError, WeaviateSecurityError
+from .metrics import ingest_step
 
 logger = logging.getLogger(__name__)
 MAX_IMAGE_PIXELS = 200_000_000  # guard against decompression bombs (approx 200MP)
 RESIZE_TARGET_MB = 8  # keep room below download cap so resizing can trigger
+IMAGE_MAX_DIMENSION = 512  # img2vec resnet50 works on ~224px crops; default for WEAVIATE_IMAGE_MAX_DIMENSION
 
 
 def _ensure_not_decompression_bomb(img):
@@ -27,59 +35,95 @@ def _ensure_not_decompression_bomb(img):
         )
 
 
-def resize_image_if_needed(base64_string, max_size_mb=RESIZE_TARGET_MB):
-    """Resize the image if it's too large.
+def _encode_jpeg(img, quality):
+    buffered = BytesIO()
+    img.save(buffered, format="JPEG", quality=quality, optimize=True)
+    return buffered.getvalue()
+
+
+def resize_image_bytes_if_needed(image_bytes, max_size_mb=RESIZE_TARGET_MB):
+    """Resize raw image bytes if they exceed ``max_size_mb``.
 
     Adds guards for decompression bombs, ensures RGB output, clamps minimum
-    dimensions, and iteratively shrinks until under the byte cap.
+    dimensions, and iteratively shrinks until under the byte cap. Returns the
+    input object unchanged when no resize is needed, otherwise JPEG bytes.
+    Every shrinking attempt resamples the decoded source image, so the JPEG
+    output is never decoded again.
     """
-    try:
-        img_data = base64.b64decode(base64_string, validate=True)
-    except Exception as exc:
-        raise WeaviateImageError("Invalid base64 image data") from exc
-
     max_bytes = int(max_size_mb * 1024 * 1024)
+    size = len(image_bytes)
 
     try:
-        with Image.open(BytesIO(img_data)) as img:
+        with Image.open(BytesIO(image_bytes)) as img:
             _ensure_not_decompression_bomb(img)
 
             # Early return if already under limit after validation
-            if len(img_data) <= max_bytes:
-                return base64_string
+            if size <= max_bytes:
+                return image_bytes
 
             # Ensure compatibility with JPEG (no alpha, no palette)
-            if img.mode in ("RGBA", "LA", "P"):
-                img = img.convert("RGB")
+            source = img.convert("RGB") if img.mode in ("RGBA", "LA", "P") else img
+
+            ratio = (max_bytes / max(size, 1)) ** 0.5
+            out = None
+            for attempt in range(6):
+                scale = ratio * (0.9 ** attempt)
+                resized = source.resize(
+                    (max(1, int(source.width * scale)), max(1, int(source.height * scale))),
+                    Image.Resampling.LANCZOS,
+                )
+                out = _encode_jpeg(resized, quality=85 if attempt == 0 else 80)
+                if len(out) <= max_bytes:
+                    return out
+    except Image.DecompressionBombError as exc:
+        raise WeaviateImageError("Image rejected: decompression bomb risk") from exc
+    except UnidentifiedImageError as exc:
+        raise WeaviateImageError("Invalid image data") from exc
+
+    raise WeaviateImageError("Unable to resize image under size limit")
+
+
+def normalize_image_bytes(image_bytes, max_dimension=None):
+    """Downscale an image so its longest side is at most ``max_dimension`` pixels.
+
+    This is the stage every image goes through before it reaches the
+    img2vec vectorizer, both for ``near_image`` searches and insertion.
+    JPEGs are decoded at reduced scale via ``draft()``, then ``thumbnail()``
+    finishes the resize. Images already within bounds are returned unchanged,
+    otherwise RGB JPEG bytes are returned. ``max_dimension`` defaults to the
+    ``WEAVIATE_IMAGE_MAX_DIMENSION`` setting.
+    """
+    if max_dimension is None:
+        max_dimension = getattr(settings, 'WEAVIATE_IMAGE_MAX_DIMENSION', IMAGE_MAX_DIMENSION)
 
-            ratio = (max_bytes / max(len(img_data), 1)) ** 0.5
-            new_width = max(1, int(img.width * ratio))
-            new_height = max(1, int(img.height * ratio))
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    try:
+        with Image.open(BytesIO(image_bytes)) as img:
+            _ensure_not_decompression_bomb(img)
+
+            if max(img.size) <= max_dimension:
+                return image_bytes
 
-            buffered = BytesIO()
-            img.save(buffered, format="JPEG", quality=85, optimize=True)
-            out = buffered.getvalue()
+            # Let the decoder skip work (JPEG DCT scaling) before the pixels are loaded
+            img.draft("RGB", (max_dimension, max_dimension))
+            source = img.convert("RGB") if img.mode != "RGB" else img
+            source.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            return _encode_jpeg(source, quality=90)
     except Image.DecompressionBombError as exc:
         raise WeaviateImageError("Image rejected: decompression bomb risk") from exc
     except UnidentifiedImageError as exc:
         raise WeaviateImageError("Invalid image data") from exc
 
-    attempts = 0
-    while len(out) > max_bytes and attempts < 5:
-        attempts += 1
-        with Image.open(BytesIO(out)) as img2:
-            img2 = img2.resize(
-                (max(1, img2.width * 9 // 10), max(1, img2.height * 9 // 10)),
-                Image.Resampling.LANCZOS,
-            )
-            b2 = BytesIO()
-            img2.save(b2, format="JPEG", quality=80, optimize=True)
-            out = b2.getvalue()
-
-    if len(out) > max_bytes:
-        raise WeaviateImageError("Unable to resize image under size limit")
 
+def resize_image_if_needed(base64_string, max_size_mb=RESIZE_TARGET_MB):
+    """Base64 variant of ``resize_image_bytes_if_needed`` (base64 in, base64 out)."""
+    try:
+        img_data = base64.b64decode(base64_string, validate=True)
+    except Exception as exc:
+        raise WeaviateImageError("Invalid base64 image data") from exc
+
+    out = resize_image_bytes_if_needed(img_data, max_size_mb=max_size_mb)
+    if out is img_data:
+        return base64_string
     return base64.b64encode(out).decode()
 
 
@@ -141,9 +185,9 @@ def is_safe_url(url):
         return None
 
 
-def url_to_base64(url, timeout=10):
+def url_to_image_bytes(url, timeout=10):
     """
-    Convert image URL to base64 with size checking.
+    Download an image URL into bytes with size checking, resized below RESIZE_TARGET_MB.
     SECURITY: Includes SSRF protection and request timeout.
     """
     max_bytes = 10 * 1024 * 1024  # 10 MB hard cap
@@ -193,18 +237,19 @@ def url_to_base64(url, timeout=10):
                     if size > max_bytes:
                         raise WeaviateImageError("Image exceeds 10MB size limit")
 
-            # Stream download and enforce hard cap
-            data = BytesIO()
+            # Stream download and enforce hard cap; chunks are joined once at the end
+            chunks = []
             downloaded = 0
-            for chunk in response.iter_content(chunk_size=8192):
+            for chunk in response.iter_content(chunk_size=64 * 1024):
                 if not chunk:
                     continue
                 downloaded += len(chunk)
                 if downloaded > max_bytes:
                     raise WeaviateImageError("Image exceeds 10MB size limit during download")
-                data.write(chunk)
+                chunks.append(chunk)
 
-            image_bytes = data.getvalue()
+            image_bytes = b''.join(chunks)
+            del chunks
 
             # Validate content type
             content_type = response.headers.get('content-type', '')
@@ -221,82 +266,158 @@ def url_to_base64(url, timeout=10):
             except Exception:
                 raise WeaviateImageError("Downloaded content is not a valid image")
 
-    # Convert to base64
-    base64_string = base64.b64encode(image_bytes).decode()
-
     # Resize if needed
-    return resize_image_if_needed(base64_string, max_size_mb=RESIZE_TARGET_MB)
+    return resize_image_bytes_if_needed(image_bytes, max_size_mb=RESIZE_TARGET_MB)
+
+
+def url_to_base64(url, timeout=10):
+    """Download an image URL and return it base64 encoded (see ``url_to_image_bytes``)."""
+    return base64.b64encode(url_to_image_bytes(url, timeout=timeout)).decode()
 
 
 def check_object_exists(artworks, obj_uuid):
-    """Check if an object exists in Weaviate."""
-    import weaviate
+    """Check if an object exists in Weaviate (HEAD request, the object is not transferred)."""
     try:
-        result = artworks.query.fetch_object_by_id(str(obj_uuid))
-        return result is not None
-    except (weaviate.exceptions.WeaviateException, Exception) as exc:
+        return artworks.data.exists(str(obj_uuid))
+    except Exception as exc:
         logger.warning("Failed to check object %s: %s", obj_uuid, exc)
         return False
 
 
-def remove_if_exists(artworks, obj_uuid):
-    """Remove object if it exists in Weaviate."""
-    try:
-        if check_object_exists(artworks, obj_uuid):
-            artworks.data.delete_by_id(str(obj_uuid))
-            logger.debug(f"Removing already existing object with UUID: {obj_uuid}")
-            time.sleep(0.5)  # Give Weaviate time to process the deletion
-    except Exception as e:
-        logger.error(f"Error removing existing object: {str(e)}")
+def upsert_object(artworks, properties, obj_uuid):
+    """
+    Insert the object, or update it in place when the UUID is already taken.
 
+    UUIDs are derived from the image content (see ``artwork_object_uuid``),
+    so an existing object already holds this image; only the other
+    properties are patched and the blob is neither re-sent nor re-vectorized.
+    Returns True when the object was inserted.
+    """
+    if artworks.data.exists(str(obj_uuid)):
+        metadata = {name: value for name, value in properties.items() if name != "image"}
+        artworks.data.update(uuid=str(obj_uuid), properties=metadata)
+        return False
+    artworks.data.insert(properties=properties, uuid=str(obj_uuid))
+    return True
 
-def add_image_to_weaviate(artwork_psql_id, author_psql_id, arweave_image_url):
-    """Add an image to Weaviate with retry logic."""
-    logger.debug("Adding image to Weaviate")
-    max_retries = 3
-    current_try = 0
 
-    while current_try < max_retries:
-        with get_weaviate_client() as weaviate_client:
-            try:
-                artworks = weaviate_client.collections.get("Artworks")
+def backoff_delay(attempt, base=None, cap=None):
+    """Seconds to wait before retry ``attempt + 1``: exponential backoff with full jitter."""
+    base = getattr(settings, 'WEAVIATE_INGEST_BACKOFF_BASE', 0.5) if base is None else base
+    cap = getattr(settings, 'WEAVIATE_INGEST_BACKOFF_MAX', 8.0) if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
 
-                # Convert image to base64 with size handling
-                try:
-                    base64_string = url_to_base64(arweave_image_url)
-                except Exception as e:
-                    logger.error(f"Error converting image to base64: {str(e)}")
-                    return None
-
-                data_properties = {
-                    "artwork_psql_id": str(artwork_psql_id),
-                    "author_psql_id": str(author_psql_id),
-                    "image": base64_string
-                }
-
-                # Generate a deterministic ID, it will generate the same ID for the same data
-                obj_uuid = generate_uuid5(data_properties)
-                logger.debug(f"Adding image to Weaviate with UUID: {obj_uuid}")
-
-                remove_if_exists(artworks, obj_uuid)
-
-                uuid_str = artworks.data.insert(
-                    properties=data_properties,
-                    uuid=str(obj_uuid)
-                )
 
-                if check_object_exists(artworks, uuid_str):
-                    logger.info(f"Artwork {artwork_psql_id} successfully added to Weaviate with ID {uuid_str}")
-                    return uuid_str
+@dataclass(frozen=True)
+class ArtworkImage:
+    """A downloaded artwork image, normalized and ready to store."""
+    base64: str
+    content_hash: str
 
-                logger.warning(f"Failed to verify artwork {artwork_psql_id} in Weaviate")
-                return None
 
-            except Exception as e:
-                logger.warning(f"Attempt {current_try + 1} failed: {str(e)}")
-                current_try += 1
-                if current_try < max_retries:
-                    time.sleep(2)  # Wait before retrying
+def fetch_artwork_image(image_url):
+    """Download and normalize an artwork image; the content hash is computed here, once."""
+    image_bytes = normalize_image_bytes(url_to_image_bytes(image_url))
+    return ArtworkImage(base64=base64.b64encode(image_bytes).decode(), content_hash=image_content_hash(image_bytes))
+
+
+def artwork_object_uuid(artwork_psql_id, image_hash):
+    """Deterministic Weaviate UUID of an artwork image: same artwork and same image give the same id."""
+    return str(generate_uuid5(f"{artwork_psql_id}:{image_hash}", "Artworks"))
+
+
+def build_artwork_object(artwork_psql_id, author_psql_id, image, metadata=None):
+    """
+    Return the ``(properties, uuid)`` of the Artworks object for an ``ArtworkImage``.
+
+    ``metadata`` holds denormalized display properties (see ``metadata.py``).
+    """
+    data_properties = {
+        "artwork_psql_id": str(artwork_psql_id),
+        "author_psql_id": str(author_psql_id),
+        "image_hash": image.content_hash,
+        "image": image.base64,
+    }
+    if metadata:
+        data_properties.update(metadata)
+    return data_properties, artwork_object_uuid(artwork_psql_id, image.content_hash)
+
+
+def update_object_properties(updates):
+    """Patch the non-blob properties of existing Artworks objects; ``updates`` maps uuid -> properties."""
+    if not updates:
+        return
+    with get_weaviate_client() as weaviate_client:
+        artworks = artworks_collection(weaviate_client)
+        for obj_uuid, properties in updates.items():
+            artworks.data.update(uuid=str(obj_uuid), properties=properties)
+    clear_search_caches()
+
+
+def delete_replaced_artwork_objects(artwork_psql_id, current_uuid):
+    """
+    Delete the Artworks objects of an artwork other than ``current_uuid``.
+
+    A changed picture is stored under a new UUID; the object of the previous
+    image would otherwise stay searchable until the next sync.
+    """
+    with get_weaviate_client() as weaviate_client:
+        artworks = artworks_collection(weaviate_client)
+        artworks.data.delete_many(
+            where=Filter.by_property("artwork_psql_id").equal(str(artwork_psql_id))
+            & Filter.by_id().not_equal(current_uuid)
+        )
+    clear_search_caches()
+
+
+def add_image_to_weaviate(artwork_psql_id, author_psql_id, arweave_image_url, verify=None, metadata=None):
+    """
+    Upsert an artwork image into Weaviate, retrying with exponential backoff.
+
+    The object UUID is derived from the artwork id and the normalized image
+    content, so re-adding an unchanged image only patches its properties and
+    does not vectorize it again. With ``verify`` (default
+    ``WEAVIATE_INGEST_VERIFY``) an inserted object is read back. ``metadata``
+    is stored with the object (see ``metadata.py``). Returns ``(uuid,
+    image_hash)``, or None on failure.
+    """
+    logger.debug("Adding image to Weaviate")
+    if verify is None:
+        verify = getattr(settings, 'WEAVIATE_INGEST_VERIFY', True)
+    max_retries = getattr(settings, 'WEAVIATE_INGEST_MAX_RETRIES', 3)
+
+    # Download and downscale to the vectorizer's input resolution
+    try:
+        with ingest_step('fetch'):
+            image = fetch_artwork_image(arweave_image_url)
+    except Exception as e:
+        logger.error(f"Error converting image to base64: {str(e)}")
+        return None
+
+    data_properties, uuid_str = build_artwork_object(artwork_psql_id, author_psql_id, image, metadata)
+    logger.debug(f"Adding image to Weaviate with UUID: {uuid_str}")
+
+    for attempt in range(max_retries):
+        try:
+            with get_weaviate_client() as weaviate_client:
+                artworks = artworks_collection(weaviate_client)
+                with ingest_step('upsert'):
+                    inserted = upsert_object(artworks, data_properties, uuid_str)
+                if verify and inserted:
+                    with ingest_step('verify'):
+                        verified = check_object_exists(artworks, uuid_str)
+                    if not verified:
+                        logger.warning(f"Failed to verify artwork {artwork_psql_id} in Weaviate")
+                        return None
+
+            clear_search_caches()
+            logger.info(f"Artwork {artwork_psql_id} successfully added to Weaviate with ID {uuid_str}")
+            return uuid_str, image.content_hash
+
+        except Exception as e:
+            logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+            if attempt + 1 < max_retries:
+                time.sleep(backoff_delay(attempt))
 
     logger.error(f"Failed to add artwork to Weaviate after {max_retries} attempts")
     return None
@@ -0,0 +1,175 @@
+"""
+Incremental synchronization of the Artworks collection with Postgres.
+
+Every artwork row records the Weaviate object it was indexed as
+(``picture_image_weaviate_id``), the content hash of that image
+(``picture_image_hash``) and when it was indexed. The sync reads the
+collection once with the cursor iterator, without image blobs, and diffs it
+against those rows:
+
+- rows without a matching object are (re)ingested, which downloads the image;
+- objects whose author (or, with denormalized metadata, display fields)
+  changed are patched in place;
+- rows missing their fingerprint get it from the object, without a download;
+- objects no row points to any more are deleted.
+
+Everything else is left alone, so an up-to-date index costs one pass over
+both sides.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from django.db.models import Q
+from django.utils import timezone
+from weaviate.classes.query import Filter
+
+from artists.models import Artwork
+
+from .cache import clear_search_caches
+from .aliases import artworks_collection
+from .client import get_weaviate_client
+from .ingest import INDEX_FIELDS, INGEST_CHUNK_SIZE, INGEST_WORKERS, IngestReport, ingest_artworks, with_ingest_fields
+from .metadata import METADATA_PROPERTIES, metadata_enabled, metadata_if_enabled
+from .service import update_object_properties
+
+logger = logging.getLogger(__name__)
+
+SYNC_PROPERTIES = ["artwork_psql_id", "author_psql_id", "image_hash"]
+
+
+@dataclass
+class SyncPlan:
+    """Changes needed to bring Weaviate in line with Postgres."""
+    weaviate_uuids: set = field(default_factory=set)
+    insert: List[int] = field(default_factory=list)
+    update: Dict[str, dict] = field(default_factory=dict)
+    backfill: List[Artwork] = field(default_factory=list)
+    unindex: List[Artwork] = field(default_factory=list)
+    unchanged: int = 0
+
+
+@dataclass
+class SyncReport:
+    """Counters of a sync run; ``ingest`` is None when nothing had to be inserted."""
+    to_insert: int = 0
+    updated: int = 0
+    backfilled: int = 0
+    unindexed: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    elapsed: float = 0.0
+    ingest: Optional[IngestReport] = None
+
+    def __str__(self):
+        inserted = f"{self.ingest.indexed}/{self.to_insert}" if self.ingest else str(self.to_insert)
+        return (
+            f"{inserted} inserted, {self.updated} updated, {self.backfilled} backfilled, "
+            f"{self.unindexed} unindexed, {self.deleted} deleted, {self.unchanged} unchanged "
+            f"in {self.elapsed:.1f}s"
+        )
+
+
+def _indexable_artworks():
+    return Artwork.objects.exclude(Q(picture_url__isnull=True) | Q(picture_url=''))
+
+
+def plan_sync(chunk_size=INGEST_CHUNK_SIZE):
+    """Diff the Artworks collection against the artwork rows, without changing either."""
+    return_properties = SYNC_PROPERTIES + (METADATA_PROPERTIES if metadata_enabled() else [])
+    with get_weaviate_client() as weaviate_client:
+        collection = artworks_collection(weaviate_client)
+        objects = {
+            str(obj.uuid): obj.properties
+            for obj in collection.iterator(return_properties=return_properties)
+        }
+
+    plan = SyncPlan(weaviate_uuids=set(objects))
+    artworks = with_ingest_fields(Artwork.objects.all()).order_by('id')
+    for artwork in artworks.iterator(chunk_size=chunk_size):
+        obj_uuid = artwork.picture_image_weaviate_id
+        if not artwork.picture_url:
+            if obj_uuid or artwork.picture_image_hash:
+                plan.unindex.append(artwork)
+            continue
+
+        properties = objects.get(obj_uuid) if obj_uuid else None
+        image_hash = (properties or {}).get("image_hash")
+        # Missing, foreign, or stored before objects carried their content hash
+        if not properties or properties.get("artwork_psql_id") != str(artwork.id) or not image_hash:
+            plan.insert.append(artwork.id)
+            continue
+
+        in_sync = True
+        expected = {"author_psql_id": str(artwork.artist_id), **(metadata_if_enabled(artwork) or {})}
+        changed = {name: value for name, value in expected.items() if properties.get(name) != value}
+        if changed:
+            plan.update[obj_uuid] = changed
+            in_sync = False
+        if artwork.picture_image_hash != image_hash or artwork.weaviate_indexed_at is None:
+            artwork.picture_image_hash = image_hash
+            artwork.weaviate_indexed_at = artwork.weaviate_indexed_at or timezone.now()
+            plan.backfill.append(artwork)
+            in_sync = False
+        if in_sync:
+            plan.unchanged += 1
+    return plan
+
+
+def _delete_objects(uuids, chunk_size):
+    uuids = sorted(uuids)
+    with get_weaviate_client() as weaviate_client:
+        collection = artworks_collection(weaviate_client)
+        for start in range(0, len(uuids), chunk_size):
+            collection.data.delete_many(where=Filter.by_id().contains_any(uuids[start:start + chunk_size]))
+
+
+def sync_weaviate(dry_run=False, chunk_size=INGEST_CHUNK_SIZE, workers=INGEST_WORKERS, progress=None):
+    """
+    Apply ``plan_sync()``: ingest, patch, backfill and finally delete orphans.
+
+    Orphans are computed after ingestion from the ids the rows then point
+    to, so an object replaced by a re-ingested one is only deleted once its
+    replacement is saved. With ``dry_run`` nothing is written and
+    ``deleted`` counts the objects currently unreferenced.
+    """
+    started = time.monotonic()
+    plan = plan_sync(chunk_size=chunk_size)
+    report = SyncReport(
+        to_insert=len(plan.insert),
+        updated=len(plan.update),
+        backfilled=len(plan.backfill),
+        unindexed=len(plan.unindex),
+        unchanged=plan.unchanged,
+    )
+
+    if not dry_run:
+        if plan.insert:
+            to_ingest = with_ingest_fields(_indexable_artworks().filter(id__in=plan.insert)).order_by('id')
+            report.ingest = ingest_artworks(to_ingest, chunk_size=chunk_size, workers=workers, progress=progress)
+
+        update_object_properties(plan.update)
+
+        if plan.backfill:
+            Artwork.objects.bulk_update(plan.backfill, ['picture_image_hash', 'weaviate_indexed_at'],
+                                        batch_size=chunk_size)
+        if plan.unindex:
+            for artwork in plan.unindex:
+                artwork.reset_weaviate_index()
+            Artwork.objects.bulk_update(plan.unindex, INDEX_FIELDS, batch_size=chunk_size)
+
+    referenced = set(
+        _indexable_artworks().exclude(picture_image_weaviate_id='')
+        .values_list('picture_image_weaviate_id', flat=True)
+    )
+    orphans = plan.weaviate_uuids - referenced
+    report.deleted = len(orphans)
+    if orphans and not dry_run:
+        _delete_objects(orphans, chunk_size)
+
+    if not dry_run and (plan.update or orphans):
+        clear_search_caches()
+    report.elapsed = time.monotonic() - started
+    logger.info(f"Weaviate sync{' (dry run)' if dry_run else ''}: {report}")
+    return report
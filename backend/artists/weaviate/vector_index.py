@@ -0,0 +1,190 @@
+"""
+Vector index configuration of the Artworks collection.
+
+The index (HNSW or flat), its HNSW parameters and vector compression are
+set from ``WEAVIATE_VECTOR_INDEX``. A parameter left empty is not sent,
+so the server default applies, and it is not checked against the live
+collection either.
+
+Some parameters can be changed on a live collection: ``ef``, the dynamic
+``ef`` bounds, the vector cache size and enabling PQ compression. All the
+others (index type, distance, ``efConstruction``, ``maxConnections``, BQ)
+are fixed once the index is built and need a rebuild (see ``schema.py``).
+
+PQ is trained on the vectors already in the index, so it is never enabled
+on a new collection: ``migrate_schema()`` enables it in place once the
+collection holds ``PQ_MIN_OBJECTS`` objects.
+"""
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple
+
+import weaviate.classes as wvc
+from django.conf import settings
+from weaviate.collections.classes.config import BQConfig, PQConfig, SQConfig
+
+HNSW = "hnsw"
+FLAT = "flat"
+INDEX_TYPES = (HNSW, FLAT)
+COMPRESSIONS = ("none", "pq", "bq")
+PQ_MIN_OBJECTS = 10000
+
+# Parameters that can be updated on a live collection, by index type
+MUTABLE = {
+    HNSW: ("ef", "dynamic_ef_min", "dynamic_ef_max", "dynamic_ef_factor", "vector_cache_max_objects"),
+    FLAT: ("vector_cache_max_objects",),
+}
+
+
+def _int(value):
+    return int(value) if value not in (None, "") else None
+
+
+def _value(enum_or_str):
+    return getattr(enum_or_str, "value", enum_or_str)
+
+
+@dataclass(frozen=True)
+class VectorIndexSpec:
+    """Desired vector index; None leaves a parameter to the server."""
+    index_type: Optional[str] = None
+    distance: Optional[str] = None
+    # -1 lets Weaviate pick ef per query from the limit (dynamic ef)
+    ef: Optional[int] = None
+    dynamic_ef_min: Optional[int] = None
+    dynamic_ef_max: Optional[int] = None
+    dynamic_ef_factor: Optional[int] = None
+    ef_construction: Optional[int] = None
+    max_connections: Optional[int] = None
+    vector_cache_max_objects: Optional[int] = None
+    compression: Optional[str] = None
+    pq_segments: Optional[int] = None
+    pq_training_limit: Optional[int] = None
+
+    def __post_init__(self):
+        if self.index_type not in (None, *INDEX_TYPES):
+            raise ValueError(f"Unknown vector index type {self.index_type!r}, expected one of {INDEX_TYPES}")
+        if self.compression not in (None, *COMPRESSIONS):
+            raise ValueError(f"Unknown vector compression {self.compression!r}, expected one of {COMPRESSIONS}")
+        if self.kind == FLAT and self.compression == "pq":
+            raise ValueError("A flat index only supports BQ compression")
+
+    @classmethod
+    def from_settings(cls):
+        config = getattr(settings, "WEAVIATE_VECTOR_INDEX", {})
+        return cls(
+            index_type=config.get("index_type") or None,
+            distance=config.get("distance") or None,
+            compression=config.get("compression") or None,
+            **{name: _int(config.get(name)) for name in (
+                "ef", "dynamic_ef_min", "dynamic_ef_max", "dynamic_ef_factor", "ef_construction",
+                "max_connections", "vector_cache_max_objects", "pq_segments", "pq_training_limit",
+            )},
+        )
+
+    @property
+    def kind(self):
+        return self.index_type or HNSW
+
+    def _hnsw_params(self, names):
+        return {name: getattr(self, name) for name in names if getattr(self, name) is not None}
+
+    def to_config(self):
+        """``vector_index_config`` for ``collections.create``; PQ is left to ``to_reconfigure``."""
+        distance = wvc.config.VectorDistances(self.distance) if self.distance else None
+        bq = wvc.config.Configure.VectorIndex.Quantizer.bq() if self.compression == "bq" else None
+        if self.kind == FLAT:
+            return wvc.config.Configure.VectorIndex.flat(
+                distance_metric=distance, vector_cache_max_objects=self.vector_cache_max_objects, quantizer=bq,
+            )
+        return wvc.config.Configure.VectorIndex.hnsw(
+            distance_metric=distance,
+            quantizer=bq,
+            **self._hnsw_params(MUTABLE[HNSW] + ("ef_construction", "max_connections")),
+        )
+
+    def to_reconfigure(self, enable_pq=False):
+        """``vector_index_config`` for ``config.update`` with the mutable parameters."""
+        if self.kind == FLAT:
+            return wvc.config.Reconfigure.VectorIndex.flat(vector_cache_max_objects=self.vector_cache_max_objects)
+        quantizer = None
+        if enable_pq:
+            quantizer = wvc.config.Reconfigure.VectorIndex.Quantizer.pq(
+                segments=self.pq_segments, training_limit=self.pq_training_limit,
+            )
+        return wvc.config.Reconfigure.VectorIndex.hnsw(quantizer=quantizer, **self._hnsw_params(MUTABLE[HNSW]))
+
+    def describe(self):
+        params = {name: value for name, value in asdict(self).items() if value is not None}
+        return ", ".join(f"{name}={value}" for name, value in params.items()) or "server defaults"
+
+
+def vector_index_spec():
+    return VectorIndexSpec.from_settings()
+
+
+def _live_compression(index_config):
+    quantizer = getattr(index_config, "quantizer", None)
+    if quantizer is None:
+        return "none"
+    for config_class, name in ((PQConfig, "pq"), (BQConfig, "bq"), (SQConfig, "sq")):
+        if isinstance(quantizer, config_class):
+            return name
+    return type(quantizer).__name__
+
+
+def diff_vector_index(live_config, spec) -> Tuple[List[str], List[str]]:
+    """
+    Compare a live ``CollectionConfig`` with ``spec``.
+
+    Returns ``(mutable, immutable)`` descriptions of the differences; a
+    missing PQ compression is a mutable one.
+    """
+    mutable, immutable = [], []
+    live_type = _value(live_config.vector_index_type)
+    if live_type != spec.kind:
+        if spec.index_type is not None:
+            immutable.append(f"vector index is {live_type}, wanted {spec.kind}")
+        return mutable, immutable
+
+    index_config = live_config.vector_index_config
+    if spec.distance is not None and _value(index_config.distance_metric) != spec.distance:
+        immutable.append(f"distance is {_value(index_config.distance_metric)}, wanted {spec.distance}")
+    fixed = ("ef_construction", "max_connections") if spec.kind == HNSW else ()
+    for names, target in ((MUTABLE[spec.kind], mutable), (fixed, immutable)):
+        for name in names:
+            wanted, live = getattr(spec, name), getattr(index_config, name, None)
+            if wanted is not None and live != wanted:
+                target.append(f"{name} is {live}, wanted {wanted}")
+
+    if spec.compression is not None:
+        live_compression = _live_compression(index_config)
+        if live_compression != spec.compression:
+            change = f"compression is {live_compression}, wanted {spec.compression}"
+            # PQ can be switched on in place; anything else changes how the index is built
+            if spec.compression == "pq" and live_compression == "none":
+                mutable.append(change)
+            else:
+                immutable.append(change)
+    return mutable, immutable
+
+
+def needs_pq(live_config, spec):
+    return spec.compression == "pq" and _live_compression(live_config.vector_index_config) == "none"
+
+
+def estimate_index_memory(count, dims, spec):
+    """
+    Rough resident memory of an index of ``count`` vectors, in bytes.
+
+    Counts the cached vectors (or their compressed codes) and, for HNSW,
+    the layer-0 neighbour lists, which dominate the graph.
+    """
+    if spec.compression == "pq":
+        vectors = count * (spec.pq_segments or max(1, dims // 4))
+    elif spec.compression == "bq":
+        vectors = count * -(-dims // 8)
+    else:
+        vectors = count * dims * 4
+    if spec.kind == FLAT:
+        return vectors
+    return vectors + count * 2 * (spec.max_connections or 32) * 8
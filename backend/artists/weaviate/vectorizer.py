@@ -0,0 +1,93 @@
+"""
+Query image embeddings from the img2vec inference container.
+
+Weaviate vectorizes ``near_image`` queries itself, which means the same
+uploaded image is run through ResNet50 once per search call. When
+``IMAGE_INFERENCE_API`` points at the img2vec container that Weaviate uses,
+the backend fetches the embedding directly, keeps it in a bounded float32
+cache keyed by image content hash, and searches with ``near_vector`` instead.
+"""
+import base64
+import logging
+import threading
+from array import array
+
+import requests
+from django.conf import settings
+
+from .cache import LRUCache, image_content_hash
+from .exceptions import WeaviateConnectionError
+from .service import normalize_image_bytes
+
+logger = logging.getLogger(__name__)
+
+_embedding_cache = None
+_session = None
+_lock = threading.Lock()
+
+
+def image_vectorizer_enabled():
+    """Whether query embeddings are fetched directly from the inference API."""
+    return bool(getattr(settings, 'IMAGE_INFERENCE_API', ''))
+
+
+def get_embedding_cache():
+    """Return the process-wide embedding cache, creating it from settings on first use."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _lock:
+            if _embedding_cache is None:
+                # Embeddings of identical bytes never change, so entries only expire by LRU
+                _embedding_cache = LRUCache(
+                    max_entries=getattr(settings, 'WEAVIATE_EMBEDDING_CACHE_SIZE', 512),
+                    ttl=None,
+                )
+    return _embedding_cache
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = requests.Session()
+    return _session
+
+
+def _request_embedding(image_data_base64, image_hash):
+    url = f"{settings.IMAGE_INFERENCE_API.rstrip('/')}/vectors"
+    timeout = getattr(settings, 'IMAGE_INFERENCE_TIMEOUT', 30)
+    try:
+        response = _get_session().post(url, json={'id': image_hash, 'image': image_data_base64}, timeout=timeout)
+        response.raise_for_status()
+        vector = response.json()['vector']
+    except (requests.RequestException, ValueError, KeyError) as exc:
+        logger.error(f"Image inference request failed: {exc}", exc_info=True)
+        raise WeaviateConnectionError(f"Failed to vectorize image: {str(exc)}") from exc
+    return array('f', vector)
+
+
+def get_image_embedding(image_bytes, image_hash=None, image_data_base64=None):
+    """
+    Return the embedding of an image as a float32 ``array``.
+
+    The image is vectorized at most once per unique content while it stays in
+    the cache; ``image_hash`` and ``image_data_base64`` can be passed when the
+    caller already computed them (the base64 data of the normalized image).
+    """
+    image_hash = image_hash or image_content_hash(image_bytes)
+    cache = get_embedding_cache()
+    vector = cache.get(image_hash)
+    if vector is not None:
+        return vector
+
+    if image_data_base64 is None:
+        image_data_base64 = base64.b64encode(normalize_image_bytes(image_bytes)).decode('utf-8')
+    vector = _request_embedding(image_data_base64, image_hash)
+    cache.set(image_hash, vector)
+    return vector
+
+
+def clear_embedding_cache():
+    if _embedding_cache is not None:
+        _embedding_cache.clear()
@@ -31,5 +31,6 @@ else
 fi
 
 python3 manage.py migrate
+python3 manage.py createcachetable
 
 exec "$@"
\ No newline at end of file
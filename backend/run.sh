@@ -9,5 +9,12 @@ docker compose up -d
 # Set Django settings module
 export DJANGO_SETTINGS_MODULE=artist_registry.settings
 
+# Shared cache table (ARTISTS_CACHE_BACKEND=db) for runserver and run_jobs
+python3 manage.py createcachetable
+
+# Run the background job worker (Arweave uploads, Weaviate indexing)
+python3 manage.py run_jobs &
+trap 'kill $!' EXIT
+
 # Run Django server
 python3 manage.py runserver
\ No newline at end of file